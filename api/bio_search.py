@@ -0,0 +1,243 @@
+import math
+import re
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from api.indexes import StringHashTable
+from api.store import StringColumn
+
+
+WORD = re.compile(r"\w+")
+# BM25 parameters: term frequency saturation, and bio length normalization.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits a text into lowercased words.
+
+    :param text: The text to split.
+    :type text: str
+
+    :return: The words, in order.
+    """
+    return WORD.findall(text.lower())
+
+
+def delta_encode(positions: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compresses sorted posting lists: each position is stored as its gap to the previous one of its
+    list, as a variable-byte integer (7 bits per byte, the high bit telling that more bytes follow).
+
+    :param positions: The posting lists, one after the other, each sorted.
+    :type positions: np.ndarray
+    :param offsets: Where each posting list starts in `positions`, then where the last one ends.
+    :type offsets: np.ndarray
+
+    :return: The encoded bytes, and where each posting list starts in them (then where the last one ends).
+    """
+    gaps = positions.astype(np.uint64)
+    if len(gaps):
+        gaps[1:] -= positions[:-1].astype(np.uint64)
+        # The first position of each list is stored as is.
+        starts = offsets[:-1][offsets[:-1] < offsets[1:]]
+        gaps[starts] = positions[starts]
+    sizes = np.ones(len(gaps), dtype=np.int64)
+    for k in range(1, 10):
+        sizes += gaps >= np.uint64(1 << (7 * k))
+    ends = np.cumsum(sizes)
+    encoded = np.zeros(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+    for k in range(int(sizes.max()) if len(sizes) else 0):
+        more = sizes > k
+        value = (gaps[more] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        encoded[ends[more] - sizes[more] + k] = value | np.where(sizes[more] > k + 1, 0x80, 0).astype(np.uint64)
+    byte_offsets = np.concatenate(([0], ends))[offsets].astype(np.int64)
+    return encoded, byte_offsets
+
+def delta_decode(encoded: np.ndarray) -> np.ndarray:
+    """
+    Decompresses one posting list encoded by `delta_encode`.
+
+    :param encoded: The posting list's bytes.
+    :type encoded: np.ndarray
+
+    :return: The sorted positions.
+    """
+    if len(encoded) == 0:
+        return np.zeros(0, dtype=np.int64)
+    last = encoded < 0x80
+    starts = np.concatenate(([0], np.flatnonzero(last)[:-1] + 1))
+    # The index of each byte in its integer, lowest 7 bits first.
+    number = np.concatenate(([0], np.cumsum(last)[:-1]))
+    shifts = (np.arange(len(encoded)) - starts[number]) * 7
+    gaps = np.add.reduceat((encoded & 0x7F).astype(np.uint64) << shifts.astype(np.uint64), starts)
+    return np.cumsum(gaps).astype(np.int64)
+
+
+class BioSearch:
+    """
+    Inverted index of the words of the users bios, with BM25 ranking.
+
+    Each word maps to the sorted positions of the bios containing it, delta-encoded as variable-byte
+    integers (one or two bytes per position for common words), with the number of times the word
+    appears in each bio. Like `LoginSearch`, the index is held in flat arrays, which can be saved and
+    memory-mapped.
+
+    :param bios: The bios to index, in load order.
+    :type bios: Iterable[str]
+    """
+    def __init__(self, bios: Iterable[str]):
+        # (term, position, frequency) triples are collected as flat arrays, then grouped by term with one stable sort.
+        term_ids: Dict[str, int] = {}
+        pair_terms = array("q")
+        pair_positions = array("q")
+        pair_frequencies = array("q")
+        lengths = array("q")
+        for position, bio in enumerate(bios):
+            words = tokenize(bio)
+            lengths.append(len(words))
+            for term, frequency in Counter(words).items():
+                pair_terms.append(term_ids.setdefault(term, len(term_ids)))
+                pair_positions.append(position)
+                pair_frequencies.append(frequency)
+        pair_terms = np.frombuffer(pair_terms, dtype=np.int64) if pair_terms else np.zeros(0, dtype=np.int64)
+        pair_positions = np.frombuffer(pair_positions, dtype=np.int64) if pair_positions else np.zeros(0, dtype=np.int64)
+        pair_frequencies = np.frombuffer(pair_frequencies, dtype=np.int64) if pair_frequencies else np.zeros(0, dtype=np.int64)
+        terms = list(term_ids)
+
+        self._terms = StringColumn.from_strings(terms)
+        self._term_table = StringHashTable.build(terms)
+        order = np.argsort(pair_terms, kind="stable")
+        counts = np.bincount(pair_terms, minlength=len(terms))
+        self._posting_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self._postings, self._posting_bytes = delta_encode(pair_positions[order], self._posting_offsets)
+        # Bios are at most a few hundred characters: a byte per frequency and two per length are enough.
+        self._frequencies = np.minimum(pair_frequencies[order], 0xFF).astype(np.uint8)
+        self._lengths = np.minimum(np.frombuffer(lengths, dtype=np.int64) if lengths else np.zeros(0, dtype=np.int64),
+                                   0xFFFF).astype(np.uint16)
+        self._average_length = float(self._lengths.mean()) if len(self._lengths) else 0.0
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def _term(self, term: str) -> int | None:
+        return self._term_table.get(term, self._terms.__getitem__)
+
+    def _posting(self, i: int) -> np.ndarray:
+        return delta_decode(self._postings[self._posting_bytes[i]:self._posting_bytes[i + 1]])
+
+    def _match(self, query: str) -> Tuple[np.ndarray, List[int], List[np.ndarray]]:
+        """
+        Gets the bios containing every word of a query, with the posting lists of the words.
+
+        :return: The sorted positions of the matching bios, the words' numbers, and their decoded posting lists.
+        """
+        terms = [self._term(term) for term in set(tokenize(query))]
+        if not terms or None in terms:
+            return np.zeros(0, dtype=np.int64), [], []
+        postings = [self._posting(i) for i in terms]
+        # Intersecting from the rarest word keeps every step as small as the smallest posting list:
+        # its positions are binary searched in the longer lists.
+        positions = min(postings, key=len)
+        for posting in postings:
+            found = np.searchsorted(posting, positions)
+            found[found == len(posting)] = 0
+            positions = positions[posting[found] == positions]
+        return positions, terms, postings
+
+    def positions(self, query: str) -> np.ndarray:
+        """
+        Gets the bios containing every word of a query.
+
+        :param query: The words to search for (case-insensitive).
+        :type query: str
+
+        :return: The sorted positions of the matching bios.
+        """
+        return self._match(query)[0]
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the bios containing every word of a query, with their BM25 score for it.
+
+        :param query: The words to search for (case-insensitive).
+        :type query: str
+
+        :return: The sorted positions of the matching bios, and their scores.
+        """
+        positions, terms, postings = self._match(query)
+        scores = np.zeros(len(positions), dtype=np.float64)
+        if not len(positions):
+            return positions, scores
+        count = len(self._lengths)
+        norms = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[positions] / (self._average_length or 1))
+        for i, posting in zip(terms, postings):
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            frequencies = self._frequencies[self._posting_offsets[i] + np.searchsorted(posting, positions)]
+            scores += idf * frequencies * (BM25_K1 + 1) / (frequencies + norms)
+        return positions, scores
+
+    def search(self, query: str, skip: int = 0, limit: int | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the bios containing every word of a query, best BM25 score first.
+
+        :param query: The words to search for (case-insensitive).
+        :type query: str
+        :param skip: How many bios to skip.
+        :type skip: int
+        :param limit: How many bios to return (default: all of them).
+        :type limit: int | None
+
+        :return: The positions of the bios of the page, and their scores. Ties are in load order.
+        """
+        positions, scores = self.scores(query)
+        end = len(positions) if limit is None else min(len(positions), skip + limit)
+        if end < len(positions):
+            # Only the bios up to the page's end are sorted. Positions break ties, so they are kept
+            # whole: every bio scoring like the page's last one.
+            threshold = np.partition(-scores, end - 1)[end - 1]
+            kept = -scores <= threshold
+            positions, scores = positions[kept], scores[kept]
+        order = np.lexsort((positions, -scores))[skip:end]
+        return positions[order], scores[order]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Gets the arrays holding the index, to save them.
+
+        :return: The arrays, by name.
+        """
+        return {
+            **self._terms.arrays("bio_search.terms"),
+            **self._term_table.arrays("bio_search.term_table"),
+            "bio_search.posting_offsets": self._posting_offsets,
+            "bio_search.posting_bytes": self._posting_bytes,
+            "bio_search.postings": self._postings,
+            "bio_search.frequencies": self._frequencies,
+            "bio_search.lengths": self._lengths,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "BioSearch":
+        """
+        Builds an index from arrays saved by `arrays`.
+
+        :param arrays: The arrays, by name.
+        :type arrays: Dict[str, np.ndarray]
+
+        :return: The index.
+        """
+        search = cls.__new__(cls)
+        search._terms = StringColumn.from_arrays(arrays, "bio_search.terms")
+        search._term_table = StringHashTable.from_arrays(arrays, "bio_search.term_table")
+        search._posting_offsets = arrays["bio_search.posting_offsets"]
+        search._posting_bytes = arrays["bio_search.posting_bytes"]
+        search._postings = arrays["bio_search.postings"]
+        search._frequencies = arrays["bio_search.frequencies"]
+        search._lengths = arrays["bio_search.lengths"]
+        search._average_length = float(search._lengths.mean()) if len(search._lengths) else 0.0
+        return search
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from fastapi import Request, Response
+
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(1024 * 1024)))
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of rendered responses, for one dataset version at a time.
+
+    Entries are tagged with the dataset version they were rendered from: the first lookup with
+    another version empties the cache, so responses from a previous dataset are never served.
+
+    :param size: How many responses to keep.
+    :type size: int
+    :param max_bytes: The largest body to keep, in bytes; larger responses are not cached.
+    :type max_bytes: int
+    """
+    def __init__(self, size: int = RESPONSE_CACHE_SIZE, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._version: str | None = None
+        self._entries: OrderedDict[Hashable, tuple[int, bytes, str, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: str) -> None:
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version: str, key: Hashable) -> Response | None:
+        """
+        Gets a cached response.
+
+        :param version: The current dataset version.
+        :type version: str
+        :param key: The response key.
+        :type key: Hashable
+
+        :return: A copy of the cached response, or None if not cached.
+        """
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        status_code, body, media_type, headers = entry
+        return Response(body, status_code=status_code, media_type=media_type, headers=headers)
+
+    def put(self, version: str, key: Hashable, response: Response) -> None:
+        """
+        Caches a response, unless its body is too large.
+
+        :param version: The dataset version the response was rendered from.
+        :type version: str
+        :param key: The response key.
+        :type key: Hashable
+        :param response: The rendered response.
+        :type response: Response
+        """
+        if len(response.body) > self.max_bytes:
+            return
+        headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (response.status_code, response.body, response.media_type, headers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Empties the cache and resets its counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+response_cache = ResponseCache()
+
+def etag_matches(request: Request, etag: str, wildcard: bool = True) -> bool:
+    """
+    Checks whether the client's `If-None-Match` header matches an ETag.
+
+    :param request: The request.
+    :type request: Request
+    :param etag: The current ETag, quoted.
+    :type etag: str
+    :param wildcard: Whether `*` matches, i.e. whether the resource is known to exist.
+    :type wildcard: bool
+
+    :return: Whether the client's copy is up to date.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return (wildcard and "*" in tags) or any(tag.removeprefix("W/") == etag for tag in tags)
+
+def cached_response(request: Request, version: str, render: Callable[[], Response], cache: bool = True) -> Response:
+    """
+    Serves a read-only response, with HTTP caching headers, from the response cache when possible.
+
+    The ETag is the dataset version and a hash of the path and query, so it stays valid until the
+    dataset changes, across workers and restarts, and only for the same url. A client sending it back
+    in `If-None-Match` gets an empty 304 response without the response being rendered: the ETag was
+    only given with a successful response, which stays the same for the dataset version. `*` matches
+    any existing resource, so it is only checked once the response is rendered: errors (e.g. 404)
+    are still returned.
+
+    :param request: The request.
+    :type request: Request
+    :param version: The dataset version the response is rendered from.
+    :type version: str
+    :param render: Renders the response, on a cache miss.
+    :type render: Callable[[], Response]
+    :param cache: Whether to keep the rendered response in the response cache.
+    :type cache: bool
+
+    :return: The response.
+    """
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+    headers = {"ETag": f'"{version}-{digest}"', "Cache-Control": f"private, max-age={HTTP_CACHE_MAX_AGE}"}
+    if etag_matches(request, headers["ETag"], wildcard=False):
+        return Response(status_code=304, headers=headers)
+
+    response = response_cache.get(version, key) if cache else None
+    if response is None:
+        response = render()
+        response.headers.update(headers)
+        if cache and response.status_code == 200:
+            response_cache.put(version, key, response)
+    if response.status_code == 200 and etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return response
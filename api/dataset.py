@@ -0,0 +1,249 @@
+import json
+import os
+import shutil
+from typing import Dict, Iterable
+
+import numpy as np
+
+from api.bio_search import BioSearch
+from api.indexes import UserIndex
+from api.search import LoginSearch
+from api.store import UserStore
+from json_stream import iter_json_list
+from storage import is_parquet, read_user_columns
+
+
+SNAPSHOT_VERSION = 5
+SORT_KEYS = ("id", "login", "created_at")
+
+
+class Dataset:
+    """
+    The users store with the indexes built over it.
+
+    :param users: The users store.
+    :type users: UserStore
+    :param index: The login and id indexes.
+    :type index: UserIndex
+    :param search: The login search engine.
+    :type search: LoginSearch
+    :param bio_search: The bios words index.
+    :type bio_search: BioSearch
+    """
+    def __init__(self, users: UserStore, index: UserIndex, search: LoginSearch, bio_search: BioSearch):
+        self.users = users
+        self.index = index
+        self.search = search
+        self.bio_search = bio_search
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "Dataset":
+        """
+        Builds the store and its indexes from users records.
+
+        :param records: The users records.
+        :type records: Iterable[dict]
+
+        :return: The dataset.
+        """
+        return cls.from_store(UserStore.from_records(records))
+
+    @classmethod
+    def from_store(cls, users: UserStore) -> "Dataset":
+        """
+        Builds the indexes over a users store.
+
+        :param users: The users store.
+        :type users: UserStore
+
+        :return: The dataset.
+        """
+        return cls(users, UserIndex(users.ids, users.logins, created_at=users.created_at),
+                   LoginSearch(users.logins), BioSearch(users.bios))
+
+    def select(self, sort: str = "id", created_after: int | None = None, created_before: int | None = None,
+               has_bio: bool | None = None, bio: str | None = None, after_id: int | None = None,
+               skip: int = 0, limit: int | None = None) -> np.ndarray:
+        """
+        Gets the users matching some filters, in the order of a sort key.
+
+        The order comes from a precomputed permutation (ids, logins or creation dates, all sorted at
+        load time). Filters are turned into a mask over the store, from the creation dates index, the
+        bios words index and the bio presence flags, and the permutation is walked a chunk at a time
+        until the page is full.
+
+        :param sort: The sort key: "id", "login" (case-insensitive) or "created_at".
+        :type sort: str
+        :param created_after: The oldest creation date, as epoch seconds, included (optional).
+        :type created_after: int | None
+        :param created_before: The newest creation date, as epoch seconds, excluded (optional).
+        :type created_before: int | None
+        :param has_bio: Only users with (True) or without (False) a bio (optional).
+        :type has_bio: bool | None
+        :param bio: Only users whose bio contains every word of this text (optional).
+        :type bio: str | None
+        :param after_id: Only users with a greater id; requires sorting by id (optional).
+        :type after_id: int | None
+        :param skip: How many matching users to skip.
+        :type skip: int
+        :param limit: How many matching users to get (None for all of them).
+        :type limit: int | None
+
+        :return: The users positions.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        if after_id is not None and sort != "id":
+            raise ValueError("after_id requires sorting by id")
+        has_date_range = created_after is not None or created_before is not None
+
+        if sort == "id":
+            order = self.index.positions_by_id(after_id)
+        elif sort == "login":
+            order = self.search.positions_by_login()
+        else:
+            order = self.index.positions_by_created_at(created_after, created_before)
+
+        mask = None
+        if has_date_range and sort != "created_at":
+            mask = np.zeros(len(self.users), dtype=bool)
+            mask[self.index.positions_by_created_at(created_after, created_before)] = True
+        if has_bio is not None:
+            with_bio = self.users.has_bio if has_bio else ~self.users.has_bio
+            mask = with_bio if mask is None else mask & with_bio
+        if bio is not None:
+            matching = np.zeros(len(self.users), dtype=bool)
+            matching[self.bio_search.positions(bio)] = True
+            mask = matching if mask is None else mask & matching
+
+        stop = None if limit is None else skip + limit
+        if mask is None:
+            return order[skip:stop]
+        return first_matching(order, mask, stop)[skip:]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Gets the arrays holding the dataset, to save them.
+
+        :return: The arrays, by name.
+        """
+        return {**self.users.arrays(), **self.index.arrays(), **self.search.arrays(), **self.bio_search.arrays()}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "Dataset":
+        """
+        Builds a dataset from arrays saved by `arrays`.
+
+        :param arrays: The arrays, by name.
+        :type arrays: Dict[str, np.ndarray]
+
+        :return: The dataset.
+        """
+        users = UserStore.from_arrays(arrays)
+        return cls(users, UserIndex.from_arrays(arrays, users.logins), LoginSearch.from_arrays(arrays),
+                   BioSearch.from_arrays(arrays))
+
+
+def first_matching(order: np.ndarray, mask: np.ndarray, stop: int | None, chunk_size: int = 65536) -> np.ndarray:
+    """
+    Gets the first positions of a permutation that are set in a mask.
+
+    :param order: The positions, in order.
+    :type order: np.ndarray
+    :param mask: Which positions to keep.
+    :type mask: np.ndarray
+    :param stop: How many positions to get (None for all of them).
+    :type stop: int | None
+    :param chunk_size: How many positions to check at once.
+    :type chunk_size: int
+
+    :return: The kept positions, in order.
+    """
+    kept = []
+    found = 0
+    for begin in range(0, len(order), chunk_size):
+        chunk = order[begin:begin + chunk_size]
+        chunk = chunk[mask[chunk]]
+        kept.append(chunk)
+        found += len(chunk)
+        if stop is not None and found >= stop:
+            break
+    if not kept:
+        return order[0:0]
+    return np.concatenate(kept)[:stop]
+
+
+def save_snapshot(dataset: Dataset, snapshot_path: str) -> None:
+    """
+    Saves a dataset as a binary snapshot: a directory of `.npy` arrays and a manifest.
+
+    The snapshot is written next to the previous one and swapped in with a rename, so readers never
+    see a partial snapshot.
+
+    :param dataset: The dataset to save.
+    :type dataset: Dataset
+    :param snapshot_path: The snapshot directory.
+    :type snapshot_path: str
+    """
+    tmp_path = f"{snapshot_path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    arrays = dataset.arrays()
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": SNAPSHOT_VERSION, "users": len(dataset.users), "arrays": sorted(arrays)}, f)
+
+    old_path = f"{snapshot_path}.old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(snapshot_path):
+        os.rename(snapshot_path, old_path)
+    os.rename(tmp_path, snapshot_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    print(f"Saved snapshot: {len(dataset.users)} users")
+
+def load_snapshot(snapshot_path: str) -> Dataset:
+    """
+    Loads a binary snapshot, memory-mapping its arrays instead of reading them.
+
+    Processes mapping the same snapshot share its pages.
+
+    :param snapshot_path: The snapshot directory.
+    :type snapshot_path: str
+
+    :return: The dataset.
+    """
+    with open(os.path.join(snapshot_path, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {manifest['version']}")
+    arrays = {name: np.load(os.path.join(snapshot_path, f"{name}.npy"), mmap_mode="r") for name in manifest["arrays"]}
+    print(f"Loaded users: {manifest['users']} (snapshot)")
+    return Dataset.from_arrays(arrays)
+
+def load_dataset(file_path: str, snapshot_path: str | None = None) -> Dataset:
+    """
+    Loads the users, from their snapshot if it is at least as recent as the users file.
+
+    A Parquet users file (`.parquet`) is read straight into the store's columns.
+
+    :param file_path: The path to the filtered users JSON or Parquet file.
+    :type file_path: str
+    :param snapshot_path: The snapshot directory (optional).
+    :type snapshot_path: str | None
+
+    :return: The dataset.
+    """
+    manifest_path = os.path.join(snapshot_path, "manifest.json") if snapshot_path else None
+    if manifest_path and os.path.exists(manifest_path) and (
+            not os.path.exists(file_path) or os.path.getmtime(manifest_path) >= os.path.getmtime(file_path)):
+        try:
+            return load_snapshot(snapshot_path)
+        except ValueError as e:
+            print(f"Ignoring snapshot: {e}")
+    if is_parquet(file_path):
+        dataset = Dataset.from_store(UserStore.from_arrays(read_user_columns(file_path)))
+    else:
+        dataset = Dataset.from_records(iter_json_list(file_path))
+    print(f"Loaded users: {len(dataset.users)}")
+    return dataset
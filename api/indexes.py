@@ -0,0 +1,283 @@
+import zlib
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+
+INT64_MIN, INT64_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
+
+
+def string_hash(value: str) -> int:
+    """
+    Hashes a string, the same way in every process (unlike `hash`).
+
+    :param value: The string to hash.
+    :type value: str
+
+    :return: The 32 bits hash.
+    """
+    return zlib.crc32(value.encode("utf-8"))
+
+
+class StringHashTable:
+    """
+    Open addressing hash table from strings to positions, held in flat arrays.
+
+    The keys themselves are not stored: a lookup compares the searched key to `key_at(position)`.
+    Being plain arrays, tables can be saved and memory-mapped.
+
+    :param positions: The position stored in each slot (-1 for an empty slot).
+    :type positions: np.ndarray
+    :param hashes: The hash of the key stored in each slot.
+    :type hashes: np.ndarray
+    """
+    def __init__(self, positions: np.ndarray, hashes: np.ndarray):
+        self.positions = positions
+        self.hashes = hashes
+        self._mask = len(positions) - 1
+
+    @classmethod
+    def build(cls, keys: Sequence[str]) -> "StringHashTable":
+        """
+        Builds a table mapping each key to its position in `keys`. For duplicated keys, the first one wins.
+
+        :param keys: The keys.
+        :type keys: Sequence[str]
+
+        :return: The table.
+        """
+        size = 1 << max(4, (2 * len(keys)).bit_length())
+        mask = size - 1
+        key_hashes = np.fromiter((string_hash(key) for key in keys), dtype=np.int64, count=len(keys))
+        positions = np.full(size, -1, dtype=np.int64)
+
+        # Linear probing, one probe step per round for every key not placed yet. Pending keys stay
+        # in position order, so the first of several keys probing the same free slot gets it.
+        pending = np.arange(len(keys), dtype=np.int64)
+        slots = key_hashes & mask
+        while len(pending):
+            free = np.flatnonzero(positions[slots] == -1)
+            taken_slots, first = np.unique(slots[free], return_index=True)
+            positions[taken_slots] = pending[free[first]]
+            placed = np.zeros(len(pending), dtype=bool)
+            placed[free[first]] = True
+            pending = pending[~placed]
+            slots = (slots[~placed] + 1) & mask
+
+        hashes = np.zeros(size, dtype=np.uint32)
+        occupied = positions != -1
+        hashes[occupied] = key_hashes[positions[occupied]]
+        return cls(positions, hashes)
+
+    def get(self, key: str, key_at: Callable[[int], str]) -> Optional[int]:
+        """
+        Gets the position of a key.
+
+        :param key: The key to look for.
+        :type key: str
+        :param key_at: Gets the key stored at a position.
+        :type key_at: Callable[[int], str]
+
+        :return: The key's position, or None if not found.
+        """
+        key_hash = string_hash(key)
+        slot = key_hash & self._mask
+        while (position := int(self.positions[slot])) != -1:
+            if self.hashes[slot] == key_hash and key_at(position) == key:
+                return position
+            slot = (slot + 1) & self._mask
+        return None
+
+    def arrays(self, name: str) -> Dict[str, np.ndarray]:
+        """
+        Gets the arrays holding the table, to save them.
+
+        :param name: The table name, used as a prefix.
+        :type name: str
+
+        :return: The arrays, by name.
+        """
+        return {f"{name}.positions": self.positions, f"{name}.hashes": self.hashes}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], name: str) -> "StringHashTable":
+        """
+        Builds a table from arrays saved by `arrays`.
+
+        :param arrays: The arrays, by name.
+        :type arrays: Dict[str, np.ndarray]
+        :param name: The table name, used as a prefix.
+        :type name: str
+
+        :return: The table.
+        """
+        return cls(arrays[f"{name}.positions"], arrays[f"{name}.hashes"])
+
+
+class UserIndex:
+    """
+    In-memory indexes over a users store, built once.
+
+    Lookups by login are O(1) hash table lookups, lookups by id are a binary search over the sorted ids,
+    instead of a scan over the whole store. Both return positions in the store. Creation dates are
+    sorted too, so that date ranges are binary searches.
+
+    :param ids: The users ids, in store order.
+    :type ids: np.ndarray
+    :param logins: The users logins, in store order.
+    :type logins: Sequence[str]
+    :param case_insensitive: Whether to also build a lowercased login index.
+    :type case_insensitive: bool
+    :param created_at: The users creation dates, as epoch seconds, in store order (optional).
+    :type created_at: np.ndarray | None
+    """
+    def __init__(self, ids: np.ndarray, logins: Sequence[str], case_insensitive: bool = True,
+                 created_at: np.ndarray | None = None):
+        self.logins = logins
+        self._by_login = StringHashTable.build(logins)
+        self._by_lower_login = StringHashTable.build([login.lower() for login in logins]) if case_insensitive else None
+        # A stable sort keeps the first occurrence of duplicated ids first.
+        self._id_order = np.argsort(ids, kind="stable")
+        self._sorted_ids = np.asarray(ids)[self._id_order]
+        if created_at is not None:
+            self._created_order = np.argsort(created_at, kind="stable")
+            self._sorted_created_at = np.asarray(created_at)[self._created_order]
+        else:
+            self._created_order = self._sorted_created_at = None
+
+    @property
+    def case_insensitive(self) -> bool:
+        return self._by_lower_login is not None
+
+    def __len__(self) -> int:
+        return len(self._sorted_ids)
+
+    def get_by_login(self, login: str, case_insensitive: bool = False) -> Optional[int]:
+        """
+        Gets a user's position from its login.
+
+        :param login: The login to look for.
+        :type login: str
+        :param case_insensitive: Whether to ignore the login's case.
+        :type case_insensitive: bool
+
+        :return: The user's position, or None if not found.
+        """
+        if case_insensitive:
+            if not self.case_insensitive:
+                raise ValueError("Case-insensitive lookups require an index built with case_insensitive=True")
+            return self._by_lower_login.get(login.lower(), lambda position: self.logins[position].lower())
+        return self._by_login.get(login, self.logins.__getitem__)
+
+    def get_by_id(self, user_id: int) -> Optional[int]:
+        """
+        Gets a user's position from its id.
+
+        :param user_id: The id to look for.
+        :type user_id: int
+
+        :return: The user's position, or None if not found.
+        """
+        if not INT64_MIN <= user_id <= INT64_MAX:
+            return None
+        i = int(self._sorted_ids.searchsorted(user_id))
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == user_id:
+            return int(self._id_order[i])
+        return None
+
+    def get_by_ids(self, user_ids: Sequence[int]) -> np.ndarray:
+        """
+        Gets several users' positions from their ids, with one vectorized binary search.
+
+        :param user_ids: The ids to look for.
+        :type user_ids: Sequence[int]
+
+        :return: The users positions, -1 for the ids not found.
+        """
+        user_ids = [user_id if INT64_MIN <= user_id <= INT64_MAX else None for user_id in user_ids]
+        in_range = np.array([user_id is not None for user_id in user_ids], dtype=bool)
+        searched = np.array([user_id for user_id in user_ids if user_id is not None], dtype=np.int64)
+        positions = np.full(len(user_ids), -1, dtype=np.int64)
+        i = self._sorted_ids.searchsorted(searched)
+        found = i < len(self._sorted_ids)
+        found[found] = self._sorted_ids[i[found]] == searched[found]
+        positions[np.flatnonzero(in_range)[found]] = self._id_order[i[found]]
+        return positions
+
+    def positions_by_id(self, after_id: Optional[int] = None, skip: int = 0, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Gets users positions in id order, for keyset pagination.
+
+        :param after_id: Only get users with a greater id (optional).
+        :type after_id: int | None
+        :param skip: How many users to skip, after `after_id`.
+        :type skip: int
+        :param limit: How many users to get (None for all of them).
+        :type limit: int | None
+
+        :return: The users positions.
+        """
+        if after_id is None or after_id < INT64_MIN:
+            start = 0
+        elif after_id > INT64_MAX:
+            start = len(self._sorted_ids)
+        else:
+            start = int(self._sorted_ids.searchsorted(after_id, side="right"))
+        start += skip
+        stop = None if limit is None else start + limit
+        return self._id_order[start:stop]
+
+    def positions_by_created_at(self, created_after: Optional[int] = None,
+                                created_before: Optional[int] = None) -> np.ndarray:
+        """
+        Gets users positions in creation date order, for a range of creation dates.
+
+        :param created_after: The oldest creation date, as epoch seconds, included (optional).
+        :type created_after: int | None
+        :param created_before: The newest creation date, as epoch seconds, excluded (optional).
+        :type created_before: int | None
+
+        :return: The users positions.
+        """
+        if self._created_order is None:
+            raise ValueError("Creation date lookups require an index built with created_at")
+        start = 0 if created_after is None else int(self._sorted_created_at.searchsorted(created_after, side="left"))
+        stop = None if created_before is None else int(self._sorted_created_at.searchsorted(created_before, side="left"))
+        return self._created_order[start:stop]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Gets the arrays holding the indexes, to save them.
+
+        :return: The arrays, by name.
+        """
+        arrays = {"index.id_order": self._id_order, "index.sorted_ids": self._sorted_ids,
+                  **self._by_login.arrays("index.by_login")}
+        if self._by_lower_login is not None:
+            arrays.update(self._by_lower_login.arrays("index.by_lower_login"))
+        if self._created_order is not None:
+            arrays.update({"index.created_order": self._created_order, "index.sorted_created_at": self._sorted_created_at})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], logins: Sequence[str]) -> "UserIndex":
+        """
+        Builds indexes from arrays saved by `arrays`.
+
+        :param arrays: The arrays, by name.
+        :type arrays: Dict[str, np.ndarray]
+        :param logins: The users logins, in store order.
+        :type logins: Sequence[str]
+
+        :return: The indexes.
+        """
+        index = cls.__new__(cls)
+        index.logins = logins
+        index._by_login = StringHashTable.from_arrays(arrays, "index.by_login")
+        index._by_lower_login = (StringHashTable.from_arrays(arrays, "index.by_lower_login")
+                                 if "index.by_lower_login.positions" in arrays else None)
+        index._id_order = arrays["index.id_order"]
+        index._sorted_ids = arrays["index.sorted_ids"]
+        index._created_order = arrays.get("index.created_order")
+        index._sorted_created_at = arrays.get("index.sorted_created_at")
+        return index
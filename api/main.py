@@ -1,8 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from api.metrics import MetricsMiddleware, metrics, profiler
+from api.models import reloader
 from api.routes import router
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    reloader.start()
+    profiler.start()
+    yield
+    reloader.stop()
+    if profiler.keep > 0:
+        profiler.stop()
+        profiler.dump()
+
+app = FastAPI(lifespan=lifespan)
 
+app.add_middleware(MetricsMiddleware, metrics=metrics, profiler=profiler)
 app.include_router(router)
\ No newline at end of file
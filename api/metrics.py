@@ -0,0 +1,265 @@
+import heapq
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+PROFILE_SLOWEST = int(os.getenv("PROFILE_SLOWEST", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+
+
+class Histogram:
+    """
+    Cumulative histogram, as exposed by Prometheus.
+
+    :param buckets: The buckets upper bounds, sorted.
+    :type buckets: tuple
+    """
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class Metrics:
+    """
+    Per-route request counts, latency and response size histograms, and authentication failures.
+
+    Routes are labelled with their path template (e.g. `/users/{user_login}`), so the number of
+    series stays bounded.
+    """
+    def __init__(self):
+        self.requests: Counter[tuple[str, str, int]] = Counter()
+        self.latencies: dict[str, Histogram] = {}
+        self.sizes: dict[str, Histogram] = {}
+        self.auth_failures = 0
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float, size: int) -> None:
+        """
+        Records a served request.
+
+        :param method: The HTTP method.
+        :type method: str
+        :param route: The route path template.
+        :type route: str
+        :param status_code: The response status code.
+        :type status_code: int
+        :param seconds: How long the request took, until its last body byte was sent.
+        :type seconds: float
+        :param size: The response body size, in bytes.
+        :type size: int
+        """
+        with self._lock:
+            self.requests[(method, route, status_code)] += 1
+            self.latencies.setdefault(route, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.sizes.setdefault(route, Histogram(SIZE_BUCKETS)).observe(size)
+
+    def auth_failed(self) -> None:
+        """
+        Records a request rejected because of wrong credentials.
+        """
+        with self._lock:
+            self.auth_failures += 1
+
+    def render(self) -> str:
+        """
+        Renders the metrics in the Prometheus text format.
+
+        :return: The metrics.
+        """
+        with self._lock:
+            lines = ["# HELP http_requests_total Requests served, by method, route and status.",
+                     "# TYPE http_requests_total counter"]
+            for (method, route, status_code), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status_code}"}} {count}')
+            lines += ["# HELP http_request_duration_seconds Request latency, by route.",
+                      "# TYPE http_request_duration_seconds histogram"]
+            for route, histogram in sorted(self.latencies.items()):
+                lines += histogram.render("http_request_duration_seconds", f'route="{route}"')
+            lines += ["# HELP http_response_size_bytes Response body size, by route.",
+                      "# TYPE http_response_size_bytes histogram"]
+            for route, histogram in sorted(self.sizes.items()):
+                lines += histogram.render("http_response_size_bytes", f'route="{route}"')
+            lines += ["# HELP auth_failures_total Requests rejected because of wrong credentials.",
+                      "# TYPE auth_failures_total counter",
+                      f"auth_failures_total {self.auth_failures}"]
+        return "\n".join(lines) + "\n"
+
+
+class SlowRequestProfiler:
+    """
+    Sampling profiler keeping the stack profiles of the slowest requests.
+
+    A background thread samples the stacks of every thread at a fixed interval. When a request is
+    among the slowest seen so far, the samples taken while it ran are folded into a profile (one
+    "frame;frame;frame count" line per distinct stack, as read by flame graph tools). The samples
+    may include other requests running at the same time.
+
+    :param keep: How many of the slowest requests to keep.
+    :type keep: int
+    :param interval: The sampling interval, in seconds.
+    :type interval: float
+    :param max_samples: How many stack samples to keep, across all threads.
+    :type max_samples: int
+    """
+    def __init__(self, keep: int = PROFILE_SLOWEST, interval: float = PROFILE_INTERVAL, max_samples: int = 100_000):
+        self.keep = keep
+        self.interval = interval
+        self.slowest: list[tuple[float, int, str, Counter]] = []
+        self._samples: deque[tuple[float, str]] = deque(maxlen=max_samples)
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self._samples.append((now, ";".join(reversed(stack))))
+
+    def start(self) -> None:
+        """
+        Starts sampling, unless no request is to be kept.
+        """
+        if self.keep <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="slow-request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops sampling.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def record(self, label: str, start: float, end: float) -> None:
+        """
+        Keeps the profile of a finished request, if it is among the slowest.
+
+        :param label: Describes the request, e.g. "GET /users/search?q=gig".
+        :type label: str
+        :param start: When the request started, from `time.perf_counter`.
+        :type start: float
+        :param end: When the request ended, from `time.perf_counter`.
+        :type end: float
+        """
+        if self._thread is None:
+            return
+        duration = end - start
+        with self._lock:
+            if len(self.slowest) >= self.keep and duration <= self.slowest[0][0]:
+                return
+            stacks = Counter(stack for at, stack in list(self._samples) if start <= at <= end)
+            self._sequence += 1
+            entry = (duration, self._sequence, label, stacks)
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heapreplace(self.slowest, entry)
+
+    def dump(self, directory: str = PROFILE_DIR) -> int:
+        """
+        Writes the kept profiles, slowest first, one folded stacks file per request.
+
+        :param directory: The directory to write to.
+        :type directory: str
+
+        :return: How many profiles were written.
+        """
+        with self._lock:
+            slowest = sorted(self.slowest, reverse=True)
+        os.makedirs(directory, exist_ok=True)
+        for rank, (duration, _, label, stacks) in enumerate(slowest, start=1):
+            with open(os.path.join(directory, f"slowest-{rank:02d}.folded"), "w", encoding="utf-8") as f:
+                f.write(f"# {label} {duration * 1000:.1f} ms, {sum(stacks.values())} samples\n")
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        print(f"Saved profiles: {len(slowest)} slowest requests in {directory}")
+        return len(slowest)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording each HTTP request in the metrics, and in the profiler.
+
+    :param app: The application.
+    :type app: ASGIApp
+    :param metrics: Where to record the requests.
+    :type metrics: Metrics
+    :param profiler: The slow requests profiler (optional).
+    :type profiler: SlowRequestProfiler | None
+    """
+    def __init__(self, app: ASGIApp, metrics: "Metrics", profiler: "SlowRequestProfiler | None" = None):
+        self.app = app
+        self.metrics = metrics
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end = time.perf_counter()
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            self.metrics.observe(scope["method"], route_path, status_code, end - start, size)
+            if self.profiler is not None:
+                query = scope.get("query_string", b"").decode("latin-1")
+                self.profiler.record(f"{scope['method']} {scope['path']}{'?' + query if query else ''}", start, end)
+
+
+metrics = Metrics()
+profiler = SlowRequestProfiler()
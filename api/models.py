@@ -1,9 +1,9 @@
+import os
 from datetime import datetime
-from typing import List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, conint
 
-from filtered_users import load_filtered_users
+from api.reloader import DatasetReloader
 
 
 class User(BaseModel):
@@ -39,11 +39,77 @@ class UserSummary(BaseModel):
     id: int
     login: str
 
-raw_users = load_filtered_users("data/filtered_users.json")
-users: List[User] = []
+class UserBatch(BaseModel):
+    """
+    Logins and ids to look up in one request.
+
+    :param logins: The logins to look up.
+    :type logins: list[str]
+    :param ids: The ids to look up, in the int64 range of the store's ids.
+    :type ids: list[int]
+    :param case_insensitive: Whether to ignore the logins' case.
+    :type case_insensitive: bool
+    """
+    logins: list[str] = []
+    ids: list[conint(ge=0, le=2 ** 63 - 1)] = []
+    case_insensitive: bool = False
+
+class UserBatchResult(BaseModel):
+    """
+    The users found for a batch, and the logins and ids that were not.
+
+    :param users: The users found, in request order (logins first, then ids), each once.
+    :type users: list[User]
+    :param missing_logins: The logins not found.
+    :type missing_logins: list[str]
+    :param missing_ids: The ids not found.
+    :type missing_ids: list[int]
+    """
+    users: list[User]
+    missing_logins: list[str]
+    missing_ids: list[int]
+
+class DatasetGeneration(BaseModel):
+    """
+    The currently loaded version of the dataset.
+
+    :param generation: The generation number, incremented on each reload.
+    :type generation: int
+    :param version: Identifies the files it was loaded from; used as the responses ETag.
+    :type version: str
+    :param users: How many users it holds.
+    :type users: int
+    :param loaded_at: When it finished loading.
+    :type loaded_at: datetime
+    :param load_seconds: How long it took to load.
+    :type load_seconds: float
+    """
+    generation: int
+    version: str
+    users: int
+    loaded_at: datetime
+    load_seconds: float
+
+class CacheStats(BaseModel):
+    """
+    The response cache statistics.
+
+    :param entries: How many responses are cached.
+    :type entries: int
+    :param size: How many responses can be cached.
+    :type size: int
+    :param hits: How many requests were served from the cache.
+    :type hits: int
+    :param misses: How many requests were not.
+    :type misses: int
+    """
+    entries: int
+    size: int
+    hits: int
+    misses: int
+
+# A JSON or Parquet (`.parquet`) file.
+USERS_FILE = os.getenv("USERS_FILE", "data/filtered_users.json")
+USERS_SNAPSHOT = os.getenv("USERS_SNAPSHOT", "data/filtered_users.snapshot")
 
-for user in raw_users:
-    if isinstance(user.get("created_at"), str):
-        user["created_at"] = user["created_at"].replace("Z", "+00:00")
-        user["created_at"] = datetime.fromisoformat(user["created_at"])
-    users.append(User(**user))
\ No newline at end of file
+reloader = DatasetReloader(USERS_FILE, USERS_SNAPSHOT or None)
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from api.dataset import Dataset, load_dataset
+
+
+RELOAD_INTERVAL = float(os.getenv("DATASET_RELOAD_INTERVAL", "5"))
+
+
+class Generation:
+    """
+    A loaded version of the dataset. Generations are never modified, only replaced.
+
+    :param number: The generation number, starting at 1.
+    :type number: int
+    :param dataset: The dataset.
+    :type dataset: Dataset
+    :param loaded_at: When the dataset finished loading.
+    :type loaded_at: datetime
+    :param load_seconds: How long the dataset took to load.
+    :type load_seconds: float
+    :param version: Identifies the files the dataset was loaded from; the same in every worker.
+    :type version: str
+    """
+    def __init__(self, number: int, dataset: Dataset, loaded_at: datetime, load_seconds: float, version: str):
+        self.number = number
+        self.dataset = dataset
+        self.loaded_at = loaded_at
+        self.load_seconds = load_seconds
+        self.version = version
+
+
+class DatasetReloader:
+    """
+    Keeps the dataset up to date with its files, without restarting the API.
+
+    A background thread polls the JSON file and the snapshot manifest. Once they have changed and
+    stayed unchanged for one poll (so a file being written is not loaded), the new dataset and its
+    indexes are built in that thread, then swapped in with a single assignment. Requests read
+    `current` once and use that generation throughout, so they always see a consistent dataset.
+
+    :param file_path: The path to the filtered users JSON file.
+    :type file_path: str
+    :param snapshot_path: The snapshot directory (optional).
+    :type snapshot_path: str | None
+    :param interval: How often to poll the files, in seconds (0 to never reload).
+    :type interval: float
+    """
+    def __init__(self, file_path: str, snapshot_path: str | None = None, interval: float = RELOAD_INTERVAL):
+        self.file_path = file_path
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pending_signature = None
+        self._signature = self._files_signature()
+        self.current = self._load(1, self._signature)
+
+    def _files_signature(self) -> tuple:
+        paths = [self.file_path]
+        if self.snapshot_path:
+            paths.append(os.path.join(self.snapshot_path, "manifest.json"))
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load(self, number: int, signature: tuple) -> Generation:
+        start = time.perf_counter()
+        dataset = load_dataset(self.file_path, self.snapshot_path)
+        version = hashlib.sha1(repr(signature).encode("utf-8")).hexdigest()[:16]
+        return Generation(number, dataset, datetime.now(timezone.utc), time.perf_counter() - start, version)
+
+    def reload(self) -> Generation:
+        """
+        Loads the dataset again and swaps it in.
+
+        :return: The new generation.
+        """
+        with self._lock:
+            signature = self._files_signature()
+            generation = self._load(self.current.number + 1, signature)
+            self._signature = signature
+            self.current = generation
+        print(f"Reloaded users: generation {generation.number} in {generation.load_seconds:.2f} s")
+        return generation
+
+    def check(self) -> bool:
+        """
+        Reloads the dataset if its files have changed since the last load, and have not changed since the last check.
+
+        :return: Whether the dataset was reloaded.
+        """
+        signature = self._files_signature()
+        if signature == self._signature:
+            self._pending_signature = None
+            return False
+        if signature != self._pending_signature:
+            self._pending_signature = signature
+            return False
+        self._pending_signature = None
+        self.reload()
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # The current generation keeps being served; the files are checked again next time.
+                print(f"Reload failed: {e}")
+
+    def start(self) -> None:
+        """
+        Starts polling the files in a background thread, unless the interval is 0.
+        """
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="dataset-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops polling the files.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,57 +1,269 @@
-from typing import List
+import math
+import os
+from datetime import datetime, timezone
+from typing import Iterator, List
 
-from fastapi import APIRouter, Query, HTTPException, Depends
+import numpy as np
+import orjson
+from fastapi import APIRouter, Query, HTTPException, Depends, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-from api.models import UserSummary, User, users
+from api.cache import cached_response, response_cache
+from api.metrics import metrics
+from api.models import UserSummary, User, UserBatch, UserBatchResult, DatasetGeneration, CacheStats, reloader
 from api.security import authenticate
+from api.store import UserStore
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "1000"))
+BATCH_STREAM_SIZE = int(os.getenv("BATCH_STREAM_SIZE", "100"))
+
 
 @router.get("/users/",
     response_model=List[UserSummary],
     response_description="A list of users",
     tags=["users"])
-def get_users(skip:int = Query(0, ge=0), limit: int = Query(None, ge=1), username: str = Depends(authenticate)) -> list[UserSummary]:
+async def get_users(
+        request: Request,
+        after_id: int = Query(None),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(None, ge=1),
+        format: str = Query("json", pattern="^(json|ndjson)$"),
+        sort: str = Query("id", pattern="^(id|login|created_at)$"),
+        created_after: datetime = Query(None),
+        created_before: datetime = Query(None),
+        has_bio: bool = Query(None),
+        bio: str = Query(None, min_length=1),
+        username: str = Depends(authenticate)) -> Response:
     """
-    Returns a list of users.
+    Returns a list of users, in id order (or in the order of `sort`).
 
     Authentication required:
     - **Pass HTTP Basic credentials in the `Authorization` header.**
 
+    - **after_id**: Only return users with a greater id, when sorting by id (optional). The `Link` header of each page gives the next page's url.
     - **skip**: How many users to skip (optional - default = 0).
-    - **limit**: How many users to return (optional - minimum = 1).
+    - **limit**: How many users to return (optional - default = 100, maximum = 1000; no maximum with `ndjson`).
+    - **format**: `json` for a page of users, `ndjson` to stream every user (from `after_id`, up to `limit`) as JSON lines (optional - default = json).
+    - **sort**: `id`, `login` (case-insensitive) or `created_at` (optional - default = id).
+    - **created_after**: Only return users created at or after this date (optional - UTC if no timezone is given).
+    - **created_before**: Only return users created before this date (optional - UTC if no timezone is given).
+    - **has_bio**: Only return users with (`true`) or without (`false`) a bio (optional).
+    - **bio**: Only return users whose bio contains every word of this text (optional - case-insensitive).
+    """
+    if after_id is not None and sort != "id":
+        raise HTTPException(status_code=422, detail="after_id requires sort=id")
+    # Exports are streamed a chunk at a time: only pages, rendered whole, are capped.
+    if format == "json" and limit is not None and limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"limit must be at most {MAX_PAGE_SIZE}, or use format=ndjson")
+    generation = reloader.current
+    dataset = generation.dataset
+    filters = {"sort": sort, "created_after": epoch_seconds(created_after), "created_before": epoch_seconds(created_before),
+               "has_bio": has_bio, "bio": bio, "after_id": after_id}
+    if format == "ndjson":
+        def render_export():
+            positions = dataset.select(**filters, skip=skip, limit=limit)
+            return StreamingResponse(iter_ndjson_summaries(dataset.users, positions), media_type="application/x-ndjson")
+        return cached_response(request, generation.version, render_export, cache=False)
+
+    def render_page():
+        page_size = limit or DEFAULT_PAGE_SIZE
+        # One more user tells whether there is a next page.
+        positions = dataset.select(**filters, skip=skip, limit=page_size + 1)
+        response = Response(dataset.users.summaries_json(positions[:page_size]), media_type="application/json")
+        if len(positions) > page_size:
+            if sort == "id":
+                last_id = int(dataset.users.ids[positions[page_size - 1]])
+                next_url = request.url.remove_query_params("skip").include_query_params(after_id=last_id, limit=page_size)
+            else:
+                next_url = request.url.include_query_params(skip=skip + page_size, limit=page_size)
+            response.headers["Link"] = f'<{next_url}>; rel="next"'
+        return response
+    return cached_response(request, generation.version, render_page)
+
+def epoch_seconds(date: datetime | None) -> int | None:
+    """
+    Converts a date filter into epoch seconds, rounded up since creation dates are whole seconds.
+
+    :param date: The date (UTC if naive).
+    :type date: datetime | None
+
+    :return: The number of seconds since the epoch, or None.
     """
-    if limit is None:
-        selected_users = users[skip:]
-    else:
-        selected_users = users[skip:skip + limit]
-    return [UserSummary(id = u.id, login=u.login) for u in selected_users]
+    if date is None:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return math.ceil(date.timestamp())
+
+def iter_ndjson_summaries(users: UserStore, positions: np.ndarray, chunk_size: int = 1000) -> Iterator[bytes]:
+    """
+    Streams users summaries as JSON lines, a chunk at a time.
+
+    :param users: The users store.
+    :type users: UserStore
+    :param positions: The users positions.
+    :type positions: np.ndarray
+    :param chunk_size: How many users to encode per chunk.
+    :type chunk_size: int
+
+    :return: An iterator over the encoded chunks.
+    """
+    for begin in range(0, len(positions), chunk_size):
+        yield users.summaries_ndjson(positions[begin:begin + chunk_size])
 
 @router.get("/users/search",
     response_model=List[UserSummary],
     response_description="A list of users",
     tags=["users"])
-def search_users(q: str = Query(..., min_length=1), username: str = Depends(authenticate)) -> list[UserSummary] | str:
+async def search_users(
+        request: Request,
+        q: str = Query(..., min_length=1),
+        mode: str = Query("contains", pattern="^(contains|prefix)$"),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        username: str = Depends(authenticate)) -> Response:
     """
-    Returns a list of users whose login contains the specified string.
+    Returns a list of users whose login contains (or starts with) the specified string.
 
     Authentication required:
     - **Pass HTTP Basic credentials in the `Authorization` header.**
 
-    - **q**: The string to search for.
+    - **q**: The string to search for (case-insensitive).
+    - **mode**: `contains` to match anywhere in the login, `prefix` to match its start (optional - default = contains).
+    - **skip**: How many users to skip (optional - default = 0). The `Link` header of each page gives the next page's url.
+    - **limit**: How many users to return (optional - default = 100, maximum = 1000).
     - **username**: An authenticated user's username.
     """
-    found_users = []
-    for u in users:
-        if q.lower() in u.login.lower():
-            found_users.append(u)
-    return [UserSummary(id = u.id, login=u.login) for u in found_users]
+    generation = reloader.current
+    dataset = generation.dataset
+
+    def render():
+        page_size = limit or DEFAULT_PAGE_SIZE
+        # One more user tells whether there is a next page.
+        positions = dataset.search.search(q, mode=mode, skip=skip, limit=page_size + 1)
+        response = Response(dataset.users.summaries_json(positions[:page_size]), media_type="application/json")
+        if len(positions) > page_size:
+            next_url = request.url.include_query_params(skip=skip + page_size, limit=page_size)
+            response.headers["Link"] = f'<{next_url}>; rel="next"'
+        return response
+    return cached_response(request, generation.version, render)
+
+@router.get("/users/search/bio",
+    response_model=List[UserSummary],
+    response_description="A list of users, best match first",
+    tags=["users"])
+async def search_users_bio(
+        request: Request,
+        q: str = Query(..., min_length=1),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        username: str = Depends(authenticate)) -> Response:
+    """
+    Returns a list of users whose bio contains every word of the specified text, the most relevant first (BM25).
+
+    Authentication required:
+    - **Pass HTTP Basic credentials in the `Authorization` header.**
+
+    - **q**: The words to search for (case-insensitive).
+    - **skip**: How many users to skip (optional - default = 0). The `Link` header of each page gives the next page's url.
+    - **limit**: How many users to return (optional - default = 100, maximum = 1000).
+    - **username**: An authenticated user's username.
+    """
+    generation = reloader.current
+    dataset = generation.dataset
+
+    def render():
+        page_size = limit or DEFAULT_PAGE_SIZE
+        # One more user tells whether there is a next page.
+        positions, _ = dataset.bio_search.search(q, skip=skip, limit=page_size + 1)
+        response = Response(dataset.users.summaries_json(positions[:page_size]), media_type="application/json")
+        if len(positions) > page_size:
+            next_url = request.url.include_query_params(skip=skip + page_size, limit=page_size)
+            response.headers["Link"] = f'<{next_url}>; rel="next"'
+        return response
+    return cached_response(request, generation.version, render)
+
+@router.post("/users/batch",
+    response_model=UserBatchResult,
+    response_description="The users found, and the logins and ids that were not",
+    tags=["users"])
+async def get_users_batch(batch: UserBatch, username: str = Depends(authenticate)) -> Response:
+    """
+    Returns the details of many users at once, from their logins and/or ids.
+
+    Authentication required:
+    - **Pass HTTP Basic credentials in the `Authorization` header.**
+
+    - **logins**: The logins to look up (optional).
+    - **ids**: The ids to look up (optional).
+    - **case_insensitive**: Whether to ignore the logins' case (optional - default = false).
+    - **username**: An authenticated user's username.
+
+    At most 1000 logins and ids in total. Large batches are streamed as the users are encoded.
+    """
+    if len(batch.logins) + len(batch.ids) > BATCH_MAX_SIZE:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_SIZE} logins and ids per batch")
+    dataset = reloader.current.dataset
+
+    login_positions = [dataset.index.get_by_login(login, case_insensitive=batch.case_insensitive) for login in batch.logins]
+    id_positions = dataset.index.get_by_ids(batch.ids).tolist()
+    missing_logins = [login for login, position in zip(batch.logins, login_positions) if position is None]
+    missing_ids = [user_id for user_id, position in zip(batch.ids, id_positions) if position == -1]
+    # Users requested several times (by login and id, or twice) are returned once.
+    positions = list(dict.fromkeys(position for position in login_positions + id_positions
+                                   if position is not None and position != -1))
+    misses = (b'],"missing_logins":' + orjson.dumps(missing_logins)
+              + b',"missing_ids":' + orjson.dumps(missing_ids) + b"}")
+
+    if len(positions) <= BATCH_STREAM_SIZE:
+        return Response(b'{"users":[' + b",".join(dataset.users.records_json(positions)) + misses,
+                        media_type="application/json")
+
+    def iter_batch(chunk_size: int = BATCH_STREAM_SIZE) -> Iterator[bytes]:
+        yield b'{"users":['
+        for begin in range(0, len(positions), chunk_size):
+            separator = b"," if begin else b""
+            yield separator + b",".join(dataset.users.records_json(positions[begin:begin + chunk_size]))
+        yield misses
+    return StreamingResponse(iter_batch(), media_type="application/json")
+
+@router.get("/users/by-id/{user_id}",
+    response_model=User,
+    response_description="The user's details",
+    tags=["users"])
+async def get_user_by_id(request: Request, user_id: int, username: str = Depends(authenticate)) -> Response:
+    """
+    Returns details about a specific user, from its id.
+
+    Authentication required:
+    - **Pass HTTP Basic credentials in the `Authorization` header.**
+
+    - **user_id**: The id to search for.
+    - **username**: An authenticated user's username.
+    """
+    generation = reloader.current
+    dataset = generation.dataset
+
+    def render():
+        position = dataset.index.get_by_id(user_id)
+        if position is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return Response(User(**dataset.users.record(position)).model_dump_json(), media_type="application/json")
+    return cached_response(request, generation.version, render)
 
 @router.get("/users/{user_login}",
+    response_model=User,
     response_description="The user's details",
     tags=["users"])
-def get_user(user_login: str, username: str = Depends(authenticate)) -> User:
+async def get_user(
+        request: Request,
+        user_login: str,
+        case_insensitive: bool = Query(False),
+        username: str = Depends(authenticate)) -> Response:
     """
     Returns details about a specific user.
 
@@ -59,9 +271,61 @@ def get_user(user_login: str, username: str = Depends(authenticate)) -> User:
     - **Pass HTTP Basic credentials in the `Authorization` header.**
 
     - **user_login**: The login to search for.
+    - **case_insensitive**: Whether to ignore the login's case (optional - default = false).
+    - **username**: An authenticated user's username.
+    """
+    generation = reloader.current
+    dataset = generation.dataset
+
+    def render():
+        position = dataset.index.get_by_login(user_login, case_insensitive=case_insensitive)
+        if position is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return Response(User(**dataset.users.record(position)).model_dump_json(), media_type="application/json")
+    return cached_response(request, generation.version, render)
+
+@router.get("/admin/dataset",
+    response_description="The loaded dataset generation",
+    tags=["admin"])
+async def get_dataset_generation(username: str = Depends(authenticate)) -> DatasetGeneration:
+    """
+    Returns the currently loaded version of the dataset. It is reloaded in the background when its files change.
+
+    Authentication required:
+    - **Pass HTTP Basic credentials in the `Authorization` header.**
+
+    - **username**: An authenticated user's username.
+    """
+    generation = reloader.current
+    return DatasetGeneration(generation=generation.number, version=generation.version, users=len(generation.dataset.users),
+                             loaded_at=generation.loaded_at, load_seconds=generation.load_seconds)
+
+@router.get("/admin/cache",
+    response_description="The response cache statistics",
+    tags=["admin"])
+async def get_cache_stats(username: str = Depends(authenticate)) -> CacheStats:
+    """
+    Returns the response cache size and hit/miss counters. The cache is emptied whenever the dataset changes.
+
+    Authentication required:
+    - **Pass HTTP Basic credentials in the `Authorization` header.**
+
+    - **username**: An authenticated user's username.
+    """
+    return CacheStats(entries=len(response_cache), size=response_cache.size,
+                      hits=response_cache.hits, misses=response_cache.misses)
+
+@router.get("/metrics",
+    response_class=PlainTextResponse,
+    response_description="The API metrics, in the Prometheus text format",
+    tags=["admin"])
+async def get_metrics(username: str = Depends(authenticate)) -> PlainTextResponse:
+    """
+    Returns per-route request counts, latency and response size histograms, and authentication failures.
+
+    Authentication required:
+    - **Pass HTTP Basic credentials in the `Authorization` header.**
+
     - **username**: An authenticated user's username.
     """
-    for u in users:
-        if u.login == user_login:
-            return u
-    raise HTTPException(status_code=404, detail="User not found")
\ No newline at end of file
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
@@ -0,0 +1,171 @@
+from bisect import bisect_left
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from api.indexes import StringHashTable
+from api.store import StringColumn
+
+
+NGRAM_SIZE = 3
+
+
+def ngrams(text: str, size: int = NGRAM_SIZE) -> set[str]:
+    """
+    Gets the distinct n-grams of a string.
+
+    :param text: The string to split.
+    :type text: str
+    :param size: The n-grams length.
+    :type size: int
+
+    :return: The n-grams of the string.
+    """
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def short_grams(text: str, size: int = NGRAM_SIZE) -> set[str]:
+    """
+    Gets the distinct substrings of a string, from 1 character up to the n-grams length.
+
+    :param text: The string to split.
+    :type text: str
+    :param size: The n-grams length.
+    :type size: int
+
+    :return: The substrings of the string.
+    """
+    return set().union(*(ngrams(text, length) for length in range(1, size + 1)))
+
+
+class LoginSearch:
+    """
+    Precomputed login search engine.
+
+    Logins are lowercased once at build time. Substring queries go through an inverted index of the
+    logins' trigrams, and of their bigrams and characters for shorter queries (posting lists of
+    positions, in load order). Prefix queries go through a sorted array of logins.
+    Results are positions in the indexed list. Everything is held in flat arrays, which can be saved
+    and memory-mapped.
+
+    :param logins: The logins to index, in load order.
+    :type logins: Iterable[str]
+    """
+    def __init__(self, logins: Iterable[str]):
+        lowered = [login.lower() for login in logins]
+
+        postings: Dict[str, List[int]] = {}
+        for position, login in enumerate(lowered):
+            for gram in short_grams(login):
+                postings.setdefault(gram, []).append(position)
+        grams = list(postings)
+        lengths = np.fromiter((len(postings[gram]) for gram in grams), dtype=np.int64, count=len(grams))
+
+        self._lowered = StringColumn.from_strings(lowered)
+        self._grams = StringColumn.from_strings(grams)
+        self._gram_table = StringHashTable.build(grams)
+        self._posting_offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        self._postings = np.fromiter((p for gram in grams for p in postings[gram]), dtype=np.uint32,
+                                     count=int(self._posting_offsets[-1]))
+        self._sorted_positions = np.array(sorted(range(len(lowered)), key=lowered.__getitem__), dtype=np.uint32)
+
+    def __len__(self) -> int:
+        return len(self._lowered)
+
+    def search(self, q: str, mode: str = "contains", skip: int = 0, limit: Optional[int] = None) -> List[int]:
+        """
+        Searches the logins matching a query.
+
+        :param q: The string to search for (case-insensitive).
+        :type q: str
+        :param mode: "contains" to match anywhere in the login (results in load order),
+            "prefix" to match the start of the login (results in login order).
+        :type mode: str
+        :param skip: How many matches to skip.
+        :type skip: int
+        :param limit: How many matches to return (None for all of them).
+        :type limit: int | None
+
+        :return: The positions of the matching logins.
+        """
+        stop = None if limit is None else skip + limit
+        if mode == "contains":
+            return [int(position) for position in islice(self._contains(q.lower()), skip, stop)]
+        elif mode == "prefix":
+            return self._prefix(q.lower(), skip, stop)
+        else:
+            raise ValueError(f"Unknown search mode: {mode}")
+
+    def positions_by_login(self) -> np.ndarray:
+        """
+        Gets every position, in (case-insensitive) login order.
+
+        :return: The positions.
+        """
+        return self._sorted_positions
+
+    def _posting(self, gram: str) -> np.ndarray:
+        i = self._gram_table.get(gram, self._grams.__getitem__)
+        if i is None:
+            return self._postings[0:0]
+        return self._postings[self._posting_offsets[i]:self._posting_offsets[i + 1]]
+
+    def _contains(self, q: str) -> Iterator[int]:
+        if len(q) <= NGRAM_SIZE:
+            # Queries up to the n-grams length are indexed as such: their posting list is the answer.
+            return iter(self._posting(q))
+
+        candidates = min((self._posting(gram) for gram in ngrams(q)), key=len)
+        return self._verify(q, candidates)
+
+    def _verify(self, q: str, candidates: np.ndarray, chunk_size: int = 256) -> Iterator[int]:
+        # Candidates are decoded a chunk at a time, which keeps the search lazy without per-item array lookups.
+        for begin in range(0, len(candidates), chunk_size):
+            chunk = candidates[begin:begin + chunk_size]
+            for position, login in zip(chunk.tolist(), self._lowered.take(chunk)):
+                if q in login:
+                    yield position
+
+    def _prefix(self, q: str, skip: int, stop: Optional[int]) -> List[int]:
+        def login_at(i):
+            return self._lowered[self._sorted_positions[i]]
+
+        start = bisect_left(range(len(self._sorted_positions)), q, key=login_at)
+        end = bisect_left(range(len(self._sorted_positions)), q + "\uffff", lo=start, key=login_at)
+        if stop is not None:
+            end = min(end, start + stop)
+        return self._sorted_positions[start + skip:end].tolist()
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Gets the arrays holding the search engine, to save them.
+
+        :return: The arrays, by name.
+        """
+        return {
+            **self._lowered.arrays("search.lowered"),
+            **self._grams.arrays("search.grams"),
+            **self._gram_table.arrays("search.gram_table"),
+            "search.posting_offsets": self._posting_offsets,
+            "search.postings": self._postings,
+            "search.sorted_positions": self._sorted_positions,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "LoginSearch":
+        """
+        Builds a search engine from arrays saved by `arrays`.
+
+        :param arrays: The arrays, by name.
+        :type arrays: Dict[str, np.ndarray]
+
+        :return: The search engine.
+        """
+        search = cls.__new__(cls)
+        search._lowered = StringColumn.from_arrays(arrays, "search.lowered")
+        search._grams = StringColumn.from_arrays(arrays, "search.grams")
+        search._gram_table = StringHashTable.from_arrays(arrays, "search.gram_table")
+        search._posting_offsets = arrays["search.posting_offsets"]
+        search._postings = arrays["search.postings"]
+        search._sorted_positions = arrays["search.sorted_positions"]
+        return search
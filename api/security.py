@@ -1,43 +1,224 @@
+import hashlib
+import hmac
 import json
+import logging
 import os
 import secrets
+import threading
+import time
+from collections import OrderedDict
 
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
+from api.metrics import metrics
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 security = HTTPBasic()
 
+HASH_ITERATIONS = int(os.getenv("AUTH_HASH_ITERATIONS", "600000"))
+CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+
+
+def hash_password(password:str, salt:bytes | None = None, iterations:int = HASH_ITERATIONS) -> str:
+    """
+    Hashes a password with a random salt.
+
+    :param password: The password.
+    :type password: str
+    :param salt: The salt (optional - random by default).
+    :type salt: bytes | None
+    :param iterations: The PBKDF2 iterations.
+    :type iterations: int
+
+    :return: The hash, as "pbkdf2_sha256$<iterations>$<salt>$<hash>".
+    """
+    salt = salt if salt is not None else secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+def check_password(password:str, password_hash:str) -> bool:
+    """
+    Checks a password against its hash, in constant time.
+
+    :param password: The password.
+    :type password: str
+    :param password_hash: The hash, as returned by `hash_password`.
+    :type password_hash: str
+
+    :return: Whether the password matches.
+    """
+    _, iterations, salt, digest = password_hash.split("$")
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt), int(iterations))
+    return secrets.compare_digest(candidate, bytes.fromhex(digest))
+
+def hash_iterations(password_hash:str) -> int:
+    """
+    Gets the PBKDF2 iterations a hash was made with.
+
+    :param password_hash: The hash, as returned by `hash_password`.
+    :type password_hash: str
+
+    :return: The iterations.
+    """
+    return int(password_hash.split("$")[1])
+
+
+class CredentialStore:
+    """
+    The API accounts, keyed by username, with salted password hashes.
+
+    Accounts come from the `AUTHORIZED_USERS` format: either a plain `password`, hashed the first time
+    the account is checked (not when the store is built, so that importing the API stays fast), or a
+    `password_hash` from `hash_password`. Recently verified credentials are kept in a bounded LRU
+    cache with a TTL, so repeat callers skip the hashing.
+
+    Hashes with fewer iterations than `iterations` take as long to check as the others, and are
+    replaced with a stronger hash once their password is verified.
+
+    :param authorized_users: The accounts, as dicts with a `login` and a `password` or `password_hash`.
+    :type authorized_users: list[dict]
+    :param cache_size: How many verified credentials to remember.
+    :type cache_size: int
+    :param cache_ttl: How long verified credentials are remembered, in seconds.
+    :type cache_ttl: float
+    :param iterations: The PBKDF2 iterations of the hashes made by the store.
+    :type iterations: int
+    """
+    def __init__(self, authorized_users:list[dict], cache_size:int = CACHE_SIZE, cache_ttl:float = CACHE_TTL,
+                 iterations:int = HASH_ITERATIONS):
+        self.iterations = iterations
+        self._hashes: dict[str, str] = {}
+        self._passwords: dict[str, str] = {}
+        for authorized_user in authorized_users:
+            login = f"{authorized_user['login']}"
+            password_hash = authorized_user.get("password_hash")
+            if password_hash is None:
+                self._passwords[login] = f"{authorized_user['password']}"
+                continue
+            if hash_iterations(password_hash) < iterations:
+                logger.warning("Password hash of %s uses fewer than %d iterations: it will be replaced once verified, "
+                               "hash it again in AUTHORIZED_USERS", login, iterations)
+            self._hashes[login] = password_hash
+        # Unknown usernames are checked against this hash, so they take as long as known ones.
+        self._dummy_hash: str | None = None
+
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: OrderedDict[bytes, tuple[str, float]] = OrderedDict()
+        self._cache_key = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._hashes) + len(self._passwords)
+
+    def _key(self, username:str, password:str) -> bytes:
+        # The cache is keyed by a keyed hash of the credentials, never by the credentials themselves.
+        return hmac.digest(self._cache_key, f"{username}:{password}".encode("utf-8"), "sha256")
+
+    def _is_cached(self, key:bytes) -> bool:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                self._cache.move_to_end(key)
+                return True
+        return False
+
+    def _hash(self, username:str) -> str | None:
+        # Plain passwords are hashed the first time their account is checked.
+        with self._lock:
+            password_hash = self._hashes.get(username)
+            password = self._passwords.get(username)
+        if password_hash is None and password is not None:
+            password_hash = hash_password(password, iterations=self.iterations)
+            with self._lock:
+                password_hash = self._hashes.setdefault(username, password_hash)
+                self._passwords.pop(username, None)
+        return password_hash
+
+    def _dummy(self) -> str:
+        if self._dummy_hash is None:
+            self._dummy_hash = hash_password(secrets.token_hex(16), iterations=self.iterations)
+        return self._dummy_hash
+
+    def is_cached(self, username:str, password:str) -> bool:
+        """
+        Checks whether a username and password were recently verified, without hashing the password.
+
+        :param username: The username.
+        :type username: str
+        :param password: The password.
+        :type password: str
+
+        :return: Whether the credentials are known to be valid.
+        """
+        return self._is_cached(self._key(username, password))
+
+    def verify(self, username:str, password:str, check_cache:bool = True) -> bool:
+        """
+        Checks a username and password.
+
+        :param username: The username.
+        :type username: str
+        :param password: The password.
+        :type password: str
+        :param check_cache: Whether to look the credentials up in the cache first (False if the caller just did).
+        :type check_cache: bool
+
+        :return: Whether the credentials are valid.
+        """
+        key = self._key(username, password)
+        if check_cache and self._is_cached(key):
+            return True
+
+        now = time.monotonic()
+        password_hash = self._hash(username)
+        is_correct = check_password(password, password_hash or self._dummy()) and password_hash is not None
+        if password_hash is not None and hash_iterations(password_hash) < self.iterations:
+            # A weaker hash is checked faster: the full cost is paid anyway, so that it doesn't tell
+            # which usernames exist.
+            check_password(password, self._dummy())
+            if is_correct:
+                with self._lock:
+                    self._hashes[username] = hash_password(password, iterations=self.iterations)
+        if is_correct:
+            with self._lock:
+                self._cache[key] = (username, now + self.cache_ttl)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return is_correct
+
 
 authorized_users_json = os.getenv("AUTHORIZED_USERS", "[]")
 authorized_users = json.loads(authorized_users_json)
+credential_store = CredentialStore(authorized_users)
 
-def authenticate(credentials: HTTPBasicCredentials = Depends(security)):
+async def authenticate(credentials: HTTPBasicCredentials = Depends(security)):
     """
     Handles the authentication.
 
+    Recently verified credentials are checked on the event loop; others are hashed in the
+    threadpool, so that hashing does not hold up other requests.
+
     :param credentials: A login/password combination.
     :type credentials: HTTPBasicCredentials
 
     :return: The authenticated user username.
     """
-    for authorized_user in authorized_users:
-        current_username_bytes = credentials.username.encode("utf8")
-        correct_username_bytes = f"{authorized_user['login']}".encode('utf-8')
-        is_correct_username = secrets.compare_digest(
-            current_username_bytes, correct_username_bytes
-        )
-        current_password_bytes = credentials.password.encode("utf8")
-        correct_password_bytes = f"{authorized_user['password']}".encode('utf-8')
-        is_correct_password = secrets.compare_digest(
-            current_password_bytes, correct_password_bytes
-        )
-        if is_correct_username and is_correct_password:
-            return credentials.username
+    if (credential_store.is_cached(credentials.username, credentials.password)
+            or await run_in_threadpool(credential_store.verify, credentials.username, credentials.password,
+                                       check_cache=False)):
+        return credentials.username
+    metrics.auth_failed()
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Incorrect username or password",
         headers={"WWW-Authenticate": "Basic"}
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,195 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+
+WORKERS = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+KEEP_ALIVE = int(os.getenv("SERVER_KEEP_ALIVE", "5"))
+MAX_RESTARTS = int(os.getenv("SERVER_MAX_RESTARTS", "5"))
+RESTART_WINDOW = float(os.getenv("SERVER_RESTART_WINDOW", "60"))
+# Delay before restarting a worker, doubling with each recent restart, in seconds.
+RESTART_BACKOFF_BASE = 0.5
+RESTART_BACKOFF_MAX = 30
+
+
+class RestartPolicy:
+    """
+    Decides when to replace workers that exit unexpectedly.
+
+    Each restart waits twice as long as the previous recent one. Once too many workers exited within
+    the window (e.g. they crash at startup on a bad configuration), the server gives up instead of
+    forking in a loop.
+
+    :param max_restarts: How many restarts are allowed within the window.
+    :type max_restarts: int
+    :param window: The window duration, in seconds.
+    :type window: float
+    :param backoff_base: The delay before the first restart, in seconds.
+    :type backoff_base: float
+    :param backoff_max: The longest delay before a restart, in seconds.
+    :type backoff_max: float
+    """
+    def __init__(self, max_restarts: int = MAX_RESTARTS, window: float = RESTART_WINDOW,
+                 backoff_base: float = RESTART_BACKOFF_BASE, backoff_max: float = RESTART_BACKOFF_MAX):
+        self.max_restarts = max_restarts
+        self.window = window
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.restarts: list[float] = []
+
+    def next_delay(self, now: float) -> float | None:
+        """
+        Counts a restart, and gets how long to wait before it.
+
+        :param now: The current timestamp.
+        :type now: float
+
+        :return: The delay, in seconds, or None if there were too many restarts within the window.
+        """
+        self.restarts = [restart for restart in self.restarts if now - restart < self.window]
+        self.restarts.append(now)
+        if len(self.restarts) > self.max_restarts:
+            return None
+        return min(self.backoff_max, self.backoff_base * 2 ** (len(self.restarts) - 1))
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """
+    Opens the listening socket, shared by every worker.
+
+    :param host: The address to bind to.
+    :type host: str
+    :param port: The port to bind to.
+    :type port: int
+    :param backlog: How many connections may wait to be accepted.
+    :type backlog: int
+
+    :return: The listening socket.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(app, sock: socket.socket, backlog: int, keep_alive: int) -> None:
+    """
+    Serves the app on an already listening socket, until stopped by a signal.
+
+    :param app: The ASGI application.
+    :param sock: The listening socket.
+    :type sock: socket.socket
+    :param backlog: How many connections may wait to be accepted.
+    :type backlog: int
+    :param keep_alive: How long to keep idle connections open, in seconds.
+    :type keep_alive: int
+    """
+    config = uvicorn.Config(app, backlog=backlog, timeout_keep_alive=keep_alive, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def serve(host: str = "127.0.0.1", port: int = 8000, workers: int = WORKERS,
+          backlog: int = BACKLOG, keep_alive: int = KEEP_ALIVE) -> int:
+    """
+    Runs the API in several worker processes sharing one preloaded dataset.
+
+    The dataset and its indexes are loaded once, in this process, then the workers are forked: they
+    start serving immediately and share the dataset's memory pages (copy-on-write) instead of each
+    loading its own copy. Each worker then reloads the dataset on its own when its files change.
+    Workers that exit unexpectedly are replaced, after a backoff (see `RestartPolicy`).
+
+    :param host: The address to bind to.
+    :type host: str
+    :param port: The port to bind to.
+    :type port: int
+    :param workers: How many worker processes to run.
+    :type workers: int
+    :param backlog: How many connections may wait to be accepted.
+    :type backlog: int
+    :param keep_alive: How long to keep idle connections open, in seconds.
+    :type keep_alive: int
+
+    :return: The exit status: 0 once stopped by a signal, 1 if workers kept exiting.
+    """
+    from api.main import app
+
+    sock = bind_socket(host, port, backlog)
+    print(f"Serving on http://{host}:{port} with {workers} workers")
+    if workers <= 1 or not hasattr(os, "fork"):
+        run_worker(app, sock, backlog, keep_alive)
+        return 0
+
+    # Objects created so far live as long as the server: moving them out of the collected
+    # generations keeps the garbage collector from writing to (and so copying) their pages.
+    gc.collect()
+    gc.freeze()
+
+    def spawn() -> int:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                run_worker(app, sock, backlog, keep_alive)
+            finally:
+                os._exit(0)
+        return pid
+
+    stopping = False
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    children = set()
+    restart_policy = RestartPolicy()
+    failed = False
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        children.add(spawn())
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if stopping:
+            continue
+        delay = restart_policy.next_delay(time.monotonic())
+        if delay is None:
+            print(f"Worker {pid} exited ({status}): more than {restart_policy.max_restarts} workers exited "
+                  f"within {restart_policy.window:.0f} s, stopping")
+            failed = True
+            stop(signal.SIGTERM, None)
+            continue
+        print(f"Worker {pid} exited ({status}), starting a new one in {delay:.1f} s")
+        time.sleep(delay)
+        if not stopping:
+            children.add(spawn())
+    sock.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Worker processes (default: WEB_CONCURRENCY or the CPU count).")
+    parser.add_argument("--backlog", type=int, default=BACKLOG, help="Pending connections queue size (default: SERVER_BACKLOG or 2048).")
+    parser.add_argument("--keep-alive", type=int, default=KEEP_ALIVE, help="Idle connections timeout, in seconds (default: SERVER_KEEP_ALIVE or 5).")
+    args = parser.parse_args()
+
+    sys.exit(serve(args.host, args.port, args.workers, args.backlog, args.keep_alive))
@@ -0,0 +1,324 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+import orjson
+
+
+class StringColumn:
+    """
+    A column of strings stored as one UTF-8 blob plus an offsets array.
+
+    String `i` is `blob[offsets[i]:offsets[i + 1]]`, decoded on access. Both arrays may be memory-mapped.
+
+    :param blob: The concatenated UTF-8 encoded strings.
+    :type blob: np.ndarray
+    :param offsets: The start offset of each string, followed by the blob length.
+    :type offsets: np.ndarray
+    """
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+        self._view = memoryview(blob)
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> "StringColumn":
+        """
+        Builds a column from strings.
+
+        :param values: The strings to store.
+        :type values: Iterable[str]
+
+        :return: The column.
+        """
+        return cls.from_bytes(value.encode("utf-8") for value in values)
+
+    @classmethod
+    def from_bytes(cls, values: Iterable[bytes]) -> "StringColumn":
+        """
+        Builds a column from already encoded strings.
+
+        :param values: The UTF-8 encoded strings to store.
+        :type values: Iterable[bytes]
+
+        :return: The column.
+        """
+        blob = bytearray()
+        offsets: List[int] = [0]
+        for value in values:
+            blob += value
+            offsets.append(len(blob))
+        return cls(np.frombuffer(bytes(blob), dtype=np.uint8), np.array(offsets, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return str(self._view[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield str(self._view[start:end], "utf-8")
+
+    def take(self, positions: np.ndarray) -> List[str]:
+        """
+        Gets several strings at once.
+
+        :param positions: The strings positions.
+        :type positions: np.ndarray
+
+        :return: The strings.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        starts = self.offsets[positions].tolist()
+        ends = self.offsets[positions + 1].tolist()
+        return [str(self._view[start:end], "utf-8") for start, end in zip(starts, ends)]
+
+    def join(self, positions: np.ndarray, separator: bytes = b"", chunk_size: int = 8192) -> bytes:
+        """
+        Concatenates several strings, without decoding them.
+
+        :param positions: The strings positions.
+        :type positions: np.ndarray
+        :param separator: The bytes to put between the strings.
+        :type separator: bytes
+        :param chunk_size: How many strings to slice at once.
+        :type chunk_size: int
+
+        :return: The UTF-8 encoded concatenation.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(positions) > 1 and len(separator) <= 1 and np.all(np.diff(positions) == 1):
+            # Consecutive strings are a single slice of the blob, with the separators inserted between them.
+            first, last = int(self.offsets[positions[0]]), int(self.offsets[positions[-1] + 1])
+            block = self.blob[first:last]
+            if separator:
+                block = np.insert(block, self.offsets[positions[1:]] - first, separator[0])
+            return block.tobytes()
+
+        # Slices are joined a chunk at a time, so that they do not pile up.
+        chunks = []
+        for begin in range(0, len(positions), chunk_size):
+            chunk = positions[begin:begin + chunk_size]
+            starts = self.offsets[chunk].tolist()
+            ends = self.offsets[chunk + 1].tolist()
+            chunks.append(separator.join([self._view[start:end] for start, end in zip(starts, ends)]))
+        return separator.join(chunks)
+
+    @property
+    def nbytes(self) -> int:
+        return self.blob.nbytes + self.offsets.nbytes
+
+    def arrays(self, name: str) -> Dict[str, np.ndarray]:
+        """
+        Gets the arrays holding the column, to save them.
+
+        :param name: The column name, used as a prefix.
+        :type name: str
+
+        :return: The arrays, by name.
+        """
+        return {f"{name}.blob": self.blob, f"{name}.offsets": self.offsets}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], name: str) -> "StringColumn":
+        """
+        Builds a column from arrays saved by `arrays`.
+
+        :param arrays: The arrays, by name.
+        :type arrays: Dict[str, np.ndarray]
+        :param name: The column name, used as a prefix.
+        :type name: str
+
+        :return: The column.
+        """
+        return cls(arrays[f"{name}.blob"], arrays[f"{name}.offsets"])
+
+
+def parse_created_at(created_at: str) -> int:
+    """
+    Parses a GitHub creation date into an epoch timestamp.
+
+    :param created_at: The ISO 8601 date, e.g. "2015-01-01T00:11:45Z".
+    :type created_at: str
+
+    :return: The number of seconds since the epoch.
+    """
+    return int(datetime.fromisoformat(created_at.replace("Z", "+00:00")).timestamp())
+
+
+class UserStore:
+    """
+    Compact columnar storage of the users, in load order.
+
+    Ids and creation dates are int64 arrays, strings are `StringColumn`s. Rows are returned as plain
+    dicts, to be turned into response models only when a response is built. Each user's summary is
+    also kept pre-encoded as JSON, so lists of users can be written out without building any object.
+
+    :param ids: The users ids.
+    :type ids: np.ndarray
+    :param created_at: The users creation dates, as epoch seconds.
+    :type created_at: np.ndarray
+    :param logins: The users logins.
+    :type logins: StringColumn
+    :param avatar_urls: The users avatar urls.
+    :type avatar_urls: StringColumn
+    :param bios: The users bios.
+    :type bios: StringColumn
+    :param summaries: The users summaries, as JSON objects (optional - encoded from the ids and logins by default).
+    :type summaries: StringColumn | None
+    """
+    def __init__(self, ids: np.ndarray, created_at: np.ndarray, logins: StringColumn,
+                 avatar_urls: StringColumn, bios: StringColumn, summaries: StringColumn | None = None):
+        self.ids = ids
+        self.created_at = created_at
+        self.logins = logins
+        self.avatar_urls = avatar_urls
+        self.bios = bios
+        self.summaries = summaries if summaries is not None else StringColumn.from_bytes(
+            orjson.dumps({"id": user_id, "login": login}) for user_id, login in zip(ids.tolist(), logins))
+        self._has_bio = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "UserStore":
+        """
+        Builds a store from users records, as saved in `data/filtered_users.json`.
+
+        :param records: The users records.
+        :type records: Iterable[dict]
+
+        :return: The store.
+        """
+        ids: List[int] = []
+        created_at: List[int] = []
+        logins: List[str] = []
+        avatar_urls: List[str] = []
+        bios: List[str] = []
+        for record in records:
+            ids.append(int(record["id"]))
+            created_at.append(parse_created_at(record["created_at"]))
+            logins.append(record["login"])
+            avatar_urls.append(record["avatar_url"])
+            bios.append(record["bio"])
+        return cls(
+            np.array(ids, dtype=np.int64),
+            np.array(created_at, dtype=np.int64),
+            StringColumn.from_strings(logins),
+            StringColumn.from_strings(avatar_urls),
+            StringColumn.from_strings(bios),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def summary(self, i: int) -> dict:
+        """
+        Gets a user's id and login.
+
+        :param i: The user's position in the store.
+        :type i: int
+
+        :return: The user's summary.
+        """
+        return {"id": int(self.ids[i]), "login": self.logins[i]}
+
+    def summaries_json(self, positions: np.ndarray) -> bytes:
+        """
+        Gets several users' summaries as a JSON array, from their pre-encoded summaries.
+
+        :param positions: The users positions in the store.
+        :type positions: np.ndarray
+
+        :return: The UTF-8 encoded JSON array.
+        """
+        return b"[" + self.summaries.join(positions, b",") + b"]"
+
+    def summaries_ndjson(self, positions: np.ndarray) -> bytes:
+        """
+        Gets several users' summaries as JSON lines, from their pre-encoded summaries.
+
+        :param positions: The users positions in the store.
+        :type positions: np.ndarray
+
+        :return: The UTF-8 encoded JSON lines.
+        """
+        if len(positions) == 0:
+            return b""
+        return self.summaries.join(positions, b"\n") + b"\n"
+
+    def record(self, i: int) -> dict:
+        """
+        Gets a user's details.
+
+        :param i: The user's position in the store.
+        :type i: int
+
+        :return: The user's details.
+        """
+        return {
+            "id": int(self.ids[i]),
+            "login": self.logins[i],
+            "created_at": datetime.fromtimestamp(int(self.created_at[i]), tz=timezone.utc),
+            "avatar_url": self.avatar_urls[i],
+            "bio": self.bios[i],
+        }
+
+    def records_json(self, positions: np.ndarray) -> List[bytes]:
+        """
+        Gets several users' details, each encoded as a JSON object.
+
+        :param positions: The users positions in the store.
+        :type positions: np.ndarray
+
+        :return: The UTF-8 encoded JSON objects, the same as the `User` model's.
+        """
+        return [orjson.dumps(self.record(i), option=orjson.OPT_UTC_Z) for i in np.asarray(positions).tolist()]
+
+    @property
+    def has_bio(self) -> np.ndarray:
+        """
+        Whether each user has a non-empty bio, computed once from the bios offsets.
+        """
+        if self._has_bio is None:
+            self._has_bio = np.diff(self.bios.offsets) > 0
+        return self._has_bio
+
+    @property
+    def nbytes(self) -> int:
+        return (self.ids.nbytes + self.created_at.nbytes + self.logins.nbytes
+                + self.avatar_urls.nbytes + self.bios.nbytes + self.summaries.nbytes)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Gets the arrays holding the store, to save them.
+
+        :return: The arrays, by name.
+        """
+        return {
+            "ids": self.ids,
+            "created_at": self.created_at,
+            **self.logins.arrays("logins"),
+            **self.avatar_urls.arrays("avatar_urls"),
+            **self.bios.arrays("bios"),
+            **self.summaries.arrays("summaries"),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "UserStore":
+        """
+        Builds a store from arrays saved by `arrays`, or read by `storage.read_user_columns` (without summaries).
+
+        :param arrays: The arrays, by name.
+        :type arrays: Dict[str, np.ndarray]
+
+        :return: The store.
+        """
+        return cls(
+            arrays["ids"],
+            arrays["created_at"],
+            StringColumn.from_arrays(arrays, "logins"),
+            StringColumn.from_arrays(arrays, "avatar_urls"),
+            StringColumn.from_arrays(arrays, "bios"),
+            StringColumn.from_arrays(arrays, "summaries") if "summaries.blob" in arrays else None,
+        )
@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+BENCH_LOGIN = "bench"
+BENCH_PASSWORD = "bench"
+
+
+def rss_mib() -> float:
+    """
+    Gets the resident memory of the current process.
+
+    :return: The current RSS in MiB, or the peak RSS where the current one is not available.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def endpoint_urls(dataset, rng: random.Random) -> dict:
+    """
+    Picks the urls to time, from the loaded users.
+
+    :param dataset: The loaded dataset.
+    :type dataset: Dataset
+    :param rng: The random generator.
+    :type rng: random.Random
+
+    :return: Functions returning a url to request, by endpoint name.
+    """
+    users = dataset.users
+    def random_position():
+        return rng.randrange(len(users))
+    def fragment():
+        login = users.logins[random_position()]
+        begin = rng.randrange(max(1, len(login) - 4))
+        return login[begin:begin + 5]
+    return {
+        "users_first_page": lambda: "/users/",
+        "users_after_id": lambda: f"/users/?after_id={int(users.ids[random_position()])}",
+        "search_contains": lambda: f"/users/search?q={fragment()}&limit=100",
+        "search_prefix": lambda: f"/users/search?q={users.logins[random_position()][:6]}&mode=prefix&limit=100",
+        "user_by_login": lambda: f"/users/{users.logins[random_position()]}",
+        "user_by_id": lambda: f"/users/by-id/{int(users.ids[random_position()])}",
+    }
+
+async def time_endpoints(app, urls: dict, requests_nb: int, concurrency: int) -> dict:
+    """
+    Measures the latency and throughput of each endpoint, in-process.
+
+    :param app: The ASGI application.
+    :param urls: Functions returning a url to request, by endpoint name.
+    :type urls: dict
+    :param requests_nb: How many requests to send per endpoint, for each measure.
+    :type requests_nb: int
+    :param concurrency: How many requests to keep in flight for the throughput measure.
+    :type concurrency: int
+
+    :return: The latencies, in milliseconds, and throughputs, in requests per second, by endpoint.
+    """
+    from httpx import ASGITransport, AsyncClient
+
+    token = base64.b64encode(f"{BENCH_LOGIN}:{BENCH_PASSWORD}".encode()).decode()
+    headers = {"Authorization": f"Basic {token}"}
+    results = {}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        # The first authentication hashes the password, then it is cached: keep it out of the measures.
+        await client.get(next(iter(urls.values()))(), headers=headers)
+        for name, url in urls.items():
+            latencies = []
+            for _ in range(requests_nb):
+                start = time.perf_counter()
+                response = await client.get(url(), headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code in (200, 404), response.status_code
+
+            pending = [url() for _ in range(requests_nb)]
+            async def worker():
+                while pending:
+                    await client.get(pending.pop(), headers=headers)
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+
+            results[name] = {"mean_ms": sum(latencies) / len(latencies), "p50_ms": percentile(latencies, 0.5),
+                             "p95_ms": percentile(latencies, 0.95), "requests_per_s": requests_nb / elapsed}
+    return results
+
+def bench_api(requests_nb: int = 200, concurrency: int = 32, seed: int = 0) -> dict:
+    """
+    Starts the API in the current process and measures it.
+
+    The dataset is the one pointed to by `USERS_FILE` and `USERS_SNAPSHOT`. The response cache should
+    be disabled (`RESPONSE_CACHE_SIZE=0`), so that each request is computed.
+
+    :param requests_nb: How many requests to send per endpoint, for each measure.
+    :type requests_nb: int
+    :param concurrency: How many requests to keep in flight for the throughput measure.
+    :type concurrency: int
+    :param seed: The random seed used to pick the urls.
+    :type seed: int
+
+    :return: The startup time, in seconds, the RSS after startup, in MiB, and the endpoints measures.
+    """
+    rss_before = rss_mib()
+    start = time.perf_counter()
+    from api.main import app
+    from api.models import reloader
+    startup_s = time.perf_counter() - start
+    rss_after = rss_mib()
+
+    urls = endpoint_urls(reloader.current.dataset, random.Random(seed))
+    endpoints = asyncio.run(time_endpoints(app, urls, requests_nb, concurrency))
+    return {"users": len(reloader.current.dataset.users), "startup_s": startup_s,
+            "rss_mib": rss_after, "dataset_rss_mib": rss_after - rss_before, "endpoints": endpoints}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints in-process, on the dataset "
+                                                 "pointed to by USERS_FILE and USERS_SNAPSHOT.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON, on the last line.")
+    args = parser.parse_args()
+
+    result = bench_api(args.requests, args.concurrency)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"{result['users']} users: startup {result['startup_s']:.2f} s, RSS {result['rss_mib']:.0f} MiB")
+        for name, measures in result["endpoints"].items():
+            print(f"  {name:<18} p50 {measures['p50_ms']:.2f} ms, p95 {measures['p95_ms']:.2f} ms, "
+                  f"{measures['requests_per_s']:.0f} req/s")
+    sys.stdout.flush()
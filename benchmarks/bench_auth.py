@@ -0,0 +1,73 @@
+import argparse
+import secrets
+import time
+
+from api.security import HASH_ITERATIONS, CredentialStore
+
+
+def authenticate_scan(authorized_users: list[dict], username: str, password: str) -> bool:
+    """
+    The previous `authenticate` check: a scan over every account.
+    """
+    for authorized_user in authorized_users:
+        is_correct_username = secrets.compare_digest(username.encode("utf8"), f"{authorized_user['login']}".encode("utf-8"))
+        is_correct_password = secrets.compare_digest(password.encode("utf8"), f"{authorized_user['password']}".encode("utf-8"))
+        if is_correct_username and is_correct_password:
+            return True
+    return False
+
+def bench_auth(accounts_nb: int, checks: int = 2_000, hashed_checks: int = 20, iterations: int = HASH_ITERATIONS) -> dict:
+    """
+    Times credential checks with `accounts_nb` configured accounts.
+
+    :param accounts_nb: How many accounts to configure.
+    :type accounts_nb: int
+    :param checks: How many scans and cached checks to time.
+    :type checks: int
+    :param hashed_checks: How many uncached checks to time, each one hashing the password.
+    :type hashed_checks: int
+    :param iterations: The PBKDF2 iterations of the hashes.
+    :type iterations: int
+
+    :return: The store build time, in seconds, and the mean check latencies, in microseconds.
+    """
+    authorized_users = [{"login": f"user{i}", "password": f"password{i}"} for i in range(accounts_nb)]
+    # The last account is the worst case of the scan.
+    username, password = f"user{accounts_nb - 1}", f"password{accounts_nb - 1}"
+
+    start = time.perf_counter()
+    store = CredentialStore(authorized_users, iterations=iterations)
+    build_s = time.perf_counter() - start
+
+    results = {"accounts": accounts_nb, "build_s": build_s}
+    start = time.perf_counter()
+    for _ in range(checks):
+        authenticate_scan(authorized_users, username, password)
+    results["scan_us"] = (time.perf_counter() - start) / checks * 1e6
+
+    uncached = CredentialStore(authorized_users[-1:], cache_size=0, iterations=iterations)
+    # The first check hashes the configured password: it is not timed.
+    uncached.verify(username, password)
+    start = time.perf_counter()
+    for _ in range(hashed_checks):
+        uncached.verify(username, password)
+    results["hashed_us"] = (time.perf_counter() - start) / hashed_checks * 1e6
+
+    store.verify(username, password)
+    start = time.perf_counter()
+    for _ in range(checks):
+        store.verify(username, password)
+    results["cached_us"] = (time.perf_counter() - start) / checks * 1e6
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the API authentication.")
+    parser.add_argument("--accounts", type=int, default=10_000)
+    parser.add_argument("--checks", type=int, default=2_000)
+    parser.add_argument("--hashed-checks", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=HASH_ITERATIONS)
+    args = parser.parse_args()
+
+    result = bench_auth(args.accounts, args.checks, args.hashed_checks, args.iterations)
+    print(f"{result['accounts']} accounts (store built in {result['build_s']:.1f} s): scan {result['scan_us']:.1f} µs, "
+          f"hashed {result['hashed_us']:.1f} µs, cached {result['cached_us']:.1f} µs")
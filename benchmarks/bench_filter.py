@@ -0,0 +1,55 @@
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_users
+from filtered_users import filter_users, filter_users_frame
+
+
+REQUIRED_FIELDS = ("bio", "avatar_url")
+CREATION_DATE_FILTER = "2015-02-01"
+
+def bench_filter(users_nb: int) -> dict:
+    """
+    Times `filter_users` against `filter_users_frame` on `users_nb` synthetic users.
+
+    A third of the users have an empty bio, and the creation date filter drops the oldest ones.
+
+    :param users_nb: How many users to filter.
+    :type users_nb: int
+
+    :return: The runtimes, in seconds.
+    """
+    users = list(generate_users(users_nb))
+    for user in users[::3]:
+        user["bio"] = ""
+
+    start = time.perf_counter()
+    expected = filter_users(REQUIRED_FIELDS, CREATION_DATE_FILTER, users)
+    list_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = pd.DataFrame(users)
+    frame_build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    filtered = filter_users_frame(REQUIRED_FIELDS, CREATION_DATE_FILTER, df)
+    frame_s = time.perf_counter() - start
+
+    assert len(filtered) == len(expected)
+    return {"users": users_nb, "kept": len(filtered), "filter_users_s": list_s,
+            "frame_build_s": frame_build_s, "filter_users_frame_s": frame_s}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the users filters.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        result = bench_filter(size)
+        print(f"{result['users']:>10} users ({result['kept']} kept): filter_users {result['filter_users_s']:.2f} s, "
+              f"filter_users_frame {result['filter_users_frame_s']:.2f} s "
+              f"(+ {result['frame_build_s']:.2f} s to build the DataFrame)")
+        sys.stdout.flush()
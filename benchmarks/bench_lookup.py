@@ -0,0 +1,52 @@
+import argparse
+import random
+import sys
+import time
+from api.indexes import UserIndex
+from api.store import UserStore
+from benchmarks.synthetic import generate_users
+
+
+def bench_lookup(users_nb: int, lookups: int = 100_000) -> dict:
+    """
+    Measures the latency of login and id lookups on an index of `users_nb` users.
+
+    :param users_nb: How many users to index.
+    :type users_nb: int
+    :param lookups: How many lookups to time.
+    :type lookups: int
+
+    :return: The mean lookup latencies, in nanoseconds.
+    """
+    users = UserStore.from_records(generate_users(users_nb))
+    index = UserIndex(users.ids, users.logins)
+    rng = random.Random(1)
+    sample = [users.summary(rng.randrange(users_nb)) for _ in range(lookups)]
+
+    start = time.perf_counter_ns()
+    for u in sample:
+        index.get_by_login(u["login"])
+    login_ns = (time.perf_counter_ns() - start) / lookups
+
+    start = time.perf_counter_ns()
+    for u in sample:
+        index.get_by_login(u["login"].upper(), case_insensitive=True)
+    lower_login_ns = (time.perf_counter_ns() - start) / lookups
+
+    start = time.perf_counter_ns()
+    for u in sample:
+        index.get_by_id(u["id"])
+    id_ns = (time.perf_counter_ns() - start) / lookups
+
+    return {"users": users_nb, "login_ns": login_ns, "login_ci_ns": lower_login_ns, "id_ns": id_ns}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark user detail lookups.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        result = bench_lookup(size)
+        print(f"{result['users']:>10} users: login {result['login_ns']:.0f} ns, "
+              f"login (case-insensitive) {result['login_ci_ns']:.0f} ns, id {result['id_ns']:.0f} ns")
+        sys.stdout.flush()
@@ -0,0 +1,81 @@
+import argparse
+import copy
+import gc
+import tracemalloc
+from datetime import datetime
+from typing import Callable
+
+from api.models import User
+from api.store import UserStore
+from filtered_users import load_filtered_users
+
+
+def scale_records(records: list[dict], factor: int) -> list[dict]:
+    """
+    Replicates a users list, giving each copy distinct ids and logins.
+
+    :param records: The users list.
+    :type records: list[dict]
+    :param factor: How many copies to make.
+    :type factor: int
+
+    :return: The scaled users list.
+    """
+    id_span = max(r["id"] for r in records) + 1
+    scaled = []
+    for k in range(factor):
+        for record in records:
+            record = copy.copy(record)
+            record["id"] += k * id_span
+            record["login"] = f"{record['login']}-{k}"
+            scaled.append(record)
+    return scaled
+
+def build_pydantic_users(records: list[dict]) -> list[User]:
+    """
+    Builds the users the way `api.models` did before the columnar store.
+
+    :param records: The users list.
+    :type records: list[dict]
+
+    :return: The users as Pydantic objects.
+    """
+    users = []
+    for record in records:
+        record = dict(record, created_at=datetime.fromisoformat(record["created_at"].replace("Z", "+00:00")))
+        users.append(User(**record))
+    return users
+
+def measure(build: Callable, records: list[dict]) -> int:
+    """
+    Measures how many bytes stay allocated by a users representation.
+
+    :param build: The function building the representation from the records.
+    :type build: Callable
+    :param records: The users list.
+    :type records: list[dict]
+
+    :return: The resident size of the representation, in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    built = build(records)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return size
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the memory used by the users representations.")
+    parser.add_argument("--file", default="data/filtered_users.json")
+    parser.add_argument("--scale", type=int, default=100)
+    args = parser.parse_args()
+
+    records = scale_records(load_filtered_users(args.file), args.scale)
+    pydantic_size = measure(build_pydantic_users, records)
+    store_size = measure(UserStore.from_records, records)
+    users_nb = len(records)
+    print(f"{users_nb} users")
+    print(f"list[User]: {pydantic_size / 2**20:.1f} MiB ({pydantic_size / users_nb:.0f} bytes/user)")
+    print(f"UserStore:  {store_size / 2**20:.1f} MiB ({store_size / users_nb:.0f} bytes/user)")
@@ -0,0 +1,66 @@
+import argparse
+import random
+import sys
+import time
+
+from api.search import LoginSearch
+from benchmarks.synthetic import generate_users
+
+
+def bench_search(users_nb: int, queries: int = 1_000, limit: int = 100) -> dict:
+    """
+    Measures the latency of login searches, against a full scan, on `users_nb` users.
+
+    :param users_nb: How many users to index.
+    :type users_nb: int
+    :param queries: How many queries to time.
+    :type queries: int
+    :param limit: The page size of each query.
+    :type limit: int
+
+    :return: The mean query latencies, in microseconds, and the index build time, in seconds.
+    """
+    logins = [u["login"] for u in generate_users(users_nb)]
+    start = time.perf_counter()
+    search = LoginSearch(logins)
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(1)
+    sample = []
+    short_sample = []
+    for _ in range(queries):
+        login = logins[rng.randrange(users_nb)]
+        begin = rng.randrange(len(login) - 4)
+        sample.append(login[begin:begin + 5])
+        short_sample.append(login[begin:begin + 2])
+
+    results = {"users": users_nb, "build_s": build_s}
+    for mode in ("contains", "prefix"):
+        start = time.perf_counter()
+        for q in sample:
+            search.search(q, mode=mode, limit=limit)
+        results[f"{mode}_us"] = (time.perf_counter() - start) / queries * 1e6
+    # 1 and 2 characters queries have their own posting lists too.
+    start = time.perf_counter()
+    for q in short_sample:
+        search.search(q, mode="contains", limit=limit)
+    results["contains_short_us"] = (time.perf_counter() - start) / queries * 1e6
+
+    scans = max(1, queries // 100)
+    start = time.perf_counter()
+    for q in sample[:scans]:
+        [login for login in logins if q.lower() in login.lower()]
+    results["scan_us"] = (time.perf_counter() - start) / scans * 1e6
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark login searches.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        result = bench_search(size)
+        print(f"{result['users']:>10} users: contains {result['contains_us']:.1f} µs "
+              f"({result['contains_short_us']:.1f} µs for 2 characters), prefix {result['prefix_us']:.1f} µs, "
+              f"full scan {result['scan_us']:.1f} µs (index built in {result['build_s']:.1f} s)")
+        sys.stdout.flush()
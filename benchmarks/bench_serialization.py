@@ -0,0 +1,70 @@
+import argparse
+import json
+import sys
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+from api.models import UserSummary
+from api.store import UserStore
+from benchmarks.synthetic import generate_users
+
+
+def serialize_models(users: UserStore, positions: range) -> bytes:
+    """
+    Serializes users summaries the way FastAPI does for a `List[UserSummary]` response model:
+    one model per user, validated again against the response model, then JSON encoded.
+
+    :param users: The users store.
+    :type users: UserStore
+    :param positions: The users positions.
+    :type positions: range
+
+    :return: The JSON body.
+    """
+    page = [UserSummary(**users.summary(position)) for position in positions]
+    adapter = TypeAdapter(List[UserSummary])
+    content = adapter.dump_python(adapter.validate_python(page), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def bench_serialization(users_nb: int, page_sizes: List[int], per_page_size: int = 1_000_000) -> List[dict]:
+    """
+    Measures the throughput of both serialization paths on `users_nb` users, for several page sizes.
+
+    :param users_nb: How many users to store.
+    :type users_nb: int
+    :param page_sizes: The page sizes to time (0 for the whole store).
+    :type page_sizes: List[int]
+    :param per_page_size: How many users to serialize in total for each page size (at least 3 pages).
+    :type per_page_size: int
+
+    :return: The throughputs, in users per second, for each page size.
+    """
+    users = UserStore.from_records(generate_users(users_nb))
+    results = []
+    for page_size in page_sizes:
+        positions = range(page_size or users_nb)
+        assert serialize_models(users, positions) == users.summaries_json(positions)
+        repeat = max(3, per_page_size // len(positions))
+        result = {"users": users_nb, "page_size": len(positions)}
+        for name, serialize in (("models", serialize_models), ("fragments", UserStore.summaries_json)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                serialize(users, positions)
+            result[f"{name}_per_s"] = len(positions) * repeat / (time.perf_counter() - start)
+        results.append(result)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the serialization of users lists.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[100, 10_000, 0],
+                        help="Page sizes to time, 0 for the whole dataset.")
+    args = parser.parse_args()
+
+    for result in bench_serialization(args.users, args.page_sizes):
+        print(f"{result['page_size']:>10} users per page: models {result['models_per_s']:,.0f} users/s, "
+              f"fragments {result['fragments_per_s']:,.0f} users/s "
+              f"(x{result['fragments_per_s'] / result['models_per_s']:.0f})")
+        sys.stdout.flush()
@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_api import BENCH_LOGIN, BENCH_PASSWORD
+
+
+async def load(base_url: str, paths: list[str], concurrency: int, seconds: float) -> float:
+    """
+    Sends requests to a running server for a while, over keep-alive connections.
+
+    :param base_url: The server url.
+    :type base_url: str
+    :param paths: The paths to request, in turn.
+    :type paths: list[str]
+    :param concurrency: How many requests to keep in flight.
+    :type concurrency: int
+    :param seconds: How long to send requests for.
+    :type seconds: float
+
+    :return: The throughput, in requests per second.
+    """
+    import httpx
+
+    token = base64.b64encode(f"{BENCH_LOGIN}:{BENCH_PASSWORD}".encode()).decode()
+    headers = {"Authorization": f"Basic {token}"}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    done = 0
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits) as client:
+        deadline = time.perf_counter() + seconds
+        async def worker(offset):
+            nonlocal done
+            i = offset
+            while time.perf_counter() < deadline:
+                response = await client.get(paths[i % len(paths)])
+                response.raise_for_status()
+                done += 1
+                i += 1
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        return done / (time.perf_counter() - start)
+
+def wait_until_ready(base_url: str, timeout: float = 120) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/openapi.json", timeout=1).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Server not ready: {base_url}")
+
+def bench_server(command: list[str], port: int, paths: list[str], concurrency: int, seconds: float) -> float:
+    """
+    Starts a server, measures its throughput, then stops it.
+
+    :param command: The command starting the server.
+    :type command: list[str]
+    :param port: The port the server listens on.
+    :type port: int
+    :param paths: The paths to request, in turn.
+    :type paths: list[str]
+    :param concurrency: How many requests to keep in flight.
+    :type concurrency: int
+    :param seconds: How long to send requests for.
+    :type seconds: float
+
+    :return: The throughput, in requests per second.
+    """
+    env = dict(os.environ, RESPONSE_CACHE_SIZE="0",
+               AUTHORIZED_USERS=json.dumps([{"login": BENCH_LOGIN, "password": BENCH_PASSWORD}]))
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_until_ready(base_url)
+        return asyncio.run(load(base_url, paths, concurrency, seconds))
+    finally:
+        process.terminate()
+        process.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the throughput of a single uvicorn worker with api.server.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count() or 1])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    paths = ["/users/", "/users/search?q=an&limit=100", "/users/search?q=sa&mode=prefix", "/users/giglestudios",
+             "/users/by-id/10361351"]
+    setups = {"uvicorn api.main:app": [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(args.port),
+                                       "--no-access-log"]}
+    for workers in args.workers:
+        setups[f"api.server --workers {workers}"] = [sys.executable, "-m", "api.server", "--port", str(args.port),
+                                                     "--workers", str(workers)]
+    for name, command in setups.items():
+        throughput = bench_server(command, args.port, paths, args.concurrency, args.seconds)
+        print(f"{name:<28} {throughput:,.0f} req/s")
+        sys.stdout.flush()
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.bench_api import BENCH_LOGIN, BENCH_PASSWORD
+from benchmarks.synthetic import generate_users, median_created_at
+from json_stream import write_json_list
+
+
+BENCH_DIR = "data/bench"
+REQUIRED_FIELDS = ("bio", "avatar_url")
+
+
+def prepare_dataset(users_nb: int, directory: str = BENCH_DIR, snapshot: bool = True) -> tuple[str, str | None]:
+    """
+    Writes a synthetic `filtered_users.json` (and its snapshot), unless it already exists.
+
+    :param users_nb: How many users to generate.
+    :type users_nb: int
+    :param directory: Where to write the datasets.
+    :type directory: str
+    :param snapshot: Whether to also write the binary snapshot.
+    :type snapshot: bool
+
+    :return: The JSON file path and the snapshot path.
+    """
+    from api.dataset import Dataset, save_snapshot
+    from json_stream import iter_json_list
+
+    dataset_dir = os.path.join(directory, str(users_nb))
+    file_path = os.path.join(dataset_dir, "filtered_users.json")
+    snapshot_path = os.path.join(dataset_dir, "filtered_users.snapshot")
+    if not os.path.exists(file_path):
+        os.makedirs(dataset_dir, exist_ok=True)
+        write_json_list(generate_users(users_nb), f"{file_path}.tmp")
+        os.replace(f"{file_path}.tmp", file_path)
+    if snapshot and not os.path.exists(os.path.join(snapshot_path, "manifest.json")):
+        save_snapshot(Dataset.from_records(iter_json_list(file_path)), snapshot_path)
+    return file_path, snapshot_path if snapshot else None
+
+def run_api_bench(file_path: str, snapshot_path: str | None, requests_nb: int, concurrency: int) -> dict:
+    """
+    Runs `benchmarks.bench_api` in a fresh process, so that startup time and RSS are measured from scratch.
+
+    :param file_path: The JSON file to serve.
+    :type file_path: str
+    :param snapshot_path: The snapshot to serve (None to load the JSON file).
+    :type snapshot_path: str | None
+    :param requests_nb: How many requests to send per endpoint, for each measure.
+    :type requests_nb: int
+    :param concurrency: How many requests to keep in flight for the throughput measure.
+    :type concurrency: int
+
+    :return: The measures.
+    """
+    env = dict(os.environ, USERS_FILE=file_path, USERS_SNAPSHOT=snapshot_path or "",
+               RESPONSE_CACHE_SIZE="0", DATASET_RELOAD_INTERVAL="0",
+               AUTHORIZED_USERS=json.dumps([{"login": BENCH_LOGIN, "password": BENCH_PASSWORD}]))
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_api", "--json",
+         "--requests", str(requests_nb), "--concurrency", str(concurrency)],
+        env=env, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def bench_pipeline(users_nb: int, duplicates: float = 0.1) -> dict:
+    """
+    Times `remove_duplicates` and `filter_users` on `users_nb` synthetic raw users. The creation date
+    filter is their median date, so that about half of them are kept whatever their number.
+
+    :param users_nb: How many users to generate, before adding duplicates.
+    :type users_nb: int
+    :param duplicates: The share of users appearing twice.
+    :type duplicates: float
+
+    :return: The runtimes, in seconds.
+    """
+    from filtered_users import filter_users, remove_duplicates
+
+    users = list(generate_users(users_nb))
+    for user in users[::3]:
+        user["bio"] = ""
+    users += users[:int(users_nb * duplicates)]
+
+    start = time.perf_counter()
+    unique_users = remove_duplicates(users)
+    remove_duplicates_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    filter_users(REQUIRED_FIELDS, median_created_at(users_nb), unique_users)
+    filter_users_s = time.perf_counter() - start
+    return {"remove_duplicates_s": remove_duplicates_s, "filter_users_s": filter_users_s}
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compares results to a baseline. Throughputs (`*_per_s`) should not decrease, every other measure
+    (times, memory) should not increase, by more than the tolerance.
+
+    :param results: The current results.
+    :type results: dict
+    :param baseline: The baseline results.
+    :type baseline: dict
+    :param tolerance: The accepted relative change, e.g. 0.2 for 20%.
+    :type tolerance: float
+
+    :return: The regressions, described.
+    """
+    regressions = []
+    def walk(current, previous, path):
+        for key, value in current.items():
+            if key not in previous:
+                continue
+            if isinstance(value, dict):
+                walk(value, previous[key], f"{path}{key}.")
+            elif isinstance(value, (int, float)) and key != "users" and previous[key]:
+                change = (value - previous[key]) / previous[key]
+                if key.endswith("_per_s"):
+                    change = -change
+                if change > tolerance:
+                    regressions.append(f"{path}{key}: {previous[key]:.4g} -> {value:.4g} ({change:+.0%} worse)")
+    walk(results["sizes"], baseline.get("sizes", {}), "")
+    return regressions
+
+def run_suite(sizes: list[int], pipeline_max: int, requests_nb: int, concurrency: int) -> dict:
+    """
+    Runs every benchmark at every size.
+
+    :param sizes: The datasets sizes.
+    :type sizes: list[int]
+    :param pipeline_max: The largest size to run the (in-memory) pipeline benchmark on.
+    :type pipeline_max: int
+    :param requests_nb: How many requests to send per endpoint, for each measure.
+    :type requests_nb: int
+    :param concurrency: How many requests to keep in flight for the throughput measure.
+    :type concurrency: int
+
+    :return: The results.
+    """
+    results = {"date": datetime.now(timezone.utc).isoformat(), "python": platform.python_version(),
+               "machine": platform.machine(), "sizes": {}}
+    for users_nb in sizes:
+        file_path, snapshot_path = prepare_dataset(users_nb)
+        size_results = {
+            "json": run_api_bench(file_path, None, requests_nb, concurrency),
+            "snapshot": run_api_bench(file_path, snapshot_path, requests_nb, concurrency),
+        }
+        if users_nb <= pipeline_max:
+            size_results["pipeline"] = bench_pipeline(users_nb)
+        results["sizes"][str(users_nb)] = size_results
+        print(f"{users_nb:>10} users: startup {size_results['json']['startup_s']:.2f} s (JSON), "
+              f"{size_results['snapshot']['startup_s']:.2f} s (snapshot), "
+              f"RSS {size_results['json']['rss_mib']:.0f} / {size_results['snapshot']['rss_mib']:.0f} MiB")
+        for name, measures in size_results["snapshot"]["endpoints"].items():
+            print(f"{'':>12}{name:<18} p50 {measures['p50_ms']:.2f} ms, p95 {measures['p95_ms']:.2f} ms, "
+                  f"{measures['requests_per_s']:.0f} req/s")
+        if "pipeline" in size_results:
+            print(f"{'':>12}remove_duplicates {size_results['pipeline']['remove_duplicates_s']:.2f} s, "
+                  f"filter_users {size_results['pipeline']['filter_users_s']:.2f} s")
+        sys.stdout.flush()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API and pipeline benchmarks on synthetic datasets.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--pipeline-max", type=int, default=1_000_000,
+                        help="Largest size for the pipeline benchmark, which holds every user in memory.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results.json"))
+    parser.add_argument("--baseline", help="Results file to compare to.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.pipeline_max, args.requests, args.concurrency)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"Saved results: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        print(f"{len(regressions)} regressions against {args.baseline}")
+        sys.exit(1 if regressions else 0)
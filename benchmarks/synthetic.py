@@ -0,0 +1,46 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+
+START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+# Users are created this many seconds apart, on average.
+CREATION_INTERVAL = 7
+
+def generate_users(users_nb: int, start_id: int = 10361000, seed: int = 0) -> Iterator[dict]:
+    """
+    Generates synthetic users shaped like the records of `data/filtered_users.json`.
+
+    :param users_nb: How many users to generate.
+    :type users_nb: int
+    :param start_id: The id of the first user.
+    :type start_id: int
+    :param seed: The random seed, so that runs are reproducible.
+    :type seed: int
+
+    :return: An iterator over the users, in id order.
+    """
+    rng = random.Random(seed)
+    for i in range(users_nb):
+        user_id = start_id + i
+        created_at = START_DATE + timedelta(seconds=i * CREATION_INTERVAL + rng.randrange(CREATION_INTERVAL))
+        yield {
+            "login": f"user{user_id:x}{rng.randrange(1000):03d}",
+            "id": user_id,
+            "created_at": created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "avatar_url": f"https://avatars.githubusercontent.com/u/{user_id}?v=4",
+            "bio": f"Synthetic bio number {i}, {rng.choice(('developer', 'designer', 'student', 'researcher'))}.",
+        }
+
+def median_created_at(users_nb: int) -> str:
+    """
+    Gets the date splitting `users_nb` generated users in two halves, the newer one being kept by a
+    creation date filter on it.
+
+    :param users_nb: How many users are generated.
+    :type users_nb: int
+
+    :return: The date, as a `filter_users` creation date filter.
+    """
+    median = START_DATE + timedelta(seconds=users_nb * CREATION_INTERVAL // 2)
+    return median.strftime("%Y-%m-%dT%H:%M:%S")
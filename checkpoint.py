@@ -0,0 +1,100 @@
+import json
+import os
+from typing import Iterator
+
+
+class Checkpoint:
+    """
+    Append-only checkpoint of an extraction.
+
+    Fetched users are appended to a JSON Lines file. Every `every` users, the file is synced to disk
+    and a small state file records the last seen id, the users count and the committed file size.
+    On restart, anything written after the last commit is dropped and the extraction resumes from
+    the last seen id.
+
+    :param records_path: The path to the JSON Lines file.
+    :type records_path: str
+    :param every: How many users to append between two commits.
+    :type every: int
+    """
+    def __init__(self, records_path:str = "data/users.jsonl", every:int = 100):
+        self.records_path = records_path
+        self.state_path = f"{records_path}.checkpoint"
+        self.every = every
+        self.since: int | None = None
+        self.count = 0
+        self._pending = 0
+        self._file = None
+
+    def open(self, since:int) -> int:
+        """
+        Opens the checkpoint for appending, resuming a previous run if there is one.
+
+        :param since: The id after which to get users, when there is no previous run.
+        :type since: int
+
+        :return: The id after which to get users.
+        """
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.since, self.count = state["since"], state["count"]
+            with open(self.records_path, "ab") as f:
+                f.truncate(state["offset"])
+            print(f"Resuming from checkpoint: {self.count} users already fetched, starting at id {self.since}")
+        else:
+            self.since, self.count = since, 0
+            with open(self.records_path, "wb"):
+                pass
+        self._file = open(self.records_path, "ab")
+        return self.since
+
+    def append(self, user_detail:dict) -> None:
+        """
+        Appends a fetched user, committing every `every` users.
+
+        :param user_detail: The user's details.
+        :type user_detail: dict
+        """
+        self._file.write(json.dumps(user_detail).encode("utf-8") + b"\n")
+        self.since = user_detail["id"]
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.every:
+            self.commit()
+
+    def commit(self) -> None:
+        """
+        Syncs the appended users to disk, then atomically records the new state.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        state = {"since": self.since, "count": self.count, "offset": self._file.tell()}
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+        self._pending = 0
+
+    def close(self) -> None:
+        """
+        Commits and closes the checkpoint.
+        """
+        if self._file is not None:
+            self.commit()
+            self._file.close()
+            self._file = None
+
+    def records(self) -> Iterator[dict]:
+        """
+        Reads the committed users back, one at a time.
+
+        :return: An iterator over the users, in fetch order.
+        """
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            offset = json.load(f)["offset"]
+        with open(self.records_path, "rb") as f:
+            while f.tell() < offset and (line := f.readline()):
+                yield json.loads(line)
@@ -1,20 +1,30 @@
 import datetime
 import json
-import os
 import time
+from typing import Iterable, Iterator
 
 from dotenv import load_dotenv
 import requests
 from requests import Response
 from requests.exceptions import Timeout, ConnectionError
 
+from checkpoint import Checkpoint
+from http_cache import HttpCache
+from pacing import Pacer
+from token_pool import TokenPool
+from storage import write_users
+
 load_dotenv()
 
 
-token = os.getenv("GITHUB_TOKEN")
-headers = {"Authorization": f"token {token}"}
+# Tokens from GITHUB_TOKENS (comma-separated) or GITHUB_TOKEN, shared by every extraction of the process.
+token_pool = TokenPool.from_env()
+
+API_URL = "https://api.github.com"
+# GitHub asks to wait at least a minute after a secondary rate limit without `Retry-After`.
+SECONDARY_LIMIT_WAIT = 60
 
-def safe_get(session, url, headers, max_retries=3, timeout=10) -> Response | None:
+def safe_get(session, url, headers, max_retries=3, timeout=10, pacer=None) -> Response | None:
     """
     Safely gets a response from a url.
 
@@ -28,19 +38,23 @@ def safe_get(session, url, headers, max_retries=3, timeout=10) -> Response | Non
     :type max_retries: int
     :param timeout: timeout.
     :type timeout: int
+    :param pacer: pacer backing off between retries (optional).
+    :type pacer: Pacer | None
 
     :return: Response or None.
     """
+    pacer = pacer if pacer is not None else Pacer()
     for attempt in range(1, max_retries + 1):
         try:
             return session.get(url, headers=headers, timeout=timeout)
         except (ConnectionError, Timeout) as e:
             print(f"[{attempt}/{max_retries}] Erreur de connexion : {e}")
-            time.sleep(5 * attempt)
+            pacer.wait(pacer.backoff(attempt), "connection")
     print("Échec de la connexion après plusieurs tentatives.")
     return None
 
-def get_users_info(users_nb:int, since:int) -> list[dict]:
+def get_users_info(users_nb:int, since:int, api_url:str = API_URL, cache:HttpCache | None = None,
+                   pool:TokenPool | None = None) -> list[dict]:
     """
     Gets a list of GitHub users with their information.
 
@@ -48,9 +62,77 @@ def get_users_info(users_nb:int, since:int) -> list[dict]:
     :type users_nb: int
     :param since: The id after which to get users.
     :type since: int
+    :param api_url: The GitHub API base url.
+    :type api_url: str
+    :param cache: The cache of user details from previous runs (optional).
+    :type cache: HttpCache | None
+    :param pool: The tokens to send the requests with (default: `token_pool`).
+    :type pool: TokenPool | None
 
     :return: List of GitHub users with their information.
     """
+    return list(iter_users_info(users_nb, since, api_url, cache, pool))
+
+def get_users_info_checkpointed(users_nb:int, since:int, checkpoint:Checkpoint, api_url:str = API_URL,
+                                cache:HttpCache | None = None, pool:TokenPool | None = None,
+                                until:int | None = None, shares:int = 1) -> int:
+    """
+    Gets GitHub users with their information into a checkpoint, resuming its previous run if any.
+
+    :param users_nb: How many users to get, including those fetched by previous runs.
+    :type users_nb: int
+    :param since: The id after which to get users, when there is no previous run.
+    :type since: int
+    :param checkpoint: The checkpoint to append the users to.
+    :type checkpoint: Checkpoint
+    :param api_url: The GitHub API base url.
+    :type api_url: str
+    :param cache: The cache of user details from previous runs (optional).
+    :type cache: HttpCache | None
+    :param pool: The tokens to send the requests with (default: `token_pool`).
+    :type pool: TokenPool | None
+    :param until: The highest id to get (optional).
+    :type until: int | None
+    :param shares: How many processes spend the same tokens' quotas at the same time.
+    :type shares: int
+
+    :return: How many users the checkpoint holds.
+    """
+    since = checkpoint.open(since)
+    try:
+        if users_nb > checkpoint.count:
+            for user_detail in iter_users_info(users_nb - checkpoint.count, since, api_url, cache, pool, until,
+                                               shares):
+                checkpoint.append(user_detail)
+    finally:
+        checkpoint.close()
+    return checkpoint.count
+
+def iter_users_info(users_nb:int, since:int, api_url:str = API_URL, cache:HttpCache | None = None,
+                    pool:TokenPool | None = None, until:int | None = None, shares:int = 1) -> Iterator[dict]:
+    """
+    Gets GitHub users with their information, one user at a time, in id order.
+
+    :param users_nb: How many users to get.
+    :type users_nb: int
+    :param since: The id after which to get users.
+    :type since: int
+    :param api_url: The GitHub API base url.
+    :type api_url: str
+    :param cache: The cache of user details from previous runs (optional).
+    :type cache: HttpCache | None
+    :param pool: The tokens to send the requests with (default: `token_pool`).
+    :type pool: TokenPool | None
+    :param until: The highest id to get (optional): the extraction stops at the first user after it.
+    :type until: int | None
+    :param shares: How many processes spend the same tokens' quotas at the same time, each pacing its
+        calls on its share.
+    :type shares: int
+
+    :return: An iterator over GitHub users with their information.
+    """
+    pool = pool if pool is not None else token_pool
+    pacer = Pacer(pool, shares=shares)
     print("Getting users info...")
     failed_pages = 0
     failed_users = 0
@@ -60,23 +142,26 @@ def get_users_info(users_nb:int, since:int) -> list[dict]:
         iterations = 1
     else:
         per_page = 100
-        iterations = users_nb // 100 + 1
-        last_batch = users_nb % 100
+        iterations = (users_nb + 99) // 100
+        last_batch = users_nb - 100 * (iterations - 1)
 
     session = requests.Session()
-    users_info = []
+    users_nb_got = 0
     i = 1
 
     while i <= iterations:
         if i == iterations:
             print(f"==================== Batch {i}: {last_batch} users, starting at id {since} ====================")
-            url = f"https://api.github.com/users?per_page={last_batch}&since={since}"
+            url = f"{api_url}/users?per_page={last_batch}&since={since}"
         else:
             print(f"==================== Batch {i}: {per_page} users, starting at id {since} ====================")
-            url = f"https://api.github.com/users?per_page={per_page}&since={since}"
+            url = f"{api_url}/users?per_page={per_page}&since={since}"
 
+        attempt = 0
         while True:
-            result = safe_get(session, url, headers=headers)
+            pacer.wait(*pacer.next_delay())
+            state = pool.acquire()
+            result = safe_get(session, url, headers=pool.headers(state), pacer=pacer)
 
             if result is None:
                 print("Connection failed, retry...")
@@ -84,58 +169,98 @@ def get_users_info(users_nb:int, since:int) -> list[dict]:
                 session = requests.Session()
                 continue
 
-            #result = get(url, headers=headers)
-            error_handling = handle_status_code(result)
-            time.sleep(get_delay(result))
+            pool.update(state, result)
+            error_handling = handle_status_code(result, pool)
 
             if error_handling["error"]:
                 if error_handling["end_script"]:
-                    return users_info
+                    return
                 elif error_handling["pass"]:
                     i += 1
                     failed_pages += 1
                     continue
                 else:
-                    time.sleep(error_handling["timeout"])
+                    attempt += 1
+                    pacer.wait(*pacer.retry_delay(error_handling, attempt))
                     continue
 
             json_result = json.loads(result.content)
+            if until is not None and any(user["id"] > until for user in json_result):
+                json_result = [user for user in json_result if user["id"] <= until]
+                iterations = i
+            if not json_result:
+                # No more users: this page is the last one.
+                iterations = i
             for idx, result in enumerate(json_result):
-                user_detail = get_user_detail(result["login"], session)
-                if user_detail.get("not_found"):
+                user_detail = get_user_detail(result["login"], session, api_url, cache, result["id"], pool, pacer)
+                if user_detail and user_detail.get("not_found"):
                     print("User not found")
                     failed_users += 1
                     continue
                 if user_detail:
                     since = user_detail["id"]
-                    users_info.append(user_detail)
+                    users_nb_got += 1
+                    yield user_detail
                 else:
-                    print(f"Got informations about {len(users_info)} users. {failed_pages} failed pages and {failed_users} failed users.")
-                    return users_info
+                    print(f"Got informations about {users_nb_got} users. {failed_pages} failed pages and {failed_users} failed users.")
+                    if cache is not None:
+                        print(cache.report())
+                    print(pool.report())
+                    print(pacer.report())
+                    return
 
             i += 1
             break
 
-    print(f"Got informations about {len(users_info)} users. {failed_pages} failed pages and {failed_users} failed users.")
-    return users_info
+    print(f"Got informations about {users_nb_got} users. {failed_pages} failed pages and {failed_users} failed users.")
+    if cache is not None:
+        print(cache.report())
+    print(pool.report())
+    print(pacer.report())
 
-def get_user_detail(user_login:str, session: requests.Session) -> dict | None:
+def get_user_detail(user_login:str, session: requests.Session, api_url:str = API_URL,
+                    cache:HttpCache | None = None, user_id:int | None = None, pool:TokenPool | None = None,
+                    pacer:Pacer | None = None) -> dict | None:
     """
     Gets the details of a GitHub user.
 
+    With a cache, details validated recently are used without any request, and the others are
+    requested conditionally: an unchanged user costs no quota.
+
     :param user_login: The user's login.
     :type user_login: str
     :param session: The requests current session.
     :type session: requests.Session
+    :param api_url: The GitHub API base url.
+    :type api_url: str
+    :param cache: The cache of user details from previous runs (optional).
+    :type cache: HttpCache | None
+    :param user_id: The user's id, as listed (optional, checked against the cached details).
+    :type user_id: int | None
+    :param pool: The tokens to send the requests with (default: `token_pool`).
+    :type pool: TokenPool | None
+    :param pacer: The pacer of the extraction (optional).
+    :type pacer: Pacer | None
 
     :return: The user's details.
     """
-    print(f"Getting details for {user_login}")
-    url = f"https://api.github.com/users/{user_login}"
+    pool = pool if pool is not None else token_pool
+    pacer = pacer if pacer is not None else Pacer(pool)
+    url = f"{api_url}/users/{user_login}"
     user_detail = None
+    if cache is not None:
+        json_result = cache.fresh(url, user_id)
+        if json_result is not None:
+            print(f"Details for {user_login} are up to date")
+            return parse_user_detail(user_login, json_result)
+    print(f"Getting details for {user_login}")
 
+    attempt = 0
     while True:
-        result = safe_get(session, url, headers=headers)
+        pacer.wait(*pacer.next_delay())
+        state = pool.acquire()
+        result = safe_get(session, url, headers={**pool.headers(state), **(cache.headers(url) if cache is not None else {})},
+                          pacer=pacer)
 
         if result is None:
             print("Connection failed for this user, retry...")
@@ -143,9 +268,8 @@ def get_user_detail(user_login:str, session: requests.Session) -> dict | None:
             session = requests.Session()
             continue
 
-        #result = get(url, headers=headers)
-        error_handling = handle_status_code(result)
-        time.sleep(get_delay(result))
+        pool.update(state, result)
+        error_handling = handle_status_code(result, pool)
 
         if error_handling["error"]:
             if error_handling["end_script"]:
@@ -153,21 +277,38 @@ def get_user_detail(user_login:str, session: requests.Session) -> dict | None:
             elif error_handling["pass"]:
                 return {"not_found": True}
             else:
-                time.sleep(error_handling["timeout"])
+                attempt += 1
+                pacer.wait(*pacer.retry_delay(error_handling, attempt))
                 continue
 
-        json_result = json.loads(result.content)
-        user_detail = {
-            "login": user_login,
-            "id": json_result["id"],
-            "created_at": json_result["created_at"],
-            "avatar_url": json_result["avatar_url"],
-        }
+        json_result = cache.update(url, result) if cache is not None else json.loads(result.content)
+        if json_result is None:
+            # Not modified, but the cached details are gone: request them again, unconditionally.
+            continue
+        return parse_user_detail(user_login, json_result)
+
+def parse_user_detail(user_login:str, json_result:dict) -> dict:
+    """
+    Keeps the fields we store from a GitHub user's details.
 
-        if json_result["bio"]:
-            user_detail["bio"] = json_result["bio"]
+    :param user_login: The user's login.
+    :type user_login: str
+    :param json_result: The decoded `/users/{login}` response.
+    :type json_result: dict
+
+    :return: The user's details.
+    """
+    user_detail = {
+        "login": user_login,
+        "id": json_result["id"],
+        "created_at": json_result["created_at"],
+        "avatar_url": json_result["avatar_url"],
+    }
+
+    if json_result["bio"]:
+        user_detail["bio"] = json_result["bio"]
 
-        return user_detail
+    return user_detail
 
 def get_delay(response:Response) -> int:
     """
@@ -194,24 +335,47 @@ def get_delay(response:Response) -> int:
         print(f"==================== Quota reached, delaying calls for {delay} seconds (until {resume_time_str}) ====================")
         return delay
 
-def handle_status_code(response:Response) -> dict:
+def handle_status_code(response:Response, pool:TokenPool | None = None) -> dict:
     """
     Specifies how to handle request's status code.
 
     :param response: The API response that contains the status code.
     :type response: requests.Response
+    :param pool: The tokens the requests are sent with, which wait for the quota themselves (optional).
+    :type pool: TokenPool | None
 
     :return: How to handle the error through a dict.
     """
-    if response.status_code == 403:
-        if response.headers.get("X-RateLimit-Reset"):
+    retry_after = response.headers.get("Retry-After")
+    if response.status_code in (403, 429) and retry_after is not None:
+        print(f"Error: Secondary rate limit, retrying after {retry_after} seconds")
+        return {
+            "error": True,
+            "end_script": False,
+            "pass": False,
+            "timeout": int(retry_after) if retry_after.isdigit() else SECONDARY_LIMIT_WAIT,
+            "reason": "retry_after"
+        }
+    elif response.status_code == 403:
+        if response.headers.get("X-RateLimit-Remaining") == "0":
             print(f"Error: API call forbidden (quota issue)")
-            delay = get_delay(response)
+            # Another token of the pool may still have calls left: the pacer waits only if none has.
+            delay = get_delay(response) if pool is None else 0
             return {
                 "error": True,
                 "end_script": False,
                 "pass": False,
-                "timeout": delay
+                "timeout": delay,
+                "reason": "quota"
+            }
+        elif response.headers.get("X-RateLimit-Reset"):
+            print(f"Error: API call forbidden (secondary rate limit)")
+            return {
+                "error": True,
+                "end_script": False,
+                "pass": False,
+                "timeout": SECONDARY_LIMIT_WAIT,
+                "reason": "secondary_limit"
             }
         else:
             print(f"Error: API call forbidden (token issue)")
@@ -221,13 +385,14 @@ def handle_status_code(response:Response) -> dict:
                 "pass": False,
                 "timeout": 0
             }
-    elif response.status_code== 5:
-        print(f"Error: GitHub server is down, retry later.")
+    elif 500 <= response.status_code < 600:
+        print(f"Error: GitHub server error ({response.status_code}), retry later.")
         return {
             "error": True,
             "end_script": False,
             "pass": False,
-            "timeout": 60
+            "timeout": 0,
+            "reason": "server_error"
         }
     elif response.status_code == 429:
         print(f"Error: Too many requests.")
@@ -235,7 +400,16 @@ def handle_status_code(response:Response) -> dict:
             "error": True,
             "end_script": False,
             "pass": False,
-            "timeout": 5
+            "timeout": SECONDARY_LIMIT_WAIT,
+            "reason": "secondary_limit"
+        }
+    elif response.status_code == 304:
+        # Answer to a conditional request: the cached response is still valid.
+        return {
+            "error": False,
+            "end_script": False,
+            "pass": False,
+            "timeout": 0
         }
     elif response.status_code == 404:
         print(f"Error: Page not found.")
@@ -261,13 +435,17 @@ def handle_status_code(response:Response) -> dict:
             "timeout": 0
         }
 
-def save_users(users_info:list[dict]) -> None:
+def save_users(users_info:Iterable[dict], file_path:str = 'data/users.json') -> None:
     """
-    Saves the users information list in a JSON file.
+    Saves the users information list in a JSON file, or Parquet file if its name ends with `.parquet`.
+
+    The users are written one at a time, so any iterable (e.g. `Checkpoint.records()`) can be saved
+    without holding every user in memory.
 
     :param users_info: A list of users information.
-    :type users_info: list[dict]
+    :type users_info: Iterable[dict]
+    :param file_path: The path to the JSON (or Parquet) file.
+    :type file_path: str
     """
-    with open('data/users.json', 'w') as fp:
-        json.dump(users_info, fp, indent=4)
-    print(f"Saved {len(users_info)} users information")
\ No newline at end of file
+    count = write_users(users_info, file_path)
+    print(f"Saved {count} users information")
\ No newline at end of file
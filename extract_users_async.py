@@ -0,0 +1,236 @@
+import asyncio
+
+import httpx
+
+from extract_users import API_URL, handle_status_code, parse_user_detail, token_pool
+from http_cache import HttpCache
+from pacing import Pacer
+from token_pool import TokenPool, TokenState
+
+
+class ExtractionAborted(Exception):
+    """
+    Raised when a response means the extraction can't go on (e.g. an invalid token).
+    """
+
+
+class RateLimitState:
+    """
+    Quota information shared by every worker of an extraction.
+
+    It wraps a `TokenPool`, updated from the `X-RateLimit-*` headers of each response, and a `Pacer`
+    spacing the calls of every worker: they wait for the earliest reset once every token has run
+    out.
+
+    :param pool: The tokens to send the requests with (default: `token_pool`).
+    :type pool: TokenPool | None
+    """
+    def __init__(self, pool:TokenPool | None = None):
+        self.pool = pool if pool is not None else token_pool
+        self.pacer = Pacer(self.pool)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> TokenState:
+        """
+        Waits until API calls are allowed, then picks the token for the next request.
+
+        :return: The token with the most headroom.
+        """
+        await self.wait()
+        return self.pool.acquire()
+
+    def update(self, state:TokenState, response:httpx.Response) -> None:
+        """
+        Updates a token's quota from a response's headers.
+
+        :param state: The token the request was sent with.
+        :type state: TokenState
+        :param response: The API response that contains quota information.
+        :type response: httpx.Response
+        """
+        self.pool.update(state, response)
+
+    def get_delay(self) -> float:
+        """
+        Gets the delay in seconds before making another API call.
+
+        :return: The delay before continuing to make API Calls, in seconds.
+        """
+        return self.pool.get_delay()
+
+    async def wait(self) -> None:
+        """
+        Waits until API calls are allowed again.
+        """
+        async with self._lock:
+            await self.pacer.wait_async(*self.pacer.next_delay())
+
+async def safe_get_async(client:httpx.AsyncClient, url:str, max_retries=3, headers:dict | None = None,
+                         pacer:Pacer | None = None) -> httpx.Response | None:
+    """
+    Safely gets a response from a url.
+
+    :param client: httpx client.
+    :type client: httpx.AsyncClient
+    :param url: url to call.
+    :type url: str
+    :param max_retries: max retries.
+    :type max_retries: int
+    :param headers: headers to add to the client's ones (optional).
+    :type headers: dict | None
+    :param pacer: pacer backing off between retries (optional).
+    :type pacer: Pacer | None
+
+    :return: Response or None.
+    """
+    pacer = pacer if pacer is not None else Pacer()
+    for attempt in range(1, max_retries + 1):
+        try:
+            return await client.get(url, headers=headers)
+        except httpx.TransportError as e:
+            print(f"[{attempt}/{max_retries}] Connection error: {e}")
+            await pacer.wait_async(pacer.backoff(attempt), "connection")
+    print("Connection failed after several attempts.")
+    return None
+
+async def get_json(client:httpx.AsyncClient, url:str, rate_limit:RateLimitState,
+                   cache:HttpCache | None = None) -> dict | list | None:
+    """
+    Gets a decoded JSON response, waiting for the quota and retrying as `handle_status_code` says.
+
+    With a cache, the request is conditional and a `304` answer gives the cached response.
+
+    :param client: httpx client.
+    :type client: httpx.AsyncClient
+    :param url: url to call.
+    :type url: str
+    :param rate_limit: The quota shared by the workers.
+    :type rate_limit: RateLimitState
+    :param cache: The cache of responses from previous runs (optional).
+    :type cache: HttpCache | None
+
+    :return: The decoded response, or None if the resource should be skipped.
+    """
+    attempt = 0
+    while True:
+        state = await rate_limit.acquire()
+        result = await safe_get_async(client, url, headers={**TokenPool.headers(state),
+                                                            **(cache.headers(url) if cache is not None else {})},
+                                      pacer=rate_limit.pacer)
+
+        if result is None:
+            print("Connection failed, retry...")
+            continue
+
+        rate_limit.update(state, result)
+        error_handling = handle_status_code(result, rate_limit.pool)
+
+        if error_handling["error"]:
+            if error_handling["end_script"]:
+                raise ExtractionAborted(f"{url} answered {result.status_code}")
+            elif error_handling["pass"]:
+                return None
+            else:
+                attempt += 1
+                await rate_limit.pacer.wait_async(*rate_limit.pacer.retry_delay(error_handling, attempt))
+                continue
+
+        if cache is None:
+            return result.json()
+        json_result = cache.update(url, result)
+        if json_result is not None:
+            return json_result
+        # Not modified, but the cached response is gone: request it again, unconditionally.
+
+async def get_users_info_async(users_nb:int, since:int, concurrency:int = 10, api_url:str = API_URL,
+                               cache:HttpCache | None = None, pool:TokenPool | None = None) -> list[dict]:
+    """
+    Gets a list of GitHub users with their information, fetching details concurrently.
+
+    Listing pages are fetched one after the other while up to `concurrency` workers fetch the
+    details of the users already listed, over a pool of as many connections.
+
+    :param users_nb: How many users to get.
+    :type users_nb: int
+    :param since: The id after which to get users.
+    :type since: int
+    :param concurrency: How many details to fetch at the same time.
+    :type concurrency: int
+    :param api_url: The GitHub API base url.
+    :type api_url: str
+    :param cache: The cache of user details from previous runs (optional).
+    :type cache: HttpCache | None
+    :param pool: The tokens to send the requests with (default: `token_pool`).
+    :type pool: TokenPool | None
+
+    :return: List of GitHub users with their information, sorted by id.
+    """
+    print("Getting users info...")
+    rate_limit = RateLimitState(pool)
+    listed_users: asyncio.Queue = asyncio.Queue(maxsize=2 * 100)
+    stop = asyncio.Event()
+    users_info = []
+    stats = {"failed_pages": 0, "failed_users": 0}
+
+    async def list_users(client:httpx.AsyncClient) -> None:
+        nonlocal since
+        listed = 0
+        batch = 1
+        try:
+            while listed < users_nb and not stop.is_set():
+                per_page = min(100, users_nb - listed)
+                print(f"==================== Batch {batch}: {per_page} users, starting at id {since} ====================")
+                page = await get_json(client, f"{api_url}/users?per_page={per_page}&since={since}", rate_limit)
+                batch += 1
+                if page is None:
+                    # The next page starts after the last listed id: without this page, it is unknown.
+                    stats["failed_pages"] += 1
+                    print(f"Listing failed after id {since}, stopping")
+                    break
+                if not page:
+                    break
+                for user in page:
+                    await listed_users.put(user)
+                listed += len(page)
+                since = page[-1]["id"]
+        except ExtractionAborted as e:
+            print(f"Extraction aborted: {e}")
+            stop.set()
+        finally:
+            for _ in range(concurrency):
+                await listed_users.put(None)
+
+    async def get_details(client:httpx.AsyncClient) -> None:
+        while (user := await listed_users.get()) is not None:
+            if stop.is_set():
+                continue
+            login = user["login"]
+            url = f"{api_url}/users/{login}"
+            if cache is not None and (json_result := cache.fresh(url, user["id"])) is not None:
+                print(f"Details for {login} are up to date")
+                users_info.append(parse_user_detail(login, json_result))
+                continue
+            print(f"Getting details for {login}")
+            try:
+                json_result = await get_json(client, url, rate_limit, cache)
+            except ExtractionAborted as e:
+                print(f"Extraction aborted: {e}")
+                stop.set()
+                continue
+            if json_result is None:
+                print("User not found")
+                stats["failed_users"] += 1
+                continue
+            users_info.append(parse_user_detail(login, json_result))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+        await asyncio.gather(list_users(client), *(get_details(client) for _ in range(concurrency)))
+
+    users_info.sort(key=lambda user: user["id"])
+    print(f"Got informations about {len(users_info)} users. {stats['failed_pages']} failed pages and {stats['failed_users']} failed users.")
+    if cache is not None:
+        print(cache.report())
+    print(rate_limit.pool.report())
+    print(rate_limit.pacer.report())
+    return users_info
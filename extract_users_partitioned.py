@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from checkpoint import Checkpoint
+from extract_users import API_URL, get_users_info_checkpointed
+from filtered_users import merge_users_by_id
+from json_stream import iter_json_lines
+from storage import write_users
+
+
+SHARDS_DIR = "data/shards"
+
+
+def split_id_range(since:int, until:int, shards:int) -> list[tuple[int, int]]:
+    """
+    Splits an id range into contiguous shards of (almost) the same size.
+
+    :param since: The id after which to get users.
+    :type since: int
+    :param until: The highest id to get.
+    :type until: int
+    :param shards: How many shards to split the range into.
+    :type shards: int
+
+    :return: The `(since, until)` bounds of each shard, in id order.
+    """
+    size = max(1, -(-(until - since) // shards))
+    return [(start, min(start + size, until)) for start in range(since, until, size)]
+
+def shard_path(since:int, until:int, directory:str = SHARDS_DIR) -> str:
+    """
+    Gets the JSON Lines file of a shard, named after its id range so that a rerun resumes it.
+
+    :param since: The id after which the shard gets users.
+    :type since: int
+    :param until: The highest id the shard gets.
+    :type until: int
+    :param directory: Where the shards are written.
+    :type directory: str
+
+    :return: The path to the shard's file.
+    """
+    return os.path.join(directory, f"users_{since}_{until}.jsonl")
+
+def extract_shard(since:int, until:int, records_path:str, api_url:str = API_URL, shares:int = 1) -> int:
+    """
+    Gets the users of one id range into their own checkpoint, resuming its previous run if any.
+
+    :param since: The id after which to get users.
+    :type since: int
+    :param until: The highest id to get.
+    :type until: int
+    :param records_path: The shard's JSON Lines file, checkpointed next to it.
+    :type records_path: str
+    :param api_url: The GitHub API base url.
+    :type api_url: str
+    :param shares: How many shards are extracted at the same time, with the same tokens.
+    :type shares: int
+
+    :return: How many users the shard holds.
+    """
+    # Ids are unique, so the range can't hold more users than ids.
+    return get_users_info_checkpointed(until - since, since, Checkpoint(records_path), api_url, until=until,
+                                       shares=shares)
+
+def merge_shards(paths:list[str], output_path:str = 'data/users.json') -> int:
+    """
+    Merges shard files, each sorted by id, into one users JSON (or Parquet) file with a k-way merge.
+
+    Users appearing in two shards (e.g. around a boundary) are only written once.
+
+    :param paths: The shards JSON Lines files.
+    :type paths: list[str]
+    :param output_path: The users JSON file.
+    :type output_path: str
+
+    :return: How many users were written.
+    """
+    return write_users(merge_users_by_id(*(iter_json_lines(path) for path in paths)), output_path)
+
+def get_users_info_partitioned(since:int, until:int, shards:int, output_path:str = 'data/users.json',
+                               directory:str = SHARDS_DIR, api_url:str = API_URL) -> int:
+    """
+    Gets the GitHub users of an id range with one worker process per shard, then merges the shards.
+
+    Each shard has its own JSON Lines file and checkpoint: rerunning the same command resumes the
+    shards that didn't finish.
+
+    :param since: The id after which to get users.
+    :type since: int
+    :param until: The highest id to get.
+    :type until: int
+    :param shards: How many shards (and processes) to split the range into.
+    :type shards: int
+    :param output_path: The merged users JSON (or Parquet) file.
+    :type output_path: str
+    :param directory: Where the shards are written.
+    :type directory: str
+    :param api_url: The GitHub API base url.
+    :type api_url: str
+
+    :return: How many users were saved.
+    """
+    os.makedirs(directory, exist_ok=True)
+    ranges = split_id_range(since, until, shards)
+    paths = [shard_path(start, end, directory) for start, end in ranges]
+    # Fresh processes, each with its own session and quota tracking, pacing its calls on its share of the quotas.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(ranges), mp_context=context) as executor:
+        counts = list(executor.map(extract_shard, [start for start, _ in ranges], [end for _, end in ranges],
+                                   paths, [api_url] * len(ranges), [len(ranges)] * len(ranges)))
+    for (start, end), count in zip(ranges, counts):
+        print(f"Shard ({start}, {end}]: {count} users")
+
+    saved = merge_shards(paths, output_path)
+    print(f"Saved {saved} users information")
+    return saved
@@ -1,7 +1,17 @@
+import heapq
 import json
+import os
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterable, Iterator
 
+import numpy as np
 import pandas as pd
 
+from api.dataset import Dataset, save_snapshot
+from json_stream import iter_json_list, iter_json_records
+from storage import is_parquet, read_users, scan_users, write_users
+
 
 def remove_duplicates(users_list:list[dict]) -> list[dict]:
     """
@@ -47,40 +57,362 @@ def filter_users(required_fields:tuple[str, ...], creation_date_filter:str, user
     print(f"Filtered out users: {len(users_list) - len(df)}")
     return df.to_dict(orient="records")
 
+GITHUB_DATE_SEPARATORS = {4: "-", 7: "-", 10: "T", 13: ":", 16: ":", 19: "Z"}
+GITHUB_DATE_DIGITS = [i for i in range(20) if i not in GITHUB_DATE_SEPARATORS]
+# Turns the 14 digits of a date into its year, month, day, hour, minute and second.
+GITHUB_DATE_WEIGHTS = np.zeros((14, 6), dtype=np.float64)
+for field, (start, end) in enumerate(((0, 4), (4, 6), (6, 8), (8, 10), (10, 12), (12, 14))):
+    GITHUB_DATE_WEIGHTS[start:end, field] = 10 ** np.arange(end - start - 1, -1, -1)
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+def created_at_epochs(created_at:pd.Series) -> np.ndarray:
+    """
+    Converts creation dates to epoch seconds, without going through datetime objects.
+
+    GitHub dates have a fixed width ("2015-01-01T00:11:45Z"), so their digits are read straight from
+    a byte matrix. Other values are parsed by pandas; unparseable ones get the lowest int64.
+
+    :param created_at: The creation dates.
+    :type created_at: pd.Series
+
+    :return: The creation dates as int64 epoch seconds.
+    """
+    epochs = np.zeros(len(created_at), dtype=np.int64)
+    fast = np.zeros(len(created_at), dtype=bool)
+    try:
+        raw = created_at.to_numpy(dtype="S20")
+    except (UnicodeEncodeError, TypeError, ValueError):
+        raw = None
+
+    if raw is not None and len(raw):
+        chars = raw.view(np.uint8).reshape(len(raw), 20)
+        fast[:] = True
+        for position, separator in GITHUB_DATE_SEPARATORS.items():
+            fast &= chars[:, position] == ord(separator)
+        # Non-digit characters wrap around to values above 9.
+        digits = chars[:, GITHUB_DATE_DIGITS] - np.uint8(ord("0"))
+        fast &= (digits <= 9).all(axis=1)
+
+        # A float product runs on BLAS, and is exact for numbers this small.
+        fields = (digits.astype(np.float64) @ GITHUB_DATE_WEIGHTS).astype(np.int64)
+        year, month, day, hour, minute, second = np.ascontiguousarray(fields.T)
+        leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        month_index = np.clip(month, 1, 12) - 1
+        fast &= (month >= 1) & (month <= 12) & (day >= 1) & (hour < 24) & (minute < 60) & (second < 60)
+        fast &= day <= DAYS_IN_MONTH[month_index] + (leap & (month == 2))
+
+        # Days since the epoch from a civil date (proleptic Gregorian calendar).
+        year = year - (month <= 2)
+        era = year // 400
+        year_of_era = year - era * 400
+        day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+        day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+        days = era * 146097 + day_of_era - 719468
+        epochs = days * 86400 + hour * 3600 + minute * 60 + second
+
+    if not fast.all():
+        others = pd.to_datetime(created_at[~fast], errors="coerce", utc=True, format="ISO8601")
+        # NaT converts to the lowest int64, so unparseable dates are filtered out too.
+        epochs[~fast] = others.dt.as_unit("s").astype("int64").to_numpy()
+    return epochs
+
+def filter_users_frame(required_fields:tuple[str, ...], creation_date_filter:str, df:pd.DataFrame) -> pd.DataFrame:
+    """
+    Applies filters to a users DataFrame, in one pass.
+
+    All the filters are combined in a single boolean mask, and creation dates are compared as int64
+    epoch seconds. Unlike `filter_users`, `created_at` is kept as it was instead of being reformatted.
+
+    :param required_fields: The required fields.
+    :type required_fields: tuple[str, ...]
+    :param creation_date_filter: The oldest acceptable creation date.
+    :type creation_date_filter: str
+    :param df: The users DataFrame.
+    :type df: pd.DataFrame
+
+    :return: The filtered users DataFrame.
+    """
+    mask = np.ones(len(df), dtype=bool)
+
+    for field in required_fields:
+        if field not in df.columns:
+            return df.iloc[0:0]
+        column = df[field]
+        mask &= (column.notna() & (column != "")).to_numpy()
+
+    if "created_at" in df.columns:
+        mask &= created_at_epochs(df["created_at"]) >= int(pd.Timestamp(creation_date_filter, tz="UTC").timestamp())
+
+    return df[mask]
+
+def filter_users_frames(required_fields:tuple[str, ...], creation_date_filter:str,
+                        frames:Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Applies filters to users DataFrames chunk by chunk, for inputs that don't fit in memory.
+
+    :param required_fields: The required fields.
+    :type required_fields: tuple[str, ...]
+    :param creation_date_filter: The oldest acceptable creation date.
+    :type creation_date_filter: str
+    :param frames: The users DataFrames, e.g. from `iter_users_frames`.
+    :type frames: Iterable[pd.DataFrame]
+
+    :return: An iterator over the filtered DataFrames.
+    """
+    for df in frames:
+        yield filter_users_frame(required_fields, creation_date_filter, df)
+
+def iter_users_frames(file_path:str, chunksize:int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    Reads a users JSON (or JSON Lines, if it ends with `.jsonl`, or Parquet, if it ends with `.parquet`)
+    file as DataFrames of `chunksize` users.
+
+    :param file_path: The path to the users file.
+    :type file_path: str
+    :param chunksize: How many users each DataFrame holds.
+    :type chunksize: int
+
+    :return: An iterator over the DataFrames.
+    """
+    if is_parquet(file_path):
+        for batch in scan_users(file_path):
+            for start in range(0, batch.num_rows, chunksize):
+                yield batch.slice(start, chunksize).to_pandas()
+        return
+    if file_path.endswith(".jsonl"):
+        with pd.read_json(file_path, lines=True, chunksize=chunksize, dtype=False, convert_dates=False) as reader:
+            yield from reader
+        return
+    users = iter_json_list(file_path)
+    while chunk := list(islice(users, chunksize)):
+        yield pd.DataFrame(chunk)
+
 def load_users(file:str) -> list[dict]:
     """
-    Loads a users information list from a JSON file.
+    Loads a users information list from a JSON (or Parquet) file.
 
     :param file: The JSON file to get the users list from.
     :type file: str
 
     :return: The users list.
     """
-    users = json.load(open(file))
+    users = list(read_users(file)) if is_parquet(file) else json.load(open(file))
     print(f"Loaded users: {len(users)}")
     return users
 
-def save_filtered_users(users_list:list[dict]) -> None:
+def save_filtered_users(users_list:list[dict], snapshot_path:str | None = None,
+                        file_path:str = 'data/filtered_users.json') -> None:
     """
-    Saves the filtered users information list in a JSON file.
+    Saves the filtered users information list in a JSON (or Parquet) file.
 
     :param users_list: A list of users information.
     :type users_list: list[dict]
+    :param snapshot_path: Where to also save a binary snapshot for the API (optional).
+    :type snapshot_path: str | None
+    :param file_path: The path to the JSON file, or Parquet file if it ends with `.parquet`.
+    :type file_path: str
     """
-    with open('data/filtered_users.json', 'w') as fp:
-        json.dump(users_list, fp, indent=4)
+    if is_parquet(file_path):
+        write_users(users_list, file_path)
+    else:
+        with open(file_path, 'w') as fp:
+            json.dump(users_list, fp, indent=4)
     print(f"Saved filtered users: {len(users_list)}")
+    if snapshot_path:
+        save_snapshot(Dataset.from_records(users_list), snapshot_path)
 
 def load_filtered_users(file_path:str) -> list[dict]:
     """
-    Loads a filtered users information list from a JSON file.
+    Loads a filtered users information list from a JSON (or Parquet) file.
 
     :param file_path: The path to the JSON file to get the users list from.
     :type file_path: str
 
     :return: The users list.
     """
+    if is_parquet(file_path):
+        users = list(read_users(file_path))
+        print(f"Loaded users: {len(users)}")
+        return users
     with open(file_path, "r", encoding="utf-8") as f:
         users = json.load(f)
         print(f"Loaded users: {len(users)}")
-        return users
\ No newline at end of file
+        return users
+
+class IdBitmap:
+    """
+    A compact set of non-negative ids: one bit per possible id.
+
+    GitHub ids are dense, so this takes far less memory than a set of ints (about 12 MB for 100M ids).
+    """
+    def __init__(self):
+        self._bits = bytearray()
+
+    def add(self, user_id:int) -> bool:
+        """
+        Adds an id to the set.
+
+        :param user_id: The id to add.
+        :type user_id: int
+
+        :return: Whether the id was not already in the set.
+        """
+        if user_id < 0:
+            raise ValueError(f"Negative id: {user_id}")
+        byte, bit = divmod(user_id, 8)
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+        mask = 1 << bit
+        if self._bits[byte] & mask:
+            return False
+        self._bits[byte] |= mask
+        return True
+
+def parse_creation_date(created_at:str) -> datetime | None:
+    """
+    Parses a user's creation date as a UTC datetime.
+
+    :param created_at: The ISO 8601 creation date.
+    :type created_at: str
+
+    :return: The creation date, or None if it can't be parsed.
+    """
+    try:
+        date = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return date.astimezone(timezone.utc) if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+def filter_users_stream(required_fields:tuple[str, ...], creation_date_filter:str,
+                        input_path:str = 'data/users.json', output_path:str = 'data/filtered_users.json',
+                        snapshot_path:str | None = None) -> int:
+    """
+    Removes duplicates from a users file, applies filters and saves the result, one user at a time.
+
+    It gives the same result as `remove_duplicates` then `filter_users`, but memory use doesn't grow
+    with the number of users.
+
+    :param required_fields: The required fields.
+    :type required_fields: tuple[str, ...]
+    :param creation_date_filter: The oldest acceptable creation date.
+    :type creation_date_filter: str
+    :param input_path: The users JSON (or JSON Lines, if it ends with `.jsonl`, or Parquet, if it ends
+        with `.parquet`) file.
+    :type input_path: str
+    :param output_path: The filtered users JSON (or Parquet) file.
+    :type output_path: str
+    :param snapshot_path: Where to also save a binary snapshot for the API (optional).
+    :type snapshot_path: str | None
+
+    :return: How many users were saved.
+    """
+    creation_limit = parse_creation_date(creation_date_filter)
+    seen_ids = IdBitmap()
+    counts = {"loaded": 0, "duplicates": 0}
+
+    # With Parquet, row groups of users created before the limit are not even read. An id's duplicates
+    # are the same GitHub account, with the same creation date: they are all skipped, or all read.
+    users = read_users(input_path, created_after=creation_limit) if is_parquet(input_path) else iter_json_records(input_path)
+
+    def kept_users():
+        for user in users:
+            counts["loaded"] += 1
+            # Like `remove_duplicates`, the first occurrence wins even if it is then filtered out.
+            if not seen_ids.add(user["id"]):
+                counts["duplicates"] += 1
+                continue
+            if any(user.get(field) is None or user.get(field) == "" for field in required_fields):
+                continue
+            if "created_at" in user:
+                created_at = parse_creation_date(user["created_at"])
+                if created_at is None or created_at < creation_limit:
+                    continue
+                user["created_at"] = created_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+            yield user
+
+    saved = write_users(kept_users(), output_path)
+    print(f"Loaded users: {counts['loaded']}")
+    print(f"Duplicates removed: {counts['duplicates']}")
+    print(f"Filtered out users: {counts['loaded'] - counts['duplicates'] - saved}")
+    print(f"Saved filtered users: {saved}")
+    if snapshot_path:
+        save_snapshot(Dataset.from_records(read_users(output_path)), snapshot_path)
+    return saved
+
+def max_user_id(file_path:str) -> int | None:
+    """
+    Gets the highest user id of a users JSON (or JSON Lines, or Parquet) file. Only the ids are read from Parquet.
+
+    :param file_path: The path to the users file.
+    :type file_path: str
+
+    :return: The highest id, or None if the file doesn't exist or holds no users.
+    """
+    if not os.path.exists(file_path):
+        return None
+    return max((user["id"] for user in read_users(file_path, columns=["id"])), default=None)
+
+def merge_users_by_id(*users_lists:Iterable[dict]) -> Iterator[dict]:
+    """
+    Merges users lists sorted by id into one (a k-way merge), keeping the first user of each id.
+
+    :param users_lists: The users lists, each sorted by id, e.g. the users already stored then the new ones.
+    :type users_lists: Iterable[dict]
+
+    :return: An iterator over the merged users, in id order.
+    """
+    last_id = None
+    # On equal ids, `heapq.merge` yields from the earlier list first, so e.g. stored users win.
+    for user in heapq.merge(*users_lists, key=lambda user: user["id"]):
+        if user["id"] != last_id:
+            last_id = user["id"]
+            yield user
+
+def merge_users_file(new_users:Iterable[dict], file_path:str) -> int:
+    """
+    Merges users into a users JSON (or Parquet) file sorted by id, rewriting it in one streaming pass.
+
+    :param new_users: The users to add.
+    :type new_users: Iterable[dict]
+    :param file_path: The path to the JSON file (created if it doesn't exist).
+    :type file_path: str
+
+    :return: How many users the file holds.
+    """
+    new_users = sorted(new_users, key=lambda user: user["id"])
+    users = read_users(file_path) if os.path.exists(file_path) else iter(())
+    # Keeps the extension, which tells the format.
+    root, extension = os.path.splitext(file_path)
+    tmp_path = f"{root}.tmp{extension}"
+    count = write_users(merge_users_by_id(users, new_users), tmp_path)
+    os.replace(tmp_path, file_path)
+    return count
+
+def update_filtered_users(required_fields:tuple[str, ...], creation_date_filter:str, new_users:list[dict],
+                          output_path:str = 'data/filtered_users.json', snapshot_path:str | None = None) -> int:
+    """
+    Deduplicates and filters newly extracted users, then merges them into the filtered users file.
+
+    Only the new users go through `remove_duplicates` and `filter_users`: the users already filtered
+    are streamed through unchanged, so an incremental run costs in proportion to the new users.
+
+    :param required_fields: The required fields.
+    :type required_fields: tuple[str, ...]
+    :param creation_date_filter: The oldest acceptable creation date.
+    :type creation_date_filter: str
+    :param new_users: The newly extracted users.
+    :type new_users: list[dict]
+    :param output_path: The filtered users JSON (or Parquet) file, sorted by id.
+    :type output_path: str
+    :param snapshot_path: Where to also save a binary snapshot for the API (optional).
+    :type snapshot_path: str | None
+
+    :return: How many filtered users the file holds.
+    """
+    print(f"New users: {len(new_users)}")
+    filtered_users = filter_users(required_fields, creation_date_filter, remove_duplicates(new_users)) if new_users else []
+    saved = merge_users_file(filtered_users, output_path)
+    print(f"Saved filtered users: {saved} ({len(filtered_users)} new)")
+    if snapshot_path:
+        save_snapshot(Dataset.from_records(read_users(output_path)), snapshot_path)
+    return saved
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import time
+
+
+HTTP_CACHE_DIR = os.getenv("GITHUB_CACHE_DIR", "data/http_cache")
+HTTP_CACHE_MAX_AGE = int(os.getenv("GITHUB_CACHE_MAX_AGE", "86400"))
+
+
+class HttpCache:
+    """
+    On-disk cache of GitHub API responses, keyed by URL.
+
+    Each response is stored with its `ETag` and `Last-Modified` validators. Requests for a stored URL
+    are sent with `If-None-Match` / `If-Modified-Since`: GitHub answers `304 Not Modified` without
+    counting the call against the rate limit quota. A response validated less than `max_age`
+    seconds ago is used without any request at all.
+
+    :param directory: Where to store the responses, one JSON file per URL.
+    :type directory: str
+    :param max_age: How long a response is used without being revalidated, in seconds (0 to always revalidate).
+    :type max_age: int
+    """
+    def __init__(self, directory:str = HTTP_CACHE_DIR, max_age:int = HTTP_CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        # fresh: no request sent, not_modified: 304 answers, modified: revalidations answering 200,
+        # stored: responses saved.
+        self.stats = {"fresh": 0, "not_modified": 0, "modified": 0, "stored": 0}
+
+    def _path(self, url:str) -> str:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def _load(self, url:str) -> dict | None:
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def _save(self, url:str, entry:dict) -> None:
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def fresh(self, url:str, user_id:int | None = None) -> dict | list | None:
+        """
+        Gets a stored response that can be used without revalidating it.
+
+        :param url: The requested url.
+        :type url: str
+        :param user_id: The id the response must hold, e.g. the one listed for a login (optional).
+        :type user_id: int | None
+
+        :return: The decoded response, or None if it must be requested.
+        """
+        entry = self._load(url)
+        if entry is None or time.time() - entry["validated_at"] >= self.max_age:
+            return None
+        # A login listed with another id was renamed or reused: the stored user is not the same.
+        if user_id is not None and (not isinstance(entry["body"], dict) or entry["body"].get("id") != user_id):
+            return None
+        self.stats["fresh"] += 1
+        return entry["body"]
+
+    def headers(self, url:str) -> dict:
+        """
+        Gets the conditional request headers for a url.
+
+        :param url: The requested url.
+        :type url: str
+
+        :return: `If-None-Match` and `If-Modified-Since`, for the validators of the stored response.
+        """
+        entry = self._load(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url:str, response) -> dict | list | None:
+        """
+        Stores a `200` response, or refreshes the stored one on a `304`.
+
+        :param url: The requested url.
+        :type url: str
+        :param response: The API response (`requests` or `httpx`).
+
+        :return: The decoded response, or None if a `304` answered a url that isn't stored anymore.
+        """
+        if response.status_code == 304:
+            entry = self._load(url)
+            if entry is None:
+                return None
+            self.stats["not_modified"] += 1
+            entry["validated_at"] = time.time()
+            self._save(url, entry)
+            return entry["body"]
+
+        body = response.json()
+        if response.request.headers.get("If-None-Match") or response.request.headers.get("If-Modified-Since"):
+            self.stats["modified"] += 1
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._save(url, {"url": url, "etag": etag, "last_modified": last_modified,
+                             "validated_at": time.time(), "body": body})
+            self.stats["stored"] += 1
+        return body
+
+    @property
+    def quota_saved(self) -> int:
+        """
+        How many calls didn't count against the quota thanks to the cache.
+        """
+        return self.stats["fresh"] + self.stats["not_modified"]
+
+    def report(self) -> str:
+        """
+        Describes the cache statistics.
+
+        :return: The statistics, on one line.
+        """
+        return (f"HTTP cache: {self.stats['fresh']} fresh, {self.stats['not_modified']} not modified, "
+                f"{self.stats['modified']} modified, {self.stats['stored']} stored. "
+                f"Quota saved: {self.quota_saved} calls.")
@@ -0,0 +1,105 @@
+import json
+import textwrap
+from typing import Iterable, Iterator
+
+
+def iter_json_list(file_path:str, chunk_size:int = 1 << 16) -> Iterator:
+    """
+    Reads the items of a JSON list file one at a time, without loading the whole file.
+
+    :param file_path: The path to the JSON file.
+    :type file_path: str
+    :param chunk_size: How many characters to read at a time.
+    :type chunk_size: int
+
+    :return: An iterator over the list items.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        started = False
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    raise ValueError(f"{file_path}: unexpected end of JSON list")
+                buffer, pos = f.read(chunk_size), 0
+                eof = not buffer
+                continue
+
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"{file_path}: not a JSON list")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # A value ending with the buffer may continue in the next chunk (e.g. a number).
+                complete = end < len(buffer) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if complete:
+                yield item
+                pos = end
+            else:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+
+def iter_json_lines(file_path:str) -> Iterator:
+    """
+    Reads the items of a JSON Lines file one at a time.
+
+    :param file_path: The path to the JSON Lines file.
+    :type file_path: str
+
+    :return: An iterator over the items.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_json_records(file_path:str) -> Iterator:
+    """
+    Reads the items of a JSON list file, or of a JSON Lines file if its name ends with `.jsonl`.
+
+    :param file_path: The path to the file.
+    :type file_path: str
+
+    :return: An iterator over the items.
+    """
+    if file_path.endswith(".jsonl"):
+        return iter_json_lines(file_path)
+    return iter_json_list(file_path)
+
+def write_json_list(items:Iterable[dict], file_path:str) -> int:
+    """
+    Streams items to a JSON file, formatted like `json.dump(items, fp, indent=4)`.
+
+    :param items: The items to save.
+    :type items: Iterable[dict]
+    :param file_path: The path to the JSON file.
+    :type file_path: str
+
+    :return: How many items were written.
+    """
+    count = 0
+    with open(file_path, 'w') as fp:
+        fp.write("[")
+        for item in items:
+            fp.write(",\n" if count else "\n")
+            fp.write(textwrap.indent(json.dumps(item, indent=4), "    "))
+            count += 1
+        fp.write("\n]" if count else "]")
+    return count
@@ -1,12 +1,75 @@
-from extract_users import get_users_info, save_users
-from filtered_users import load_users, remove_duplicates, filter_users, save_filtered_users
+import argparse
+import asyncio
+
+from checkpoint import Checkpoint
+from extract_users import get_users_info, get_users_info_checkpointed, save_users
+from extract_users_async import get_users_info_async
+from extract_users_partitioned import get_users_info_partitioned
+from http_cache import HttpCache
+from filtered_users import (load_users, remove_duplicates, filter_users, save_filtered_users, filter_users_stream,
+                            max_user_id, merge_users_file, update_filtered_users)
 
 
 if __name__ == "__main__":
-    users_info = get_users_info(10000, 10361000)
-    save_users(users_info)
+    parser = argparse.ArgumentParser(description="Extract, deduplicate and filter GitHub users.")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="How many user details to fetch at the same time (default: one at a time, without asyncio).")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Append users to data/users.jsonl as they come and resume the previous run if it was interrupted.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Deduplicate and filter the users one at a time, without loading them all in memory.")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Also save the filtered users as a binary snapshot, memory-mapped by the API at startup.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only get the users newer than the highest id in data/users, and merge them into the existing files.")
+    parser.add_argument("--http-cache", action="store_true",
+                        help="Keep user details in data/http_cache and only request those that may have changed, conditionally.")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="Split the id range into shards, each extracted by its own process into data/shards/ (resumable), then merge them.")
+    parser.add_argument("--until", type=int, default=None,
+                        help="With --shards, the highest id to get (default: 10000 ids after the first one).")
+    parser.add_argument("--format", choices=("json", "parquet"), default="json",
+                        help="How to store data/users and data/filtered_users: JSON, or columnar Parquet (needs pyarrow).")
+    args = parser.parse_args()
+    users_path, filtered_users_path = f"data/users.{args.format}", f"data/filtered_users.{args.format}"
+    snapshot_path = "data/filtered_users.snapshot" if args.snapshot else None
+    if args.checkpoint and args.concurrency:
+        parser.error("--checkpoint only supports the sequential extraction")
+    if args.incremental and (args.checkpoint or args.stream):
+        parser.error("--incremental can't be combined with --checkpoint or --stream")
+    if args.shards and (args.checkpoint or args.concurrency or args.incremental):
+        parser.error("--shards can't be combined with --checkpoint, --concurrency or --incremental")
+
+    cache = HttpCache() if args.http_cache else None
+    since = 10361000
+    last_id = max_user_id(users_path) if args.incremental else None
+    if last_id is not None:
+        since = last_id
+        print(f"Incremental run: getting users after id {since}")
+
+    if args.shards:
+        get_users_info_partitioned(since, args.until if args.until is not None else since + 10000, args.shards,
+                                   users_path)
+    elif args.checkpoint:
+        checkpoint = Checkpoint("data/users.jsonl")
+        get_users_info_checkpointed(10000, since, checkpoint, cache=cache)
+        save_users(checkpoint.records(), users_path)
+    elif args.concurrency:
+        users_info = asyncio.run(get_users_info_async(10000, since, concurrency=args.concurrency, cache=cache))
+    else:
+        users_info = get_users_info(10000, since, cache=cache)
 
-    users = load_users('data/users.json')
-    unique_users = remove_duplicates(users)
-    filtered_users = filter_users(("bio", "avatar_url"), "2015-01-01", unique_users)
-    save_filtered_users(filtered_users)
\ No newline at end of file
+    if last_id is not None:
+        # Only the new users are deduplicated and filtered, then merged into the stored files in id order.
+        print(f"Saved {merge_users_file(users_info, users_path)} users information")
+        update_filtered_users(("bio", "avatar_url"), "2015-01-01", users_info, filtered_users_path, snapshot_path)
+    else:
+        if not (args.checkpoint or args.shards):
+            save_users(users_info, users_path)
+        if args.stream:
+            filter_users_stream(("bio", "avatar_url"), "2015-01-01", users_path, filtered_users_path, snapshot_path)
+        else:
+            users = load_users(users_path)
+            unique_users = remove_duplicates(users)
+            filtered_users = filter_users(("bio", "avatar_url"), "2015-01-01", unique_users)
+            save_filtered_users(filtered_users, snapshot_path, filtered_users_path)
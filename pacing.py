@@ -0,0 +1,167 @@
+import asyncio
+import os
+import random
+import time
+
+from token_pool import TokenPool
+
+
+# GitHub's primary rate limit window, in seconds.
+RATE_LIMIT_WINDOW = 3600
+BACKOFF_BASE = float(os.getenv("GITHUB_BACKOFF_BASE", "1"))
+BACKOFF_MAX = float(os.getenv("GITHUB_BACKOFF_MAX", "300"))
+WAIT_REASONS = ("quota", "pacing", "retry_after", "secondary_limit", "server_error", "connection")
+
+
+class Pacer:
+    """
+    Decides how long to wait before each GitHub API call, and counts the time spent waiting.
+
+    - Quota: once every token of the pool has run out, wait for the earliest reset.
+    - Pacing: while the quota is being spent faster than evenly over its window, space the calls so
+      that the remaining calls last until the reset, instead of bursting then sleeping. Processes
+      sharing the same tokens (e.g. extraction shards) each get their share of the remaining calls.
+    - `Retry-After` is honored as is. Secondary rate limits without it wait a minute, doubling on
+      each new attempt.
+    - 5xx responses and connection errors back off exponentially, with full jitter.
+
+    :param pool: The tokens the requests are sent with (None for no quota tracking).
+    :type pool: TokenPool | None
+    :param backoff_base: The first backoff delay, in seconds.
+    :type backoff_base: float
+    :param backoff_max: The longest backoff delay, in seconds.
+    :type backoff_max: float
+    :param window: The rate limit window duration, in seconds.
+    :type window: float
+    :param shares: How many processes spend the quotas of the same tokens at the same time.
+    :type shares: int
+    """
+    def __init__(self, pool:TokenPool | None = None, backoff_base:float = BACKOFF_BASE,
+                 backoff_max:float = BACKOFF_MAX, window:float = RATE_LIMIT_WINDOW, shares:int = 1):
+        self.pool = pool
+        self.shares = max(1, shares)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.window = window
+        self.waited = {reason: 0.0 for reason in WAIT_REASONS}
+        self.last_request: float | None = None
+
+    def interval(self, now:float) -> float:
+        """
+        Gets the spacing between calls that spends this process's share of the remaining quota evenly
+        until the reset.
+
+        :param now: The current timestamp.
+        :type now: float
+
+        :return: The interval, in seconds (0 if a token is not ahead of schedule, or its quota is unknown).
+        """
+        if self.pool is None:
+            return 0
+        rate = 0.0
+        for state in self.pool.states:
+            if state.remaining is None or state.limit is None or state.reset is None:
+                return 0
+            until_reset = max(1.0, state.reset - now)
+            # Behind an even spending of the window: this token may be used right away.
+            if (state.limit - state.remaining) / state.limit <= 1 - until_reset / self.window:
+                return 0
+            rate += state.remaining / until_reset
+        # The response headers tell the tokens' whole quotas, which every sharing process spends.
+        return self.shares / rate if rate else 0
+
+    def next_delay(self) -> tuple[float, str]:
+        """
+        Gets how long to wait before the next call, then counts it as sent.
+
+        :return: The delay, in seconds, and its reason ("quota" or "pacing").
+        """
+        now = time.time()
+        delay, reason = 0.0, "pacing"
+        if self.pool is not None:
+            delay = self.pool.get_delay()
+            if delay > 0:
+                reason = "quota"
+            elif self.last_request is not None:
+                delay = max(0.0, self.last_request + self.interval(now) - now)
+        self.last_request = now + delay
+        return delay, reason
+
+    def backoff(self, attempt:int) -> float:
+        """
+        Gets an exponential backoff delay, with full jitter.
+
+        :param attempt: How many attempts failed so far (from 1).
+        :type attempt: int
+
+        :return: The delay, in seconds.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def retry_delay(self, error_handling:dict, attempt:int) -> tuple[float, str]:
+        """
+        Gets how long to wait before retrying a request that `handle_status_code` says to retry.
+
+        :param error_handling: What `handle_status_code` returned.
+        :type error_handling: dict
+        :param attempt: How many attempts failed so far (from 1).
+        :type attempt: int
+
+        :return: The delay, in seconds, and its reason.
+        """
+        reason = error_handling.get("reason") or "server_error"
+        if reason == "server_error":
+            return self.backoff(attempt), reason
+        if reason == "secondary_limit":
+            return min(self.backoff_max, error_handling["timeout"] * 2 ** (attempt - 1)), reason
+        return error_handling["timeout"], reason
+
+    def count(self, delay:float, reason:str) -> float:
+        """
+        Counts a wait against its reason.
+
+        :param delay: How long the wait lasts, in seconds.
+        :type delay: float
+        :param reason: Why.
+        :type reason: str
+
+        :return: The delay, to sleep for.
+        """
+        if delay > 0:
+            self.waited[reason] += delay
+            if reason == "quota":
+                print(f"==================== Quota reached for every token, delaying calls for {delay:.0f} seconds ====================")
+        return delay
+
+    def wait(self, delay:float, reason:str) -> None:
+        """
+        Sleeps, counting the time against a reason.
+
+        :param delay: How long to sleep, in seconds.
+        :type delay: float
+        :param reason: Why.
+        :type reason: str
+        """
+        if delay > 0:
+            time.sleep(self.count(delay, reason))
+
+    async def wait_async(self, delay:float, reason:str) -> None:
+        """
+        Sleeps without blocking the event loop, counting the time against a reason.
+
+        :param delay: How long to sleep, in seconds.
+        :type delay: float
+        :param reason: Why.
+        :type reason: str
+        """
+        if delay > 0:
+            await asyncio.sleep(self.count(delay, reason))
+
+    def report(self) -> str:
+        """
+        Describes the time spent waiting.
+
+        :return: The time spent waiting by reason, on one line.
+        """
+        waits = ", ".join(f"{reason} {seconds:.1f} s" for reason, seconds in self.waited.items() if seconds)
+        return f"Waited {sum(self.waited.values()):.1f} s" + (f" ({waits})" if waits else "")
@@ -0,0 +1,236 @@
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from json_stream import iter_json_records, write_json_list
+
+
+USER_COLUMNS = ("id", "login", "created_at", "avatar_url", "bio")
+# The string columns, and the name of their arrays in `api.store.UserStore.arrays`.
+STRING_COLUMNS = {"login": "logins", "avatar_url": "avatar_urls", "bio": "bios"}
+# Users per Parquet row group: the unit skipped by predicate pushdown, and read at a time.
+ROW_GROUP_SIZE = 65536
+GITHUB_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def is_parquet(file_path:str) -> bool:
+    """
+    Tells whether a users file is stored as Parquet (`.parquet`), rather than JSON.
+
+    :param file_path: The path to the users file.
+    :type file_path: str
+
+    :return: Whether the file is a Parquet file.
+    """
+    return file_path.endswith(".parquet")
+
+def user_schema():
+    """
+    Gets the Arrow schema of a users Parquet file. Creation dates are UTC timestamps, so that they can be
+    compared (and row groups skipped) without parsing strings.
+
+    :return: The schema.
+    """
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("login", pa.string()),
+        ("created_at", pa.timestamp("s", tz="UTC")),
+        ("avatar_url", pa.string()),
+        ("bio", pa.string()),
+    ])
+
+def users_table(users:list[dict]):
+    """
+    Converts users records to an Arrow table. Creation dates that can't be parsed are stored as nulls.
+
+    :param users: The users records.
+    :type users: list[dict]
+
+    :return: The table.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    created_at = pd.to_datetime(pd.Series([user.get("created_at") for user in users], dtype=object),
+                                errors="coerce", utc=True, format="ISO8601")
+    schema = user_schema()
+    return pa.table({
+        "id": pa.array([user["id"] for user in users], pa.int64()),
+        "login": pa.array([user.get("login") for user in users], pa.string()),
+        "created_at": pa.Array.from_pandas(created_at).cast(schema.field("created_at").type, safe=False),
+        "avatar_url": pa.array([user.get("avatar_url") for user in users], pa.string()),
+        "bio": pa.array([user.get("bio") for user in users], pa.string()),
+    }, schema=schema)
+
+def write_users(users:Iterable[dict], file_path:str) -> int:
+    """
+    Saves users to a JSON file, or to a Parquet file if its name ends with `.parquet`.
+
+    Both are written a chunk at a time, so any iterable can be saved without holding every user in memory.
+
+    :param users: The users records.
+    :type users: Iterable[dict]
+    :param file_path: The path to the users file.
+    :type file_path: str
+
+    :return: How many users were written.
+    """
+    if not is_parquet(file_path):
+        return write_json_list(users, file_path)
+
+    import pyarrow.parquet as pq
+
+    count = 0
+    users = iter(users)
+    with pq.ParquetWriter(file_path, user_schema()) as writer:
+        while chunk := list(islice(users, ROW_GROUP_SIZE)):
+            writer.write_table(users_table(chunk), row_group_size=ROW_GROUP_SIZE)
+            count += len(chunk)
+    return count
+
+def as_utc(date:datetime) -> datetime:
+    """
+    Makes a date timezone-aware, naive dates being UTC.
+
+    :param date: The date.
+    :type date: datetime
+
+    :return: The UTC date.
+    """
+    return date.astimezone(timezone.utc) if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+def date_filter(created_after:datetime | None = None, created_before:datetime | None = None):
+    """
+    Builds an Arrow filter on the creation dates, pushed down to the Parquet row groups statistics.
+
+    :param created_after: The oldest creation date, included (optional).
+    :type created_after: datetime | None
+    :param created_before: The newest creation date, excluded (optional).
+    :type created_before: datetime | None
+
+    :return: The filter expression, or None without bounds.
+    """
+    import pyarrow.compute as pc
+
+    expression = None
+    if created_after is not None:
+        expression = pc.field("created_at") >= pc.scalar(as_utc(created_after))
+    if created_before is not None:
+        condition = pc.field("created_at") < pc.scalar(as_utc(created_before))
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def scan_users(file_path:str, columns:list[str] | None = None, created_after:datetime | None = None,
+               created_before:datetime | None = None):
+    """
+    Reads a users Parquet file as Arrow record batches, loading only some columns and row groups.
+
+    :param file_path: The path to the Parquet file.
+    :type file_path: str
+    :param columns: The columns to load (default: all of them).
+    :type columns: list[str] | None
+    :param created_after: Only users created at or after this date (optional).
+    :type created_after: datetime | None
+    :param created_before: Only users created before this date (optional).
+    :type created_before: datetime | None
+
+    :return: An iterator over the record batches.
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(file_path, format="parquet")
+    # Parquet has no seconds unit: the dates come back as milliseconds.
+    created_at_type = user_schema().field("created_at").type
+    for batch in dataset.to_batches(columns=list(columns) if columns else None,
+                                    filter=date_filter(created_after, created_before), batch_size=ROW_GROUP_SIZE):
+        if "created_at" in batch.schema.names:
+            index = batch.schema.get_field_index("created_at")
+            batch = batch.set_column(index, "created_at", batch.column(index).cast(created_at_type))
+        yield batch
+
+def read_users(file_path:str, columns:list[str] | None = None, created_after:datetime | None = None,
+               created_before:datetime | None = None) -> Iterator[dict]:
+    """
+    Reads users from a JSON (or JSON Lines) file, or from a Parquet file if its name ends with `.parquet`.
+
+    With Parquet, only the requested columns are read, and row groups outside the creation dates
+    bounds are skipped. JSON files are parsed whole, then projected and filtered.
+
+    :param file_path: The path to the users file.
+    :type file_path: str
+    :param columns: The fields to load, e.g. `["id", "login"]` (default: all of them).
+    :type columns: list[str] | None
+    :param created_after: Only users created at or after this date (optional).
+    :type created_after: datetime | None
+    :param created_before: Only users created before this date (optional).
+    :type created_before: datetime | None
+
+    :return: An iterator over the users records, with GitHub formatted creation dates.
+    """
+    if is_parquet(file_path):
+        yield from read_parquet_users(file_path, columns, created_after, created_before)
+        return
+
+    after = as_utc(created_after) if created_after is not None else None
+    before = as_utc(created_before) if created_before is not None else None
+    for user in iter_json_records(file_path):
+        if after is not None or before is not None:
+            try:
+                created_at = as_utc(datetime.fromisoformat(user["created_at"].replace("Z", "+00:00")))
+            except (AttributeError, KeyError, ValueError):
+                continue
+            if (after is not None and created_at < after) or (before is not None and created_at >= before):
+                continue
+        yield {key: user[key] for key in columns if key in user} if columns else user
+
+def read_parquet_users(file_path:str, columns:list[str] | None = None, created_after:datetime | None = None,
+                       created_before:datetime | None = None) -> Iterator[dict]:
+    """
+    Reads users from a Parquet file, see `read_users`.
+    """
+    import pyarrow.compute as pc
+
+    for batch in scan_users(file_path, columns, created_after, created_before):
+        if "created_at" in batch.schema.names:
+            index = batch.schema.get_field_index("created_at")
+            batch = batch.set_column(index, "created_at", pc.strftime(batch.column(index), format=GITHUB_DATE_FORMAT))
+        for user in batch.to_pylist():
+            # Like in the JSON files, users without a bio have no "bio" field.
+            if "bio" in user and user["bio"] is None:
+                del user["bio"]
+            yield user
+
+def read_user_columns(file_path:str, created_after:datetime | None = None,
+                      created_before:datetime | None = None) -> dict[str, np.ndarray]:
+    """
+    Reads a users Parquet file straight into NumPy arrays, without building a record per user.
+
+    :param file_path: The path to the Parquet file.
+    :type file_path: str
+    :param created_after: Only users created at or after this date (optional).
+    :type created_after: datetime | None
+    :param created_before: Only users created before this date (optional).
+    :type created_before: datetime | None
+
+    :return: The arrays, named like `UserStore.arrays`: ids, creation dates (int64 epoch seconds,
+        the lowest int64 where unknown), and the UTF-8 blob and offsets of each string column.
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_batches(list(scan_users(file_path, None, created_after, created_before)), user_schema())
+    columns = {
+        "ids": table.column("id").to_numpy(),
+        "created_at": table.column("created_at").cast(pa.int64()).fill_null(np.iinfo(np.int64).min).to_numpy(),
+    }
+    for name, array_name in STRING_COLUMNS.items():
+        values = table.column(name).fill_null("").cast(pa.large_string()).combine_chunks()
+        _, offsets, data = values.buffers()
+        offsets = np.frombuffer(offsets, dtype=np.int64)[values.offset:values.offset + len(values) + 1]
+        blob = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(0, dtype=np.uint8)
+        columns[f"{array_name}.blob"] = blob[offsets[0]:offsets[-1]]
+        columns[f"{array_name}.offsets"] = offsets - offsets[0]
+    return columns
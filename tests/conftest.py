@@ -0,0 +1,133 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class GitHubStub:
+    """
+    A local stand-in for the GitHub users API.
+
+    Serves `GET /users?per_page=&since=` and `GET /users/{login}` for users with ids `1..users_nb`,
+    with `X-RateLimit-*` headers on every response. Each token (`Authorization` header) has its own
+    quota. User details have an `ETag`: like GitHub, a
+    matching `If-None-Match` gets a `304` that doesn't count against the quota.
+
+    :param users_nb: How many users the stub knows.
+    :type users_nb: int
+    :param quota: How many calls are allowed per rate limit window (None for no limit).
+    :type quota: int | None
+    :param window: The rate limit window duration, in seconds.
+    :type window: float
+    """
+    def __init__(self, users_nb: int = 250, quota: int | None = None, window: float = 1):
+        self.users = {
+            f"user{i}": {
+                "login": f"user{i}",
+                "id": i,
+                "created_at": f"2015-01-{i % 28 + 1:02d}T00:00:00Z",
+                "avatar_url": f"https://avatars.githubusercontent.com/u/{i}?v=4",
+                "bio": f"Bio {i}" if i % 3 else None,
+            }
+            for i in range(1, users_nb + 1)
+        }
+        self.quota = quota
+        self.window = window
+        self.reset = time.time() + window
+        self.used = Counter()
+        # Paths answering an error status once, before behaving normally.
+        self.fail_once: dict[str, int] = {}
+        self.requests = Counter()
+        self.not_modified = 0
+        self.lock = threading.Lock()
+        self.url = None
+
+    def handle(self, path: str, query: dict, request_headers: dict | None = None) -> tuple[int, dict, object]:
+        request_headers = {name.lower(): value for name, value in (request_headers or {}).items()}
+        token = request_headers.get("authorization")
+        with self.lock:
+            self.requests[path] += 1
+            now = time.time()
+            if now >= self.reset:
+                self.reset = now + self.window
+                self.used.clear()
+            headers = {"X-RateLimit-Reset": str(int(self.reset) + 1)}
+
+            if path in self.fail_once:
+                status = self.fail_once.pop(path)
+                if status == 403:
+                    # Without a quota, a 403 is a token issue: no rate limit headers.
+                    headers = {"X-RateLimit-Remaining": "0", **headers} if self.quota is not None else {}
+                else:
+                    headers["X-RateLimit-Remaining"] = "5000"
+                if status == 429:
+                    headers["Retry-After"] = "0"
+                return status, headers, {"message": "error"}
+
+            login = path.removeprefix("/users/")
+            etag = f'W/"{hashlib.sha1(json.dumps(self.users[login]).encode()).hexdigest()}"' if login in self.users else None
+            if etag and request_headers.get("if-none-match") == etag:
+                self.not_modified += 1
+                remaining = "5000" if self.quota is None else str(self.quota - self.used[token])
+                return 304, {"X-RateLimit-Remaining": remaining, **headers, "ETag": etag}, None
+
+            if self.quota is not None:
+                if self.used[token] >= self.quota:
+                    headers["X-RateLimit-Remaining"] = "0"
+                    return 403, headers, {"message": "API rate limit exceeded"}
+                self.used[token] += 1
+                headers["X-RateLimit-Remaining"] = str(self.quota - self.used[token])
+            else:
+                headers["X-RateLimit-Remaining"] = "5000"
+
+        if path == "/users":
+            since = int(query.get("since", ["0"])[0])
+            per_page = int(query.get("per_page", ["30"])[0])
+            page = [{"login": u["login"], "id": u["id"]} for u in self.users.values() if u["id"] > since][:per_page]
+            return 200, headers, page
+
+        if login in self.users:
+            return 200, {**headers, "ETag": etag}, self.users[login]
+        return 404, headers, {"message": "Not Found"}
+
+
+@pytest.fixture
+def github_stub():
+    """
+    Runs a `GitHubStub` on a local port for the duration of a test.
+    """
+    stub = GitHubStub()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            status, headers, body = stub.handle(url.path, parse_qs(url.query), dict(self.headers))
+            content = json.dumps(body).encode() if body is not None else b""
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    stub.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    server.shutdown()
+    server.server_close()
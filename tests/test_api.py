@@ -4,6 +4,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import base64
+import json
 
 import pytest
 from httpx import AsyncClient, ASGITransport
@@ -94,4 +95,240 @@ async def test_get_user_authenticated():
     assert isinstance(data["login"], str)
     assert isinstance(data["created_at"], str)
     assert isinstance(data["avatar_url"], str)
-    assert isinstance(data["bio"], str)
\ No newline at end of file
+    assert isinstance(data["bio"], str)
+
+@pytest.mark.asyncio
+async def test_get_user_case_insensitive():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        headers = basic_auth_header(VALID_USER, VALID_PASSWORD)
+        response = await ac.get("/users/GigleStudios", headers=headers)
+        assert response.status_code == 404
+        response = await ac.get("/users/GigleStudios?case_insensitive=true", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["login"] == "giglestudios"
+
+@pytest.mark.asyncio
+async def test_get_user_by_id_unauthenticated():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        response = await ac.get("/users/by-id/10361351")
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_get_user_by_id_authenticated():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        headers = basic_auth_header(VALID_USER, VALID_PASSWORD)
+        response = await ac.get("/users/by-id/10361351", headers=headers)
+        missing = await ac.get("/users/by-id/1", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["login"] == "giglestudios"
+    assert missing.status_code == 404
+
+@pytest.mark.asyncio
+async def test_search_users_prefix_paginated():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        headers = basic_auth_header(VALID_USER, VALID_PASSWORD)
+        response = await ac.get("/users/search?q=GIGLE&mode=prefix&limit=1", headers=headers)
+        invalid = await ac.get("/users/search?q=gigle&mode=fuzzy", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == [{"id": 10361351, "login": "giglestudios"}]
+    assert invalid.status_code == 422
+
+@pytest.mark.asyncio
+async def test_search_users_page_size():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        headers = basic_auth_header(VALID_USER, VALID_PASSWORD)
+        first = await ac.get("/users/search?q=e", headers=headers)
+        assert len(first.json()) == 100
+        assert (await ac.get("/users/search?q=e&limit=100000", headers=headers)).status_code == 422
+
+        seen = []
+        url = "/users/search?q=e&limit=250"
+        while url:
+            response = await ac.get(url, headers=headers)
+            assert response.status_code == 200
+            seen += response.json()
+            url = response.links.get("next", {}).get("url")
+        assert seen[:100] == first.json()
+        assert len(seen) == len({u["id"] for u in seen}) > 250
+
+@pytest.mark.asyncio
+async def test_get_users_keyset_pagination():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        headers = basic_auth_header(VALID_USER, VALID_PASSWORD)
+        everything = (await ac.get("/users/?format=ndjson", headers=headers)).text.splitlines()
+        ids = [json.loads(line)["id"] for line in everything]
+        assert ids == sorted(ids)
+
+        seen = []
+        url = "/users/?limit=250"
+        while url:
+            response = await ac.get(url, headers=headers)
+            assert response.status_code == 200
+            seen += [u["id"] for u in response.json()]
+            url = response.links.get("next", {}).get("url")
+        assert seen == ids
+
+        response = await ac.get(f"/users/?after_id={ids[9]}&limit=2", headers=headers)
+        assert [u["id"] for u in response.json()] == ids[10:12]
+        response = await ac.get("/users/?limit=100000", headers=headers)
+        assert response.status_code == 422
+        # Exports are not capped like pages.
+        response = await ac.get("/users/?format=ndjson&limit=100000", headers=headers)
+        assert response.status_code == 200
+        assert response.text.splitlines() == everything
+        response = await ac.get(f"/users/?format=ndjson&limit=1001&after_id={ids[0]}", headers=headers)
+        assert len(response.text.splitlines()) == len(ids) - 1
+
+@pytest.mark.asyncio
+async def test_get_dataset_generation():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        response = await ac.get("/admin/dataset", headers=basic_auth_header(VALID_USER, VALID_PASSWORD))
+        assert response.status_code == 200
+        assert response.json()["generation"] >= 1
+        assert response.json()["users"] > 0
+        assert (await ac.get("/admin/dataset")).status_code == 401
+
+@pytest.mark.asyncio
+async def test_etag_and_response_cache():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        headers = basic_auth_header(VALID_USER, VALID_PASSWORD)
+        first = await ac.get("/users/search?q=gig&limit=3", headers=headers)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"].startswith("private")
+        stats = (await ac.get("/admin/cache", headers=headers)).json()
+
+        second = await ac.get("/users/search?limit=3&q=gig", headers=headers)
+        assert second.content == first.content
+        assert second.headers["etag"] == etag
+        assert (await ac.get("/admin/cache", headers=headers)).json()["hits"] == stats["hits"] + 1
+
+        stats = (await ac.get("/admin/cache", headers=headers)).json()
+        not_modified = await ac.get("/users/search?q=gig&limit=3", headers={**headers, "If-None-Match": etag})
+        assert not_modified.status_code == 304
+        # Answered without rendering the response, nor looking it up.
+        cache_stats = (await ac.get("/admin/cache", headers=headers)).json()
+        assert (cache_stats["hits"], cache_stats["misses"]) == (stats["hits"], stats["misses"])
+        assert not_modified.content == b""
+        # The ETag is only valid for the url it was returned for.
+        response = await ac.get("/users/giglestudios", headers={**headers, "If-None-Match": f'W/{etag}'})
+        assert response.status_code == 200
+        assert response.json()["login"] == "giglestudios"
+        user_etag = response.headers["etag"]
+        assert user_etag != etag
+        response = await ac.get("/users/giglestudios", headers={**headers, "If-None-Match": f'W/{user_etag}'})
+        assert response.status_code == 304
+        response = await ac.get("/users/giglestudios", headers={**headers, "If-None-Match": '"other"'})
+        assert response.status_code == 200
+        # Missing users are not found, whatever the client has cached.
+        for if_none_match in ("*", etag, user_etag):
+            response = await ac.get("/users/does-not-exist", headers={**headers, "If-None-Match": if_none_match})
+            assert response.status_code == 404
+        assert (await ac.get("/users/giglestudios", headers={"If-None-Match": etag})).status_code == 401
+
+@pytest.mark.asyncio
+async def test_metrics():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        headers = basic_auth_header(VALID_USER, VALID_PASSWORD)
+        await ac.get("/users/giglestudios", headers=headers)
+        await ac.get("/users/giglestudios", headers=basic_auth_header(VALID_USER, INVALID_PASSWORD))
+        response = await ac.get("/metrics", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_requests_total{method="GET",route="/users/{user_login}",status="200"}' in response.text
+        assert 'http_requests_total{method="GET",route="/users/{user_login}",status="401"}' in response.text
+        assert 'http_request_duration_seconds_count{route="/users/{user_login}"}' in response.text
+        failures = int(response.text.split("\nauth_failures_total ")[1])
+        assert failures >= 1
+
+@pytest.mark.asyncio
+async def test_get_users_filters_and_sort():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        headers = basic_auth_header(VALID_USER, VALID_PASSWORD)
+        response = await ac.get("/users/?bio=developer&limit=1000", headers=headers)
+        assert response.status_code == 200
+        developers = response.json()
+        assert developers and len(developers) < 653
+        for summary in developers[:5]:
+            user = (await ac.get(f"/users/{summary['login']}", headers=headers)).json()
+            assert "developer" in user["bio"].lower()
+
+        response = await ac.get("/users/?sort=created_at&created_after=2015-01-01T12:00:00Z&limit=3", headers=headers)
+        dates = [(await ac.get(f"/users/{u['login']}", headers=headers)).json()["created_at"] for u in response.json()]
+        assert dates == sorted(dates) and dates[0] >= "2015-01-01T12:00:00Z"
+        assert 'rel="next"' in response.headers["link"] and "skip=3" in response.headers["link"]
+
+        logins = [u["login"].lower() for u in (await ac.get("/users/?sort=login&limit=50", headers=headers)).json()]
+        assert logins == sorted(logins)
+        response = await ac.get("/users/?has_bio=false", headers=headers)
+        assert response.json() == []
+        response = await ac.get("/users/?sort=login&after_id=1", headers=headers)
+        assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_search_users_bio_ranked_and_paginated():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        headers = basic_auth_header(VALID_USER, VALID_PASSWORD)
+        unauthenticated = await ac.get("/users/search/bio?q=developer")
+        assert unauthenticated.status_code == 401
+
+        response = await ac.get("/users/search/bio?q=software+developer&limit=1000", headers=headers)
+        everything = response.json()
+        assert everything and "link" not in response.headers
+        filtered = (await ac.get("/users/?bio=developer+software&limit=1000", headers=headers)).json()
+        assert sorted(u["id"] for u in everything) == sorted(u["id"] for u in filtered)
+        for summary in everything[:3]:
+            bio = (await ac.get(f"/users/{summary['login']}", headers=headers)).json()["bio"].lower()
+            assert "software" in bio and "developer" in bio
+
+        seen = []
+        url = "/users/search/bio?q=software+developer&limit=2"
+        while url:
+            response = await ac.get(url, headers=headers)
+            assert response.status_code == 200
+            seen += response.json()
+            url = response.links.get("next", {}).get("url")
+        assert seen == everything
+
+        assert (await ac.get("/users/search/bio?q=zzzunknownzzz", headers=headers)).json() == []
+        assert (await ac.get("/users/search/bio?q=", headers=headers)).status_code == 422
+
+@pytest.mark.asyncio
+async def test_get_users_batch():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://127.0.0.1:8000") as ac:
+        headers = basic_auth_header(VALID_USER, VALID_PASSWORD)
+        user = (await ac.get("/users/giglestudios", headers=headers)).json()
+        response = await ac.post("/users/batch", headers=headers, json={
+            "logins": ["GIGLESTUDIOS", "nobody-here"], "ids": [user["id"], 1], "case_insensitive": True})
+        assert response.status_code == 200
+        assert response.json() == {"users": [user], "missing_logins": ["nobody-here"], "missing_ids": [1]}
+
+        everyone = (await ac.get("/users/?format=ndjson", headers=headers)).text.splitlines()
+        logins = [json.loads(line)["login"] for line in everyone][:300]
+        response = await ac.post("/users/batch", headers=headers, json={"logins": logins + ["nobody-here"]})
+        assert response.status_code == 200
+        result = response.json()
+        assert [u["login"] for u in result["users"]] == logins
+        assert result["missing_logins"] == ["nobody-here"]
+
+        response = await ac.post("/users/batch", headers=headers, json={"ids": list(range(1001))})
+        assert response.status_code == 422
+        for ids in ([2 ** 70], [2 ** 63], [-1]):
+            response = await ac.post("/users/batch", headers=headers, json={"ids": ids})
+            assert response.status_code == 422
+        response = await ac.post("/users/batch", headers=headers, json={"ids": [2 ** 63 - 1]})
+        assert response.json()["missing_ids"] == [2 ** 63 - 1]
+        response = await ac.post("/users/batch", json={"logins": ["giglestudios"]})
+        assert response.status_code == 401
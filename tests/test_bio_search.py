@@ -0,0 +1,50 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from api.bio_search import BioSearch, delta_decode, delta_encode, tokenize
+
+
+BIOS = ["Software developer", "Data scientist, developer of software", "", "Développeur Python 🐍"]
+
+def test_tokenize():
+    assert tokenize("Data scientist, developer of SOFTWARE!") == ["data", "scientist", "developer", "of", "software"]
+    assert tokenize("Développeur 🐍") == ["développeur"]
+
+def test_positions():
+    search = BioSearch(BIOS)
+    assert search.positions("developer").tolist() == [0, 1]
+    assert search.positions("SOFTWARE developer").tolist() == [0, 1]
+    assert search.positions("data developer").tolist() == [1]
+    assert search.positions("développeur").tolist() == [3]
+    assert search.positions("developer python").tolist() == []
+    assert search.positions("unknown").tolist() == []
+    assert search.positions("!!").tolist() == []
+
+def test_round_trip():
+    search = BioSearch.from_arrays(BioSearch(BIOS).arrays())
+    assert search.positions("software").tolist() == [0, 1]
+    assert search.search("developer")[0].tolist() == [0, 1]
+
+def test_delta_encoding():
+    positions = np.array([3, 130, 131, 0, 2 ** 20, 2 ** 32 - 1], dtype=np.int64)
+    encoded, offsets = delta_encode(positions, np.array([0, 3, 3, 6]))
+    # 3, then gaps of 127 and 1: one byte each.
+    assert offsets.tolist() == [0, 3, 3, len(encoded)]
+    assert delta_decode(encoded[offsets[0]:offsets[1]]).tolist() == [3, 130, 131]
+    assert delta_decode(encoded[offsets[1]:offsets[2]]).tolist() == []
+    assert delta_decode(encoded[offsets[2]:offsets[3]]).tolist() == [0, 2 ** 20, 2 ** 32 - 1]
+
+def test_search_ranks_with_bm25():
+    bios = ["python", "python python python", "python developer", "java developer", "python, a python fan who writes a lot"]
+    search = BioSearch(bios)
+    # More occurrences rank higher, a longer bio lower.
+    positions, scores = search.search("python")
+    assert positions.tolist() == [1, 0, 2, 4]
+    assert np.all(np.diff(scores) <= 0)
+    assert search.search("python developer")[0].tolist() == [2]
+    assert search.search("python", skip=1, limit=2)[0].tolist() == [0, 2]
+    assert search.search("python", skip=10)[0].tolist() == []
@@ -0,0 +1,37 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import Response
+
+from api.cache import ResponseCache
+
+
+def test_response_cache_lru():
+    cache = ResponseCache(size=2)
+    assert cache.get("v1", "a") is None
+    cache.put("v1", "a", Response(b"A", media_type="application/json", headers={"Link": "<next>"}))
+    cache.put("v1", "b", Response(b"B"))
+    response = cache.get("v1", "a")
+    assert response.body == b"A"
+    assert response.headers["Link"] == "<next>"
+    assert response.media_type == "application/json"
+    cache.put("v1", "c", Response(b"C"))
+    assert cache.get("v1", "b") is None
+    assert cache.get("v1", "c").body == b"C"
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert len(cache) == 2
+
+def test_response_cache_new_version_invalidates():
+    cache = ResponseCache()
+    cache.put("v1", "a", Response(b"A"))
+    assert cache.get("v2", "a") is None
+    assert len(cache) == 0
+    cache.put("v1", "a", Response(b"A"))
+    assert cache.get("v1", "a").body == b"A"
+
+def test_response_cache_skips_large_bodies():
+    cache = ResponseCache(max_bytes=2)
+    cache.put("v1", "a", Response(b"ABC"))
+    assert cache.get("v1", "a") is None
@@ -0,0 +1,40 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+from checkpoint import Checkpoint
+from extract_users import get_users_info_checkpointed, save_users
+
+
+def test_checkpoint_drops_uncommitted_records(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "users.jsonl"), every=2)
+    assert checkpoint.open(10) == 10
+    for user_id in (11, 12, 13):
+        checkpoint.append({"id": user_id})
+    # A crash after the third append: only the first two were committed.
+    checkpoint._file.close()
+
+    checkpoint = Checkpoint(str(tmp_path / "users.jsonl"), every=2)
+    assert checkpoint.open(10) == 12
+    assert checkpoint.count == 2
+    checkpoint.close()
+    assert [u["id"] for u in checkpoint.records()] == [11, 12]
+
+def test_get_users_info_checkpointed_resumes(github_stub, tmp_path):
+    # The extraction stops on an unexpected response after 25 users.
+    github_stub.fail_once["/users/user26"] = 422
+    checkpoint = Checkpoint(str(tmp_path / "users.jsonl"), every=10)
+    assert get_users_info_checkpointed(50, 0, checkpoint, api_url=github_stub.url) == 25
+
+    checkpoint = Checkpoint(str(tmp_path / "users.jsonl"), every=10)
+    assert get_users_info_checkpointed(50, 0, checkpoint, api_url=github_stub.url) == 50
+    assert github_stub.requests["/users/user1"] == 1
+    assert github_stub.requests["/users/user26"] == 2
+
+    save_users(checkpoint.records(), str(tmp_path / "users.json"))
+    with open(tmp_path / "users.json") as f:
+        users = json.load(f)
+    assert [u["id"] for u in users] == list(range(1, 51))
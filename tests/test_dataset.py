@@ -0,0 +1,88 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+import numpy as np
+import pytest
+
+from api.dataset import Dataset, first_matching, load_dataset, load_snapshot, save_snapshot
+from filtered_users import load_filtered_users
+
+
+def test_snapshot_round_trip(tmp_path):
+    records = load_filtered_users("data/filtered_users.json")
+    dataset = Dataset.from_records(records)
+    save_snapshot(dataset, str(tmp_path / "snapshot"))
+    loaded = load_snapshot(str(tmp_path / "snapshot"))
+
+    assert isinstance(loaded.users.ids, np.memmap)
+    assert len(loaded.users) == len(records)
+    assert loaded.users.record(0) == dataset.users.record(0)
+    assert loaded.index.get_by_login("giglestudios") == 0
+    assert loaded.index.get_by_login("GIGLESTUDIOS", case_insensitive=True) == 0
+    assert loaded.index.get_by_id(records[-1]["id"]) == len(records) - 1
+    for q, mode in (("gig", "contains"), ("an", "contains"), ("studio", "contains"), ("sa", "prefix")):
+        assert loaded.search.search(q, mode=mode) == dataset.search.search(q, mode=mode)
+
+def test_snapshot_replaces_previous_one(tmp_path):
+    save_snapshot(Dataset.from_records([]), str(tmp_path / "snapshot"))
+    assert len(load_snapshot(str(tmp_path / "snapshot")).users) == 0
+    record = {"login": "a", "id": 1, "created_at": "2015-01-01T00:00:00Z", "avatar_url": "https://a", "bio": "b"}
+    save_snapshot(Dataset.from_records([record]), str(tmp_path / "snapshot"))
+    assert load_snapshot(str(tmp_path / "snapshot")).users.summary(0) == {"id": 1, "login": "a"}
+    assert sorted(os.listdir(tmp_path)) == ["snapshot"]
+
+def test_load_dataset_prefers_recent_snapshot(tmp_path):
+    record = {"login": "a", "id": 1, "created_at": "2015-01-01T00:00:00Z", "avatar_url": "https://a", "bio": "b"}
+    (tmp_path / "users.json").write_text(json.dumps([record]))
+    assert not isinstance(load_dataset(str(tmp_path / "users.json"), str(tmp_path / "snapshot")).users.ids, np.memmap)
+
+    save_snapshot(Dataset.from_records([record]), str(tmp_path / "snapshot"))
+    assert isinstance(load_dataset(str(tmp_path / "users.json"), str(tmp_path / "snapshot")).users.ids, np.memmap)
+
+    # A JSON file written after the snapshot wins.
+    os.utime(tmp_path / "users.json", (os.path.getmtime(tmp_path / "snapshot" / "manifest.json") + 10,) * 2)
+    assert not isinstance(load_dataset(str(tmp_path / "users.json"), str(tmp_path / "snapshot")).users.ids, np.memmap)
+
+def test_load_dataset_from_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    from storage import write_users
+
+    records = load_filtered_users("data/filtered_users.json")
+    write_users(records, str(tmp_path / "users.parquet"))
+    dataset = load_dataset(str(tmp_path / "users.parquet"))
+    assert len(dataset.users) == len(records)
+    assert dataset.users.record(len(records) - 1) == Dataset.from_records(records).users.record(len(records) - 1)
+    assert dataset.index.get_by_login("giglestudios") == 0
+
+def test_select():
+    records = [
+        {"login": "Carol", "id": 3, "created_at": "2015-01-03T00:00:00Z", "avatar_url": "https://a", "bio": "Python developer"},
+        {"login": "alice", "id": 1, "created_at": "2015-01-02T00:00:00Z", "avatar_url": "https://a", "bio": ""},
+        {"login": "bob", "id": 2, "created_at": "2015-01-01T00:00:00Z", "avatar_url": "https://a", "bio": "Developer"},
+    ]
+    dataset = Dataset.from_records(records)
+    jan_2, jan_3 = 1420156800, 1420243200
+    assert dataset.select().tolist() == [1, 2, 0]
+    assert dataset.select(sort="login").tolist() == [1, 2, 0]
+    assert dataset.select(sort="created_at").tolist() == [2, 1, 0]
+    assert dataset.select(sort="created_at", created_after=jan_2).tolist() == [1, 0]
+    assert dataset.select(created_after=jan_2, created_before=jan_3).tolist() == [1]
+    assert dataset.select(has_bio=True).tolist() == [2, 0]
+    assert dataset.select(has_bio=False).tolist() == [1]
+    assert dataset.select(bio="developer", sort="login").tolist() == [2, 0]
+    assert dataset.select(bio="developer", created_after=jan_2).tolist() == [0]
+    assert dataset.select(has_bio=True, skip=1, limit=1).tolist() == [0]
+    assert dataset.select(after_id=1, has_bio=True).tolist() == [2, 0]
+    with pytest.raises(ValueError):
+        dataset.select(sort="login", after_id=1)
+
+def test_first_matching_stops_early():
+    order = np.arange(10)[::-1]
+    mask = np.arange(10) % 2 == 0
+    assert first_matching(order, mask, 2, chunk_size=3).tolist() == [8, 6]
+    assert first_matching(order, mask, None, chunk_size=3).tolist() == [8, 6, 4, 2, 0]
+    assert first_matching(order[:0], mask, 2).tolist() == []
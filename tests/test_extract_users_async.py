@@ -0,0 +1,50 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from extract_users_async import get_users_info_async
+
+
+@pytest.mark.asyncio
+async def test_get_users_info_async(github_stub):
+    users = await get_users_info_async(150, 10, concurrency=8, api_url=github_stub.url)
+    assert [u["id"] for u in users] == list(range(11, 161))
+    assert users[0] == {
+        "login": "user11",
+        "id": 11,
+        "created_at": "2015-01-12T00:00:00Z",
+        "avatar_url": "https://avatars.githubusercontent.com/u/11?v=4",
+        "bio": "Bio 11",
+    }
+    assert "bio" not in users[1]
+    assert github_stub.requests["/users"] == 2
+
+@pytest.mark.asyncio
+async def test_get_users_info_async_skips_missing_users(github_stub):
+    github_stub.fail_once["/users/user3"] = 404
+    users = await get_users_info_async(5, 0, concurrency=2, api_url=github_stub.url)
+    assert [u["id"] for u in users] == [1, 2, 4, 5]
+
+@pytest.mark.asyncio
+async def test_get_users_info_async_retries_rate_limits(github_stub):
+    github_stub.fail_once["/users/user2"] = 429
+    github_stub.quota = 10
+    users = await get_users_info_async(20, 0, concurrency=4, api_url=github_stub.url)
+    assert [u["id"] for u in users] == list(range(1, 21))
+    assert github_stub.requests["/users/user2"] == 2
+
+@pytest.mark.asyncio
+async def test_get_users_info_async_stops_on_failed_page(github_stub):
+    github_stub.fail_once["/users"] = 404
+    users = await get_users_info_async(150, 0, concurrency=4, api_url=github_stub.url)
+    assert users == []
+    assert github_stub.requests["/users"] == 1
+
+@pytest.mark.asyncio
+async def test_get_users_info_async_stops_on_token_issue(github_stub):
+    github_stub.fail_once["/users"] = 403
+    users = await get_users_info_async(20, 0, concurrency=4, api_url=github_stub.url)
+    assert users == []
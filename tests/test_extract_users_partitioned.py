@@ -0,0 +1,37 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+from extract_users_partitioned import get_users_info_partitioned, merge_shards, split_id_range
+
+
+def test_split_id_range():
+    assert split_id_range(0, 100, 3) == [(0, 34), (34, 68), (68, 100)]
+    assert split_id_range(10, 12, 4) == [(10, 11), (11, 12)]
+
+def test_merge_shards_removes_boundary_duplicates(tmp_path):
+    shards = [[{"id": 1}, {"id": 3}, {"id": 4}], [{"id": 4}, {"id": 5}], [{"id": 2}]]
+    paths = []
+    for i, shard in enumerate(shards):
+        path = tmp_path / f"shard{i}.jsonl"
+        path.write_text("".join(json.dumps(user) + "\n" for user in shard))
+        paths.append(str(path))
+    assert merge_shards(paths, str(tmp_path / "users.json")) == 5
+    with open(tmp_path / "users.json") as f:
+        assert [u["id"] for u in json.load(f)] == [1, 2, 3, 4, 5]
+
+def test_get_users_info_partitioned_resumes(github_stub, tmp_path):
+    # The second shard stops on an unexpected response, the others finish.
+    github_stub.fail_once["/users/user50"] = 422
+    output_path = str(tmp_path / "users.json")
+    assert get_users_info_partitioned(0, 120, 3, output_path, str(tmp_path / "shards"), github_stub.url) == 89
+
+    assert get_users_info_partitioned(0, 120, 3, output_path, str(tmp_path / "shards"), github_stub.url) == 120
+    with open(output_path) as f:
+        assert [u["id"] for u in json.load(f)] == list(range(1, 121))
+    assert github_stub.requests["/users/user1"] == 1
+    assert github_stub.requests["/users/user50"] == 2
+    assert github_stub.requests["/users/user121"] == 0
@@ -0,0 +1,113 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+import pandas as pd
+import pytest
+
+from filtered_users import (IdBitmap, created_at_epochs, filter_users, filter_users_frame, filter_users_frames, filter_users_stream,
+                            iter_users_frames, max_user_id, merge_users_by_id, merge_users_file, remove_duplicates,
+                            update_filtered_users)
+from json_stream import iter_json_list
+
+
+USERS = [
+    {"login": "a", "id": 1, "created_at": "2015-01-02T10:00:00Z", "avatar_url": "https://a", "bio": "Bio [a], {b}"},
+    {"login": "b", "id": 2, "created_at": "2014-12-31T23:59:59Z", "avatar_url": "https://b", "bio": "Too old"},
+    {"login": "a2", "id": 1, "created_at": "2016-01-01T00:00:00Z", "avatar_url": "https://a2", "bio": "Duplicate"},
+    {"login": "c", "id": 3, "created_at": "2015-06-01T00:00:00Z", "avatar_url": "https://c"},
+    {"login": "d", "id": 4, "created_at": "2015-06-01T00:00:00Z", "avatar_url": "https://d", "bio": ""},
+    {"login": "e", "id": 5, "created_at": "not a date", "avatar_url": "https://e", "bio": "Bad date"},
+    {"login": "f", "id": 60, "created_at": "2015-01-01T00:00:00Z", "avatar_url": "https://f", "bio": "Jürgen 🎮"},
+]
+
+def test_iter_json_list_small_chunks(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps(USERS, indent=4), encoding="utf-8")
+    assert list(iter_json_list(str(path), chunk_size=7)) == USERS
+
+def test_iter_json_list_empty_and_invalid(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text("[ ]")
+    assert list(iter_json_list(str(path))) == []
+    path.write_text('[{"id": 1}')
+    with pytest.raises(ValueError):
+        list(iter_json_list(str(path)))
+
+def test_id_bitmap():
+    seen = IdBitmap()
+    assert seen.add(10361351)
+    assert not seen.add(10361351)
+    assert seen.add(0)
+    assert seen.add(7)
+    assert not seen.add(0)
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_filter_users_stream_matches_pandas(tmp_path, suffix):
+    path = tmp_path / f"users{suffix}"
+    if suffix == ".jsonl":
+        path.write_text("".join(json.dumps(u) + "\n" for u in USERS), encoding="utf-8")
+    else:
+        path.write_text(json.dumps(USERS, indent=4), encoding="utf-8")
+    expected = filter_users(("bio", "avatar_url"), "2015-01-01", remove_duplicates(USERS))
+
+    saved = filter_users_stream(("bio", "avatar_url"), "2015-01-01", str(path), str(tmp_path / "filtered.json"))
+    with open(tmp_path / "filtered.json", encoding="utf-8") as f:
+        assert json.load(f) == expected
+    assert saved == 2
+
+def test_filter_users_frame_matches_filter_users():
+    unique_users = remove_duplicates(USERS)
+    expected = filter_users(("bio", "avatar_url"), "2015-01-01", unique_users)
+    df = filter_users_frame(("bio", "avatar_url"), "2015-01-01", pd.DataFrame(unique_users))
+    assert df.to_dict(orient="records") == expected
+    assert filter_users_frame(("bio", "email"), "2015-01-01", pd.DataFrame(unique_users)).empty
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_filter_users_frames_chunked(tmp_path, suffix):
+    path = tmp_path / f"users{suffix}"
+    if suffix == ".jsonl":
+        path.write_text("".join(json.dumps(u) + "\n" for u in USERS), encoding="utf-8")
+    else:
+        path.write_text(json.dumps(USERS, indent=4), encoding="utf-8")
+    frames = filter_users_frames(("bio", "avatar_url"), "2015-01-01", iter_users_frames(str(path), chunksize=3))
+    assert [u["login"] for df in frames for u in df.to_dict(orient="records")] == ["a", "a2", "f"]
+
+def test_created_at_epochs_matches_pandas():
+    created_at = pd.Series(["2015-01-01T00:11:45Z", "2016-02-29T23:59:59+01:00", None, "garbage",
+                            "2015-13-01T00:00:00Z", "2015-02-29T00:00:00Z", "1969-12-31T23:59:59Z",
+                            "2400-02-29T00:00:00Z"])
+    expected = pd.to_datetime(created_at, errors="coerce", utc=True, format="ISO8601")
+    expected = expected.dt.as_unit("s").astype("int64").tolist()
+    assert created_at_epochs(created_at).tolist() == expected
+    assert created_at_epochs(pd.concat([created_at, pd.Series(["Jürgen"])])).tolist()[:-1] == expected
+
+def test_max_user_id(tmp_path):
+    path = tmp_path / "users.json"
+    assert max_user_id(str(path)) is None
+    path.write_text("[]")
+    assert max_user_id(str(path)) is None
+    path.write_text(json.dumps(USERS))
+    assert max_user_id(str(path)) == 60
+
+def test_merge_users_by_id_keeps_stored_users():
+    stored = [{"id": 1, "login": "a"}, {"id": 5, "login": "e"}]
+    new = [{"id": 2, "login": "b"}, {"id": 5, "login": "e2"}, {"id": 7, "login": "g"}]
+    assert [u["login"] for u in merge_users_by_id(stored, new)] == ["a", "b", "e", "g"]
+
+def test_update_filtered_users_matches_full_run(tmp_path):
+    old, new = [u for u in USERS if u["id"] < 5], [u for u in USERS if u["id"] >= 5]
+    raw_path, output_path = tmp_path / "users.json", tmp_path / "filtered.json"
+    raw_path.write_text(json.dumps(old))
+    output_path.write_text(json.dumps(filter_users(("bio", "avatar_url"), "2015-01-01", remove_duplicates(old))))
+
+    assert merge_users_file(list(reversed(new)), str(raw_path)) == 7
+    saved = update_filtered_users(("bio", "avatar_url"), "2015-01-01", new, str(output_path))
+    expected = filter_users(("bio", "avatar_url"), "2015-01-01", remove_duplicates(USERS))
+    with open(output_path, encoding="utf-8") as f:
+        assert json.load(f) == expected
+    assert saved == 2
+    assert update_filtered_users(("bio", "avatar_url"), "2015-01-01", [], str(output_path)) == 2
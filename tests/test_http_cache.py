@@ -0,0 +1,45 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from extract_users import get_users_info
+from extract_users_async import get_users_info_async
+from http_cache import HttpCache
+
+
+def test_unchanged_users_are_not_modified(github_stub, tmp_path):
+    first = get_users_info(20, 0, api_url=github_stub.url, cache=HttpCache(str(tmp_path), max_age=0))
+    github_stub.users["user3"]["bio"] = "New bio"
+
+    cache = HttpCache(str(tmp_path), max_age=0)
+    second = get_users_info(20, 0, api_url=github_stub.url, cache=cache)
+    assert [u["id"] for u in second] == list(range(1, 21))
+    assert second[2]["bio"] == "New bio"
+    assert second[:2] == first[:2]
+    assert github_stub.not_modified == 19
+    assert cache.stats == {"fresh": 0, "not_modified": 19, "modified": 1, "stored": 1}
+    assert cache.quota_saved == 19
+
+def test_fresh_users_are_not_requested(github_stub, tmp_path):
+    get_users_info(10, 0, api_url=github_stub.url, cache=HttpCache(str(tmp_path)))
+    cache = HttpCache(str(tmp_path))
+    # A login listed with another id was reused by another account: its cached details are not used.
+    assert cache.fresh(f"{github_stub.url}/users/user4", user_id=5) is None
+    users = get_users_info(10, 0, api_url=github_stub.url, cache=cache)
+    assert len(users) == 10
+    assert github_stub.requests["/users/user1"] == 1
+    assert cache.stats["fresh"] == 10
+    assert cache.quota_saved == 10
+
+@pytest.mark.asyncio
+async def test_get_users_info_async_uses_cache(github_stub, tmp_path):
+    first = await get_users_info_async(30, 0, concurrency=4, api_url=github_stub.url,
+                                       cache=HttpCache(str(tmp_path), max_age=0))
+    cache = HttpCache(str(tmp_path), max_age=0)
+    second = await get_users_info_async(30, 0, concurrency=4, api_url=github_stub.url, cache=cache)
+    assert second == first
+    assert cache.stats["not_modified"] == 30
+    assert github_stub.requests["/users/user1"] == 2
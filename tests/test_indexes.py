@@ -0,0 +1,60 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+
+from api.indexes import UserIndex
+
+
+IDS = np.array([3, 1, 2, 1], dtype=np.int64)
+LOGINS = ["Alice", "bob", "alice", "bob2"]
+
+def test_get_by_login():
+    index = UserIndex(IDS, LOGINS)
+    assert index.get_by_login("bob") == 1
+    assert index.get_by_login("Alice") == 0
+    assert index.get_by_login("BOB") is None
+
+def test_get_by_login_case_insensitive():
+    index = UserIndex(IDS, LOGINS)
+    assert index.get_by_login("BOB", case_insensitive=True) == 1
+    assert index.get_by_login("ALICE", case_insensitive=True) == 0
+
+def test_get_by_login_case_insensitive_not_built():
+    index = UserIndex(IDS, LOGINS, case_insensitive=False)
+    with pytest.raises(ValueError):
+        index.get_by_login("bob", case_insensitive=True)
+
+def test_get_by_id():
+    index = UserIndex(IDS, LOGINS)
+    assert index.get_by_id(3) == 0
+    assert index.get_by_id(2) == 2
+    assert index.get_by_id(1) == 1
+    assert index.get_by_id(4) is None
+    assert index.get_by_id(2 ** 70) is None
+    assert len(index) == 4
+
+def test_positions_by_id():
+    index = UserIndex(IDS, LOGINS)
+    assert index.positions_by_id().tolist() == [1, 3, 2, 0]
+    assert index.positions_by_id(after_id=1).tolist() == [2, 0]
+    assert index.positions_by_id(after_id=1, skip=1, limit=1).tolist() == [0]
+    assert index.positions_by_id(after_id=3).tolist() == []
+    assert index.positions_by_id(after_id=-2 ** 70, limit=2).tolist() == [1, 3]
+
+def test_positions_by_created_at():
+    index = UserIndex(IDS, LOGINS, created_at=np.array([30, 10, 20, 20], dtype=np.int64))
+    assert index.positions_by_created_at().tolist() == [1, 2, 3, 0]
+    assert index.positions_by_created_at(20).tolist() == [2, 3, 0]
+    assert index.positions_by_created_at(11, 30).tolist() == [2, 3]
+    assert index.positions_by_created_at(created_before=10).tolist() == []
+    with pytest.raises(ValueError):
+        UserIndex(IDS, LOGINS).positions_by_created_at(20)
+
+def test_get_by_ids():
+    index = UserIndex(IDS, LOGINS)
+    assert index.get_by_ids([3, 2, 1, 4, 2 ** 70, 2]).tolist() == [0, 2, 1, -1, -1, 2]
+    assert index.get_by_ids([]).tolist() == []
@@ -0,0 +1,56 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+
+from api.metrics import Histogram, Metrics, SlowRequestProfiler
+
+
+def test_histogram_is_cumulative():
+    histogram = Histogram((1, 10))
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+    assert histogram.render("size", 'route="/"') == [
+        'size_bucket{route="/",le="1"} 2',
+        'size_bucket{route="/",le="10"} 3',
+        'size_bucket{route="/",le="+Inf"} 4',
+        'size_sum{route="/"} 56.5',
+        'size_count{route="/"} 4',
+    ]
+
+def test_metrics_render():
+    metrics = Metrics()
+    metrics.observe("GET", "/users/", 200, 0.002, 1500)
+    metrics.observe("GET", "/users/", 200, 0.004, 1500)
+    metrics.observe("GET", "/users/{user_login}", 404, 0.001, 30)
+    metrics.auth_failed()
+    text = metrics.render()
+    assert 'http_requests_total{method="GET",route="/users/",status="200"} 2' in text
+    assert 'http_requests_total{method="GET",route="/users/{user_login}",status="404"} 1' in text
+    assert 'http_request_duration_seconds_bucket{route="/users/",le="0.005"} 2' in text
+    assert 'http_response_size_bytes_count{route="/users/"} 2' in text
+    assert "auth_failures_total 1" in text
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def test_profiler_keeps_slowest_requests(tmp_path):
+    profiler = SlowRequestProfiler(keep=2, interval=0.001)
+    profiler.start()
+    try:
+        for label, seconds in (("fast", 0.01), ("slow", 0.1), ("medium", 0.05)):
+            start = time.perf_counter()
+            busy_wait(seconds)
+            profiler.record(label, start, time.perf_counter())
+    finally:
+        profiler.stop()
+    assert [label for _, _, label, _ in sorted(profiler.slowest, reverse=True)] == ["slow", "medium"]
+
+    assert profiler.dump(str(tmp_path)) == 2
+    profile = (tmp_path / "slowest-01.folded").read_text()
+    assert profile.startswith("# slow ")
+    assert "busy_wait" in profile
@@ -0,0 +1,68 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import random
+import time
+from types import SimpleNamespace
+
+from extract_users import get_users_info, handle_status_code
+from pacing import Pacer
+from token_pool import TokenPool
+
+
+def response(status_code, **headers):
+    return SimpleNamespace(status_code=status_code, headers={name.replace("_", "-"): value for name, value in headers.items()})
+
+def test_handle_status_code_reasons():
+    reset = str(int(time.time()) + 60)
+    server_error = handle_status_code(response(502))
+    assert not server_error["end_script"] and server_error["reason"] == "server_error"
+    assert handle_status_code(response(403, X_RateLimit_Remaining="0", X_RateLimit_Reset=reset), TokenPool([]))["reason"] == "quota"
+    assert handle_status_code(response(403, X_RateLimit_Remaining="12", X_RateLimit_Reset=reset))["reason"] == "secondary_limit"
+    retry_after = handle_status_code(response(429, Retry_After="7"))
+    assert (retry_after["reason"], retry_after["timeout"]) == ("retry_after", 7)
+    assert handle_status_code(response(403))["end_script"]
+
+def test_pacer_spreads_quota_until_reset():
+    pool = TokenPool(["token"])
+    pacer = Pacer(pool)
+    state = pool.states[0]
+    now = time.time()
+    state.limit, state.reset = 5000, int(now) + 3000
+    # 20% of the quota spent in the first 1/6th of the window: ahead of schedule.
+    state.remaining = 4000
+    assert abs(pacer.interval(now) - (state.reset - now) / 4000) < 1e-3
+    state.remaining = 4900
+    assert pacer.interval(now) == 0
+    # Four processes spending the same token: each one gets a quarter of the calls.
+    state.remaining = 4000
+    assert abs(Pacer(pool, shares=4).interval(now) - 4 * pacer.interval(now)) < 1e-6
+
+    state.remaining = 4000
+    assert pacer.next_delay() == (0, "pacing")
+    delay, reason = pacer.next_delay()
+    assert reason == "pacing" and 0.7 < delay < 0.8
+    state.remaining = 0
+    delay, reason = pacer.next_delay()
+    assert reason == "quota" and delay > 2990
+
+def test_pacer_backoff():
+    random.seed(0)
+    pacer = Pacer(backoff_base=1, backoff_max=10)
+    delays = [pacer.backoff(attempt) for attempt in range(1, 8) for _ in range(20)]
+    assert all(0 <= delay <= 10 for delay in delays)
+    assert max(delays[:20]) <= 1 and max(delays[-20:]) > 5
+    assert pacer.retry_delay({"reason": "secondary_limit", "timeout": 2}, 3) == (8, "secondary_limit")
+    assert pacer.retry_delay({"reason": "retry_after", "timeout": 3}, 5) == (3, "retry_after")
+
+    pacer.count(1.5, "server_error")
+    pacer.count(0.5, "connection")
+    assert pacer.report() == "Waited 2.0 s (server_error 1.5 s, connection 0.5 s)"
+
+def test_get_users_info_retries_server_errors(github_stub):
+    github_stub.fail_once["/users/user2"] = 503
+    users = get_users_info(5, 0, api_url=github_stub.url)
+    assert [u["id"] for u in users] == [1, 2, 3, 4, 5]
+    assert github_stub.requests["/users/user2"] == 2
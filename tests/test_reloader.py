@@ -0,0 +1,71 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import time
+
+import pytest
+
+from api.dataset import Dataset, save_snapshot
+from api.reloader import DatasetReloader
+
+
+def make_record(user_id):
+    return {"login": f"user{user_id}", "id": user_id, "created_at": "2015-01-01T00:00:00Z",
+            "avatar_url": "https://a", "bio": "b"}
+
+def write_users(path, ids):
+    path.write_text(json.dumps([make_record(user_id) for user_id in ids]))
+    # Make sure the change is visible even on file systems with a coarse mtime.
+    mtime = time.time() - 100 + len(ids)
+    os.utime(path, (mtime, mtime))
+
+def test_reload_after_files_settle(tmp_path):
+    write_users(tmp_path / "users.json", [1])
+    reloader = DatasetReloader(str(tmp_path / "users.json"), interval=0)
+    first = reloader.current
+    assert first.number == 1
+    assert reloader.check() is False
+
+    write_users(tmp_path / "users.json", [1, 2])
+    assert reloader.check() is False
+    assert reloader.current is first
+    assert reloader.check() is True
+    assert reloader.current.number == 2
+    assert len(reloader.current.dataset.users) == 2
+    assert reloader.current.dataset.index.get_by_login("user2") == 1
+    # The previous generation is left untouched, for the requests still using it.
+    assert len(first.dataset.users) == 1
+    assert reloader.check() is False
+
+def test_failed_reload_keeps_current_generation(tmp_path):
+    write_users(tmp_path / "users.json", [1])
+    reloader = DatasetReloader(str(tmp_path / "users.json"), interval=0)
+    (tmp_path / "users.json").write_text("[{")
+    reloader.check()
+    with pytest.raises(ValueError):
+        reloader.check()
+    assert reloader.current.number == 1
+
+def test_reload_picks_up_snapshot(tmp_path):
+    write_users(tmp_path / "users.json", [1])
+    reloader = DatasetReloader(str(tmp_path / "users.json"), str(tmp_path / "snapshot"), interval=0)
+    save_snapshot(Dataset.from_records([make_record(1), make_record(2), make_record(3)]), str(tmp_path / "snapshot"))
+    reloader.check()
+    assert reloader.check() is True
+    assert len(reloader.current.dataset.users) == 3
+
+def test_background_reload(tmp_path):
+    write_users(tmp_path / "users.json", [1])
+    reloader = DatasetReloader(str(tmp_path / "users.json"), interval=0.01)
+    reloader.start()
+    try:
+        write_users(tmp_path / "users.json", [1, 2])
+        deadline = time.monotonic() + 5
+        while reloader.current.number == 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        reloader.stop()
+    assert reloader.current.number == 2
@@ -0,0 +1,41 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from api.search import LoginSearch
+
+
+LOGINS = ["giglestudios", "Sanpei3", "benfarr", "gigabyte", "BenGiga", "a"]
+
+@pytest.mark.parametrize("q", ["g", "gi", "gig", "giga", "GIGLE", "e", "nf", "arr", "zzz", "a"])
+def test_contains_matches_scan(q):
+    search = LoginSearch(LOGINS)
+    expected = [i for i, login in enumerate(LOGINS) if q.lower() in login.lower()]
+    assert search.search(q) == expected
+
+def test_short_queries_use_postings():
+    search = LoginSearch.from_arrays(LoginSearch(LOGINS).arrays())
+    # Up to 3 characters, the logins themselves are never read.
+    search._lowered = None
+    assert search.search("G") == [0, 3, 4]
+    assert search.search("nf") == [2]
+    assert search.search("gig") == [0, 3, 4]
+    assert search.search("zz") == []
+
+def test_prefix_in_login_order():
+    search = LoginSearch(LOGINS)
+    assert [LOGINS[i] for i in search.search("b", mode="prefix")] == ["benfarr", "BenGiga"]
+    assert [LOGINS[i] for i in search.search("GIG", mode="prefix")] == ["gigabyte", "giglestudios"]
+    assert search.search("x", mode="prefix") == []
+
+def test_pagination():
+    search = LoginSearch(LOGINS)
+    assert search.search("g", skip=1, limit=2) == search.search("g")[1:3]
+    assert search.search("b", mode="prefix", skip=1) == search.search("b", mode="prefix")[1:]
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        LoginSearch(LOGINS).search("g", mode="fuzzy")
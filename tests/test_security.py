@@ -0,0 +1,90 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.security import HASH_ITERATIONS, CredentialStore, check_password, hash_password
+
+
+ACCOUNTS = [{"login": "test", "password": "1234"}, {"login": "admin", "password_hash": hash_password("admin123")}]
+
+def test_hash_password_is_salted():
+    first, second = hash_password("1234"), hash_password("1234")
+    assert first != second
+    assert check_password("1234", first)
+    assert check_password("1234", second)
+    assert not check_password("5678", first)
+
+def test_hash_password_keeps_iterations():
+    assert hash_password("1234").startswith(f"pbkdf2_sha256${HASH_ITERATIONS}$")
+    old_hash = hash_password("1234", iterations=1000)
+    assert old_hash.startswith("pbkdf2_sha256$1000$")
+    assert check_password("1234", old_hash)
+
+def test_credential_store_hashes_lazily(monkeypatch):
+    calls = []
+    monkeypatch.setattr("api.security.hash_password", lambda *args, **kwargs: calls.append(args) or hash_password(*args, **kwargs))
+    store = CredentialStore([{"login": "test", "password": "1234"}], iterations=1000)
+    assert len(store) == 1 and calls == []
+    assert store.verify("test", "1234")
+    assert store.verify("test", "1234", check_cache=False)
+    assert len(calls) == 1
+
+def test_credential_store_upgrades_weak_hashes(monkeypatch, caplog):
+    old_hash = hash_password("1234", iterations=1000)
+    store = CredentialStore([{"login": "old", "password_hash": old_hash}], iterations=2000)
+    assert "Password hash of old uses fewer than 2000 iterations" in caplog.text
+
+    checked = []
+    monkeypatch.setattr("api.security.check_password",
+                        lambda password, password_hash: checked.append(password_hash.split("$")[1]) or check_password(password, password_hash))
+    # A wrong password costs as much as for an unknown username.
+    assert not store.verify("old", "5678")
+    assert checked == ["1000", "2000"]
+    assert store._hashes["old"] == old_hash
+
+    assert store.verify("old", "1234")
+    assert store._hashes["old"].startswith("pbkdf2_sha256$2000$")
+    checked.clear()
+    assert store.verify("old", "1234", check_cache=False)
+    assert checked == ["2000"]
+
+def test_credential_store_verify():
+    store = CredentialStore(ACCOUNTS)
+    assert len(store) == 2
+    assert store.verify("test", "1234")
+    assert store.verify("admin", "admin123")
+    assert not store.verify("test", "admin123")
+    assert not store.verify("unknown", "1234")
+    assert not store.verify("", "")
+
+def test_credential_store_cache_skips_hashing(monkeypatch):
+    store = CredentialStore(ACCOUNTS)
+    assert store.verify("test", "1234")
+    calls = []
+    monkeypatch.setattr("api.security.check_password", lambda *args: calls.append(args) or False)
+    assert store.verify("test", "1234")
+    assert not store.verify("test", "5678")
+    assert len(calls) == 1
+
+def test_credential_store_cache_is_bounded_and_expires(monkeypatch):
+    store = CredentialStore(ACCOUNTS, cache_size=1, cache_ttl=60)
+    assert store.verify("test", "1234")
+    assert store.verify("admin", "admin123")
+    assert len(store._cache) == 1
+
+    now = [0.0]
+    monkeypatch.setattr("api.security.time.monotonic", lambda: now[0])
+    store = CredentialStore(ACCOUNTS, cache_ttl=60)
+    assert store.verify("test", "1234")
+    now[0] = 61
+    monkeypatch.setattr("api.security.check_password", lambda *args: False)
+    assert not store.verify("test", "1234")
+
+def test_credential_store_is_cached():
+    store = CredentialStore(ACCOUNTS)
+    assert not store.is_cached("test", "1234")
+    assert store.verify("test", "1234")
+    assert store.is_cached("test", "1234")
+    assert not store.verify("test", "5678")
+    assert not store.is_cached("test", "5678")
@@ -0,0 +1,20 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.server import RestartPolicy
+
+
+def test_restart_policy_backs_off_then_gives_up():
+    policy = RestartPolicy(max_restarts=3, window=60, backoff_base=0.5, backoff_max=1.5)
+    assert [policy.next_delay(now) for now in (0, 1, 2)] == [0.5, 1, 1.5]
+    assert policy.next_delay(3) is None
+
+def test_restart_policy_forgets_old_restarts():
+    policy = RestartPolicy(max_restarts=2, window=60, backoff_base=0.5)
+    assert policy.next_delay(0) == 0.5
+    assert policy.next_delay(30) == 1
+    # The first restart is out of the window.
+    assert policy.next_delay(61) == 1
+    assert policy.next_delay(200) == 0.5
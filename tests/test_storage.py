@@ -0,0 +1,83 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from api.store import UserStore
+from filtered_users import filter_users_stream, iter_users_frames, load_filtered_users, max_user_id, merge_users_file
+from storage import read_user_columns, read_users, scan_users, write_users
+
+
+USERS = [
+    {"login": "a", "id": 1, "created_at": "2015-01-02T10:00:00Z", "avatar_url": "https://a", "bio": "Bio [a], {b}"},
+    {"login": "b", "id": 2, "created_at": "2014-12-31T23:59:59Z", "avatar_url": "https://b", "bio": "Too old"},
+    {"login": "c", "id": 3, "created_at": "2015-06-01T00:00:00Z", "avatar_url": "https://c"},
+    {"login": "f", "id": 60, "created_at": "2015-01-01T00:00:00Z", "avatar_url": "https://f", "bio": "Jürgen 🎮"},
+]
+
+def test_parquet_round_trip(tmp_path):
+    path = str(tmp_path / "users.parquet")
+    assert write_users(USERS, path) == len(USERS)
+    assert list(read_users(path)) == USERS
+    assert max_user_id(path) == 60
+
+def test_parquet_projection(tmp_path):
+    path = str(tmp_path / "users.parquet")
+    write_users(USERS, path)
+    assert list(read_users(path, columns=["id", "login"])) == [{"id": u["id"], "login": u["login"]} for u in USERS]
+    assert next(scan_users(path, columns=["id"])).schema.names == ["id"]
+
+def test_created_at_pushdown_skips_row_groups(tmp_path, monkeypatch):
+    monkeypatch.setattr("storage.ROW_GROUP_SIZE", 2)
+    path = str(tmp_path / "users.parquet")
+    old = [{**user, "id": i, "created_at": "2010-01-01T00:00:00Z"} for i, user in enumerate(USERS[:2])]
+    write_users(old + USERS[2:], path)
+    assert [batch.num_rows for batch in scan_users(path, created_after=datetime(2015, 1, 1))] == [2]
+
+    users = read_users(path, columns=["id"], created_after=datetime(2015, 1, 1), created_before=datetime(2015, 6, 1))
+    assert list(users) == [{"id": 60}]
+
+def test_json_filters_like_parquet(tmp_path):
+    json_path, parquet_path = str(tmp_path / "users.json"), str(tmp_path / "users.parquet")
+    write_users(USERS, json_path)
+    write_users(USERS, parquet_path)
+    for path in (json_path, parquet_path):
+        assert [user["id"] for user in read_users(path, created_after=datetime(2015, 1, 1))] == [1, 3, 60]
+
+def test_unparsable_dates_are_null(tmp_path):
+    path = str(tmp_path / "users.parquet")
+    write_users([{**USERS[0], "created_at": "not a date"}], path)
+    assert list(read_users(path))[0]["created_at"] is None
+    assert list(read_users(path, created_after=datetime(2000, 1, 1))) == []
+
+def test_read_user_columns_matches_records(tmp_path):
+    # Filtered users, which all have a bio.
+    users = [user for user in USERS if "bio" in user]
+    path = str(tmp_path / "users.parquet")
+    write_users(users, path)
+    from_columns, from_records = UserStore.from_arrays(read_user_columns(path)), UserStore.from_records(users)
+    assert [from_columns.record(i) for i in range(len(users))] == [from_records.record(i) for i in range(len(users))]
+    assert from_columns.summary(2) == {"id": 60, "login": "f"}
+
+def test_filter_users_stream_parquet(tmp_path):
+    json_path, parquet_path = str(tmp_path / "users.json"), str(tmp_path / "users.parquet")
+    write_users(USERS + USERS[:1], parquet_path)
+    filter_users_stream(("bio", "avatar_url"), "2015-01-01", parquet_path, json_path)
+    filter_users_stream(("bio", "avatar_url"), "2015-01-01", parquet_path, str(tmp_path / "filtered.parquet"))
+    assert json.load(open(json_path)) == [USERS[0], USERS[3]]
+    assert load_filtered_users(str(tmp_path / "filtered.parquet")) == [USERS[0], USERS[3]]
+    assert sum(len(frame) for frame in iter_users_frames(parquet_path, chunksize=2)) == len(USERS) + 1
+
+def test_merge_users_file_parquet(tmp_path):
+    path = str(tmp_path / "users.parquet")
+    write_users(USERS[:2], path)
+    assert merge_users_file(USERS[2:], path) == len(USERS)
+    assert [user["id"] for user in read_users(path)] == [1, 2, 3, 60]
+    assert sorted(os.listdir(tmp_path)) == ["users.parquet"]
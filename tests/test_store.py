@@ -0,0 +1,57 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+
+from api.store import StringColumn, UserStore
+
+
+RECORDS = [
+    {"login": "giglestudios", "id": 10361351, "created_at": "2015-01-01T00:11:45Z",
+     "avatar_url": "https://avatars.githubusercontent.com/u/10361351?v=4", "bio": "Unity développeur 🎮\r\n"},
+    {"login": "sanpei3", "id": 10361358, "created_at": "2015-01-01T00:16:28Z",
+     "avatar_url": "https://avatars.githubusercontent.com/u/10361358?v=4", "bio": "@yoshiro_mihira"},
+]
+
+def test_string_column():
+    column = StringColumn.from_strings(["a", "", "é🎮"])
+    assert len(column) == 3
+    assert [column[0], column[1], column[2]] == ["a", "", "é🎮"]
+    assert list(column) == ["a", "", "é🎮"]
+
+def test_store_record_round_trip():
+    store = UserStore.from_records(RECORDS)
+    assert len(store) == 2
+    assert store.summary(1) == {"id": 10361358, "login": "sanpei3"}
+    record = store.record(0)
+    assert record["created_at"] == datetime(2015, 1, 1, 0, 11, 45, tzinfo=timezone.utc)
+    assert record["bio"] == RECORDS[0]["bio"]
+    assert record["avatar_url"] == RECORDS[0]["avatar_url"]
+
+def test_summaries_json():
+    store = UserStore.from_records(RECORDS + [{**RECORDS[0], "id": 1, "login": "é\"🎮"}])
+    expected = [store.summary(2), store.summary(0)]
+    assert json.loads(store.summaries_json([2, 0])) == expected
+    assert store.summaries_json([2, 0]) == json.dumps(expected, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    assert store.summaries_json([]) == b"[]"
+    assert store.summaries_ndjson(np.array([1, 2])).decode("utf-8").splitlines() == [
+        json.dumps(store.summary(1), ensure_ascii=False, separators=(",", ":")),
+        json.dumps(store.summary(2), ensure_ascii=False, separators=(",", ":"))]
+    assert store.summaries_ndjson([]) == b""
+
+def test_string_column_join():
+    column = StringColumn.from_strings(["ab", "", "c", "déf"])
+    assert column.join([3, 1, 0, 2], b", ") == "déf, , ab, c".encode("utf-8")
+    assert column.join(np.arange(4), b",") == "ab,,c,déf".encode("utf-8")
+    assert column.join(np.arange(1, 3)) == b"c"
+    assert column.join([1, 1], b",") == b","
+    assert column.join([], b",") == b""
+
+def test_records_json():
+    store = UserStore.from_records(RECORDS)
+    assert [json.loads(record) for record in store.records_json([1, 0])] == [RECORDS[1], RECORDS[0]]
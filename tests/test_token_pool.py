@@ -0,0 +1,69 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from extract_users import get_users_info
+from extract_users_async import get_users_info_async
+from token_pool import TokenPool
+
+
+def response(remaining, reset, status_code=200):
+    return SimpleNamespace(status_code=status_code,
+                           headers={"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(reset)})
+
+def test_token_pool_routes_to_most_headroom():
+    pool = TokenPool(["aaaa1111", "bbbb2222"])
+    assert [pool.acquire().token for _ in range(4)] == ["aaaa1111", "bbbb2222", "aaaa1111", "bbbb2222"]
+    assert pool.headers(pool.states[0]) == {"Authorization": "token aaaa1111"}
+
+    reset = int(time.time()) + 60
+    pool.update(pool.states[0], response(0, reset, 403))
+    pool.update(pool.states[1], response(3, reset))
+    assert pool.get_delay() == 0
+    assert [pool.acquire().token for _ in range(3)] == ["bbbb2222"] * 3
+    assert pool.get_delay() > 50
+
+    # Once the window is over, quotas are unknown again.
+    for state in pool.states:
+        state.reset = int(time.time()) - 1
+    assert pool.get_delay() == 0
+    assert "Token ...1111: 2 requests, 1 rate limited" in pool.report()
+
+def test_token_pool_from_env(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKENS", "one, two,")
+    assert [state.token for state in TokenPool.from_env().states] == ["one", "two"]
+    monkeypatch.delenv("GITHUB_TOKENS")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    assert TokenPool.from_env().headers(TokenPool.from_env().states[0]) == {}
+
+def exhaust_quickly(github_stub):
+    github_stub.quota = 10
+    github_stub.window = 30
+    github_stub.reset = time.time() + 30
+
+def test_get_users_info_spreads_tokens(github_stub):
+    exhaust_quickly(github_stub)
+    pool = TokenPool(["token-a", "token-b"])
+    start = time.monotonic()
+    users = get_users_info(15, 0, api_url=github_stub.url, pool=pool)
+    # One token would run out after 10 calls and wait 30 seconds for the reset.
+    assert time.monotonic() - start < 10
+    assert [u["id"] for u in users] == list(range(1, 16))
+    assert sorted(github_stub.used.values()) == [8, 8]
+
+@pytest.mark.asyncio
+async def test_get_users_info_async_spreads_tokens(github_stub):
+    exhaust_quickly(github_stub)
+    pool = TokenPool(["token-a", "token-b", "token-c"])
+    start = time.monotonic()
+    users = await get_users_info_async(25, 0, concurrency=4, api_url=github_stub.url, pool=pool)
+    assert time.monotonic() - start < 10
+    assert [u["id"] for u in users] == list(range(1, 26))
+    assert sum(github_stub.used.values()) == 26
+    assert max(github_stub.used.values()) <= 10
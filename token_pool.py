@@ -0,0 +1,148 @@
+import datetime
+import os
+import time
+
+
+class TokenState:
+    """
+    The quota of one GitHub token, as told by the `X-RateLimit-*` headers of its responses.
+
+    :param token: The token (None to call the API anonymously).
+    :type token: str | None
+    """
+    def __init__(self, token:str | None):
+        self.token = token
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset: int | None = None
+        self.requests = 0
+        self.rate_limited = 0
+
+    @property
+    def name(self) -> str:
+        """
+        The token, masked for display.
+        """
+        return f"...{self.token[-4:]}" if self.token else "anonymous"
+
+    def refresh(self, now:float) -> None:
+        """
+        Forgets the quota once its window is over: the next response tells how much the new one holds.
+
+        :param now: The current timestamp.
+        :type now: float
+        """
+        if self.reset is not None and now >= self.reset:
+            self.remaining, self.reset = None, None
+
+    def headroom(self) -> float:
+        """
+        How many calls are left, unknown quotas counting as unlimited.
+        """
+        return float("inf") if self.remaining is None else self.remaining
+
+
+class TokenPool:
+    """
+    Round-robin pool of GitHub tokens, each with its own quota.
+
+    Each request goes to the token with the most calls left (the least used one, on a tie). Callers
+    only have to wait once every token has run out, until the earliest reset.
+
+    :param tokens: The tokens (none to call the API anonymously).
+    :type tokens: list[str]
+    """
+    def __init__(self, tokens:list[str]):
+        self.states = [TokenState(token) for token in tokens] or [TokenState(None)]
+
+    @classmethod
+    def from_env(cls) -> "TokenPool":
+        """
+        Builds a pool from `GITHUB_TOKENS` (comma-separated), or from `GITHUB_TOKEN`.
+
+        :return: The pool.
+        """
+        tokens = os.getenv("GITHUB_TOKENS") or os.getenv("GITHUB_TOKEN") or ""
+        return cls([token.strip() for token in tokens.split(",") if token.strip()])
+
+    def acquire(self) -> TokenState:
+        """
+        Picks the token for the next request.
+
+        :return: The token with the most headroom.
+        """
+        now = time.time()
+        for state in self.states:
+            state.refresh(now)
+        state = max(self.states, key=lambda state: (state.headroom(), -state.requests))
+        state.requests += 1
+        # Concurrent requests are sent before their responses update the quota: count them right away.
+        if state.remaining is not None and state.remaining > 0:
+            state.remaining -= 1
+        return state
+
+    def update(self, state:TokenState, response) -> None:
+        """
+        Updates a token's quota from a response's headers.
+
+        :param state: The token the request was sent with.
+        :type state: TokenState
+        :param response: The API response (`requests` or `httpx`) that contains quota information.
+        """
+        if response.status_code in (403, 429):
+            state.rate_limited += 1
+        try:
+            remaining = int(response.headers.get("X-RateLimit-Remaining"))
+            reset = int(response.headers.get("X-RateLimit-Reset"))
+        except (TypeError, ValueError):
+            return
+
+        try:
+            state.limit = int(response.headers.get("X-RateLimit-Limit"))
+        except (TypeError, ValueError):
+            pass
+        # Concurrent responses arrive out of order: keep the lowest count of the latest window.
+        if state.reset is None or reset > state.reset:
+            state.remaining, state.reset = remaining, reset
+        elif reset == state.reset:
+            state.remaining = min(state.remaining, remaining)
+
+    def get_delay(self) -> float:
+        """
+        Gets the delay in seconds before making another API call.
+
+        :return: 0 while a token has calls left, else the time until the earliest reset.
+        """
+        now = time.time()
+        for state in self.states:
+            state.refresh(now)
+        if any(state.headroom() > 0 for state in self.states):
+            return 0
+        return max(0, min(state.reset for state in self.states) - now)
+
+    def report(self) -> str:
+        """
+        Describes how each token was used.
+
+        :return: One line per token.
+        """
+        lines = []
+        for state in self.states:
+            remaining = "unknown" if state.remaining is None else state.remaining
+            reset = ("" if state.reset is None else
+                     f", resets at {datetime.datetime.fromtimestamp(state.reset).strftime('%H:%M:%S')}")
+            lines.append(f"Token {state.name}: {state.requests} requests, {state.rate_limited} rate limited, "
+                         f"{remaining} calls left{reset}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def headers(state:TokenState) -> dict:
+        """
+        Gets the authentication headers of a token.
+
+        :param state: The token.
+        :type state: TokenState
+
+        :return: The headers.
+        """
+        return {"Authorization": f"token {state.token}"} if state.token else {}